@@ -4,6 +4,7 @@
 from pathlib import Path
 
 import environ
+from django.core.exceptions import ImproperlyConfigured
 
 BASE_DIR = Path(__file__).resolve(strict=True).parent.parent.parent
 # nems_proctor/
@@ -47,6 +48,34 @@ LOCALE_PATHS = [str(BASE_DIR / "locale")]
 # https://docs.djangoproject.com/en/dev/ref/settings/#databases
 DATABASES = {"default": env.db("DATABASE_URL")}
 DATABASES["default"]["ATOMIC_REQUESTS"] = True
+# Read replicas, used for safe API requests (see nems_proctor.core.replicas).
+DATABASE_REPLICAS = []
+for _index, _url in enumerate(env.list("DATABASE_REPLICA_URLS", default=[])):
+    DATABASES[f"replica_{_index}"] = {
+        **env.db_url_config(_url),
+        "ATOMIC_REQUESTS": False,
+    }
+    DATABASE_REPLICAS.append(f"replica_{_index}")
+# psycopg 3 connection pool per process (see nems_proctor.core.postgres_pool);
+# requires CONN_MAX_AGE = 0.
+DATABASE_POOL = env.bool("DATABASE_POOL", default=False)
+if DATABASE_POOL:
+    for _database in DATABASES.values():
+        _database["ENGINE"] = "nems_proctor.core.postgres_pool"
+        _database["CONN_MAX_AGE"] = 0
+        _database.setdefault("OPTIONS", {})["pool"] = {
+            "min_size": env.int("DATABASE_POOL_MIN_SIZE", default=2),
+            "max_size": env.int("DATABASE_POOL_MAX_SIZE", default=10),
+            # Seconds a request waits for a free connection before failing.
+            "timeout": env.float("DATABASE_POOL_TIMEOUT", default=10.0),
+            "max_idle": env.float("DATABASE_POOL_MAX_IDLE", default=600.0),
+            "max_lifetime": env.float("DATABASE_POOL_MAX_LIFETIME", default=3600.0),
+            # Test each connection with a round trip before handing it out.
+            "check": env.bool("DATABASE_POOL_CHECK", default=True),
+        }
+DATABASE_ROUTERS = ["nems_proctor.core.replicas.ReplicaRouter"]
+# Seconds a client's reads stay on the primary after it wrote something.
+DATABASE_REPLICA_PIN_SECONDS = env.int("DATABASE_REPLICA_PIN_SECONDS", default=5)
 # https://docs.djangoproject.com/en/stable/ref/settings/#std:setting-DEFAULT_AUTO_FIELD
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -136,16 +165,26 @@ AUTH_PASSWORD_VALIDATORS = [
 # https://docs.djangoproject.com/en/dev/ref/settings/#middleware
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "nems_proctor.core.compression.CompressionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.locale.LocaleMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "nems_proctor.core.replicas.ReplicaRoutingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "allauth.account.middleware.AccountMiddleware",
 ]
+# API responses CompressionMiddleware compresses with brotli or gzip, from
+# this size on (nems_proctor.core.compression).
+RESPONSE_COMPRESSION_TYPES = ["application/json", "application/msgpack"]
+RESPONSE_COMPRESSION_MIN_BYTES = env.int("RESPONSE_COMPRESSION_MIN_BYTES", default=1024)
+RESPONSE_COMPRESSION_BROTLI_QUALITY = env.int(
+    "RESPONSE_COMPRESSION_BROTLI_QUALITY",
+    default=4,
+)
 
 # STATIC
 # ------------------------------------------------------------------------------
@@ -238,6 +277,12 @@ MANAGERS = ADMINS
 # https://cookiecutter-django.readthedocs.io/en/latest/settings.html#other-environment-settings
 # Force the `admin` sign in process to go through the `django-allauth` workflow
 DJANGO_ADMIN_FORCE_ALLAUTH = env.bool("DJANGO_ADMIN_FORCE_ALLAUTH", default=False)
+# Admin changelists of tables estimated at this many rows or more show
+# PostgreSQL's row estimate instead of counting (nems_proctor.core.pagination).
+ADMIN_ESTIMATED_COUNT_THRESHOLD = env.int(
+    "ADMIN_ESTIMATED_COUNT_THRESHOLD",
+    default=100_000,
+)
 
 # LOGGING
 # ------------------------------------------------------------------------------
@@ -290,6 +335,21 @@ CELERY_TASK_TIME_LIMIT = 5 * 60
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#task-soft-time-limit
 # TODO: set to whatever value is adequate in your circumstances
 CELERY_TASK_SOFT_TIME_LIMIT = 60
+# https://docs.celeryq.dev/en/stable/userguide/configuration.html#task-default-queue
+CELERY_TASK_DEFAULT_QUEUE = "default"
+# Queues and time limits of the task lanes (see nems_proctor.core.lanes).
+TASK_LANES = {
+    "media": {
+        "queue": "media",
+        "time_limit": env.int("CELERY_MEDIA_TIME_LIMIT", default=30 * 60),
+        "soft_time_limit": env.int("CELERY_MEDIA_SOFT_TIME_LIMIT", default=25 * 60),
+    },
+    "io": {
+        "queue": "io",
+        "time_limit": env.int("CELERY_IO_TIME_LIMIT", default=2 * 60),
+        "soft_time_limit": env.int("CELERY_IO_SOFT_TIME_LIMIT", default=60),
+    },
+}
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#beat-scheduler
 CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#worker-send-task-events
@@ -317,13 +377,30 @@ SOCIALACCOUNT_FORMS = {"signup": "nems_proctor.users.forms.UserSocialSignupForm"
 # django-rest-framework
 # -------------------------------------------------------------------------------
 # django-rest-framework - https://www.django-rest-framework.org/api-guide/settings/
+# Encode and decode API JSON with orjson (nems_proctor.core.renderers); turn
+# off to fall back to DRF's own JSON renderer and parser.
+API_ORJSON = env.bool("API_ORJSON", default=True)
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework.authentication.SessionAuthentication",
-        "rest_framework.authentication.TokenAuthentication",
+        "nems_proctor.users.authentication.CachedTokenAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_RENDERER_CLASSES": (
+        "nems_proctor.core.renderers.ORJSONRenderer"
+        if API_ORJSON
+        else "rest_framework.renderers.JSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+        "nems_proctor.core.renderers.MessagePackRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "nems_proctor.core.renderers.ORJSONParser"
+        if API_ORJSON
+        else "rest_framework.parsers.JSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
     "TAGS": [
         "Session",
         "Session Record",
@@ -345,3 +422,130 @@ SPECTACULAR_SETTINGS = {
 }
 # Your stuff...
 # ------------------------------------------------------------------------------
+
+# Token authentication cache
+# ------------------------------------------------------------------------------
+# Seconds a resolved token stays in the shared cache (Redis in production).
+AUTH_TOKEN_CACHE_TIMEOUT = env.int("DJANGO_AUTH_TOKEN_CACHE_TIMEOUT", default=300)
+# Seconds a token stays in each process' LRU. Revocations take effect in all
+# processes immediately (see nems_proctor.users.authentication), so this only
+# bounds how long a copy is reused. Set to 0 to disable the LRU.
+AUTH_TOKEN_CACHE_LOCAL_TIMEOUT = env.int(
+    "DJANGO_AUTH_TOKEN_CACHE_LOCAL_TIMEOUT",
+    default=5,
+)
+AUTH_TOKEN_CACHE_LOCAL_SIZE = env.int(
+    "DJANGO_AUTH_TOKEN_CACHE_LOCAL_SIZE",
+    default=4096,
+)
+
+# Proctoring
+# ------------------------------------------------------------------------------
+# Seconds a username/exam code -> id mapping stays in the shared cache.
+PROCTORING_RESOLVER_CACHE_TIMEOUT = env.int(
+    "PROCTORING_RESOLVER_CACHE_TIMEOUT",
+    default=60 * 60,
+)
+# Maximum number of usernames accepted by one roster provisioning call.
+PROCTORING_PROVISION_MAX_USERNAMES = env.int(
+    "PROCTORING_PROVISION_MAX_USERNAMES",
+    default=10_000,
+)
+# Celery tasks (by name) run with the session id after a session has been
+# finalized, e.g. thumbnailing or archival.
+PROCTORING_FINALIZATION_TASKS = env.list(
+    "PROCTORING_FINALIZATION_TASKS",
+    default=["nems_proctor.proctoring.tasks.score_session_photos"],
+)
+# Layout of session contact sheets: frames per row, tile width in pixels and
+# the number of frames sampled across the session.
+PROCTORING_CONTACT_SHEET_COLUMNS = env.int(
+    "PROCTORING_CONTACT_SHEET_COLUMNS",
+    default=6,
+)
+PROCTORING_CONTACT_SHEET_TILE_WIDTH = env.int(
+    "PROCTORING_CONTACT_SHEET_TILE_WIDTH",
+    default=240,
+)
+PROCTORING_CONTACT_SHEET_MAX_FRAMES = env.int(
+    "PROCTORING_CONTACT_SHEET_MAX_FRAMES",
+    default=60,
+)
+# Photo scoring: width in pixels frames are decoded at (4:3) and the number
+# of frames scored per vectorized batch.
+PROCTORING_SCORING_FRAME_WIDTH = env.int("PROCTORING_SCORING_FRAME_WIDTH", default=64)
+PROCTORING_SCORING_BATCH_SIZE = env.int("PROCTORING_SCORING_BATCH_SIZE", default=256)
+# Maximum number of points in the loudness envelope of audio recordings.
+PROCTORING_AUDIO_ENVELOPE_POINTS = env.int(
+    "PROCTORING_AUDIO_ENVELOPE_POINTS",
+    default=1000,
+)
+# ffmpeg executable used to decode MP3 and Ogg audio.
+FFMPEG_BINARY = env("FFMPEG_BINARY", default="ffmpeg")
+# Seconds a completed response is replayed for retries with the same
+# Idempotency-Key.
+IDEMPOTENCY_KEY_TIMEOUT = env.int("IDEMPOTENCY_KEY_TIMEOUT", default=24 * 60 * 60)
+# Seconds a key stays claimed by a request that has not committed yet. The
+# claim is refreshed while the view runs, so this only bounds how long a key
+# stays blocked after its request died or was rolled back.
+IDEMPOTENCY_IN_FLIGHT_TIMEOUT = env.int("IDEMPOTENCY_IN_FLIGHT_TIMEOUT", default=60)
+# Seconds a duplicate waits for the in-flight request before answering 409.
+IDEMPOTENCY_IN_FLIGHT_WAIT = env.float("IDEMPOTENCY_IN_FLIGHT_WAIT", default=5.0)
+IDEMPOTENCY_POLL_INTERVAL = 0.05
+# Token buckets for add_photo / add_record: each upload takes one token from
+# the session's, the taker's and the company's bucket. "capacity" is the
+# burst size, "rate" the refill in tokens per second.
+UPLOAD_RATE_LIMITS = env.json(
+    "UPLOAD_RATE_LIMITS",
+    default={
+        "session": {"capacity": 10, "rate": 1},
+        "taker": {"capacity": 20, "rate": 2},
+        "company": {"capacity": 2000, "rate": 500},
+    },
+)
+for _scope, _limit in UPLOAD_RATE_LIMITS.items():
+    if _limit["capacity"] < 1 or _limit["rate"] <= 0:
+        _message = (
+            f"UPLOAD_RATE_LIMITS[{_scope!r}] needs a capacity of at least 1 "
+            "and a positive rate."
+        )
+        raise ImproperlyConfigured(_message)
+# Image normalization for SessionPhoto and SCREENSHOT SessionRecord uploads:
+# "off", "inline" (before storing) or "deferred" (Celery, after commit).
+MEDIA_NORMALIZE_MODE = env("MEDIA_NORMALIZE_MODE", default="off")
+# Output format understood by Pillow: "WEBP", "JPEG" or "PNG".
+MEDIA_NORMALIZE_FORMAT = env("MEDIA_NORMALIZE_FORMAT", default="WEBP")
+MEDIA_NORMALIZE_QUALITY = env.int("MEDIA_NORMALIZE_QUALITY", default=75)
+# Longest edge, in pixels, of a stored image.
+MEDIA_NORMALIZE_MAX_DIMENSION = env.int("MEDIA_NORMALIZE_MAX_DIMENSION", default=1280)
+# Upload size limits per media kind, enforced while the upload streams in.
+MEDIA_MAX_BYTES = {
+    "image": env.int("MEDIA_MAX_IMAGE_BYTES", default=10 * 1024 * 1024),
+    "audio": env.int("MEDIA_MAX_AUDIO_BYTES", default=200 * 1024 * 1024),
+    "video": env.int("MEDIA_MAX_VIDEO_BYTES", default=2 * 1024 * 1024 * 1024),
+}
+# Longest edge, in pixels, an uploaded image may have.
+MEDIA_MAX_IMAGE_DIMENSION = env.int("MEDIA_MAX_IMAGE_DIMENSION", default=8192)
+# Store session media under the SHA-256 of its content, so identical uploads
+# are kept once (see nems_proctor.proctoring.storage).
+MEDIA_CONTENT_ADDRESSED = env.bool("MEDIA_CONTENT_ADDRESSED", default=False)
+# Authenticated media delivery (nems_proctor.proctoring.delivery): bytes read
+# from storage per chunk, and seconds clients may cache a file privately.
+MEDIA_DELIVERY_CHUNK_BYTES = env.int("MEDIA_DELIVERY_CHUNK_BYTES", default=256 * 1024)
+MEDIA_DELIVERY_MAX_AGE = env.int("MEDIA_DELIVERY_MAX_AGE", default=60 * 60)
+# "stream" (Django streams the bytes) or "x-accel" (nginx sends them, see
+# compose/production/nginx/default.conf).
+MEDIA_DELIVERY_MODE = env("MEDIA_DELIVERY_MODE", default="stream")
+# Internal nginx locations for files on the media volume and for S3 objects,
+# and how long the presigned URL handed to nginx for S3 is valid.
+MEDIA_DELIVERY_ACCEL_LOCATION = "/internal/media/"
+MEDIA_DELIVERY_ACCEL_S3_LOCATION = "/internal/s3/"
+MEDIA_DELIVERY_PRESIGN_SECONDS = env.int("MEDIA_DELIVERY_PRESIGN_SECONDS", default=60)
+# Presign the S3 URLs handed out by the API (nems_proctor.proctoring.signing),
+# for private buckets. Signing times are aligned to windows of this many
+# seconds and URLs stay valid for the TTL after their window ends; at most
+# CACHE_SIZE signed URLs are kept per process.
+MEDIA_SIGNED_URLS = env.bool("MEDIA_SIGNED_URLS", default=False)
+MEDIA_SIGNED_URL_WINDOW = env.int("MEDIA_SIGNED_URL_WINDOW", default=15 * 60)
+MEDIA_SIGNED_URL_TTL = env.int("MEDIA_SIGNED_URL_TTL", default=60 * 60)
+MEDIA_SIGNED_URL_CACHE_SIZE = env.int("MEDIA_SIGNED_URL_CACHE_SIZE", default=100_000)
@@ -11,6 +11,8 @@ from drf_spectacular.views import SpectacularAPIView
 from drf_spectacular.views import SpectacularSwaggerView
 from rest_framework.authtoken.views import obtain_auth_token
 
+from nems_proctor.core.views import MetricsView
+
 urlpatterns = [
     path("", TemplateView.as_view(template_name="pages/home.html"), name="home"),
     path(
@@ -45,6 +47,7 @@ urlpatterns += [
         name="api-docs",
     ),
     path("api/v1/", include("nems_proctor.proctoring.api.urls")),
+    path("api/v1/metrics/", MetricsView.as_view(), name="api-metrics"),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,24 @@
+"""
+Gunicorn worker classes for the ASGI application.
+
+HTTP and WebSocket traffic run in separate worker pools in production (see
+``compose/production/django/websocket/start``). Idle WebSocket connections
+are held for the length of an exam, so the WebSocket workers are tuned for
+many mostly quiet connections rather than for request throughput.
+"""
+
+from uvicorn.workers import UvicornWorker
+
+
+class WebSocketUvicornWorker(UvicornWorker):
+    CONFIG_KWARGS = {
+        # Long-lived connections: no ASGI lifespan, no HTTP keep-alive tuning.
+        "lifespan": "off",
+        # permessage-deflate keeps a zlib compressor and decompressor per
+        # connection; the messages are tiny, so it costs far more memory
+        # than it saves bandwidth.
+        "ws_per_message_deflate": False,
+        "ws_max_size": 64 * 1024,
+        "ws_ping_interval": 30.0,
+        "ws_ping_timeout": 30.0,
+    }
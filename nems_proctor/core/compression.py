@@ -0,0 +1,66 @@
+"""
+Compression of API responses.
+
+``CompressionMiddleware`` extends Django's ``GZipMiddleware`` to responses
+of the types in ``RESPONSE_COMPRESSION_TYPES`` of at least
+``RESPONSE_COMPRESSION_MIN_BYTES``. Clients that accept brotli get brotli,
+at ``RESPONSE_COMPRESSION_BROTLI_QUALITY``; the others get gzip. Streaming
+responses are compressed chunk by chunk as they are sent. Media, which is
+already compressed and served with range requests, is left alone.
+"""
+
+import brotli
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+re_accepts_brotli = _lazy_re_compile(r"\bbr\b")
+
+
+def compress_brotli_sequence(sequence, quality):
+    compressor = brotli.Compressor(quality=quality)
+    for item in sequence:
+        if data := compressor.process(item):
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    def process_response(self, request, response):
+        content_type = response.get("Content-Type", "").partition(";")[0].strip()
+        if (
+            content_type not in settings.RESPONSE_COMPRESSION_TYPES
+            or response.has_header("Content-Encoding")
+            or (
+                not response.streaming
+                and len(response.content) < settings.RESPONSE_COMPRESSION_MIN_BYTES
+            )
+        ):
+            return response
+        accept_encoding = request.META.get("HTTP_ACCEPT_ENCODING", "")
+        if not re_accepts_brotli.search(accept_encoding) or (
+            response.streaming and response.is_async
+        ):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        quality = settings.RESPONSE_COMPRESSION_BROTLI_QUALITY
+        if response.streaming:
+            response.streaming_content = compress_brotli_sequence(
+                response.streaming_content,
+                quality,
+            )
+            del response.headers["Content-Length"]
+        else:
+            compressed_content = brotli.compress(response.content, quality=quality)
+            if len(compressed_content) >= len(response.content):
+                return response
+            response.content = compressed_content
+            response.headers["Content-Length"] = str(len(response.content))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = "br"
+        return response
@@ -0,0 +1,33 @@
+"""
+Celery task lanes.
+
+Tasks are grouped by the kind of work they do, and every lane has its own
+queue, worker profile and time limits (``TASK_LANES``):
+
+* ``media``: CPU-bound image and recording processing. Prefork workers with
+  a prefetch of one, so a long job never holds queued work hostage.
+* ``io``: storage writes, manifests and notifications, mostly waiting on
+  the network. Prefork workers with several processes per core. Celery's
+  thread pool would drop the lane's time limits, so it is not used.
+
+Everything else stays on the ``default`` queue with the global
+``CELERY_TASK_TIME_LIMIT``. The worker profiles are the start scripts in
+``compose/production/django/celery/``.
+"""
+
+from celery import shared_task
+from django.conf import settings
+
+
+def lane_task(lane, **options):
+    """
+    ``shared_task`` that is routed to ``lane``'s queue and uses its time
+    limits.
+    """
+    config = settings.TASK_LANES[lane]
+    return shared_task(
+        queue=config["queue"],
+        time_limit=config["time_limit"],
+        soft_time_limit=config["soft_time_limit"],
+        **options,
+    )
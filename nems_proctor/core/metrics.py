@@ -0,0 +1,53 @@
+"""
+Process-independent counters kept in the shared cache.
+
+Counters live under ``metrics:<name>`` keys so that every web and Celery
+process adds to the same value; with django-redis they are plain Redis
+integers and can also be incremented from Lua scripts (see ``counter_key``).
+"""
+
+from django.core.cache import cache
+
+_registry: set[str] = set()
+_gauges = {}
+
+
+def register(*names):
+    _registry.update(names)
+
+
+def register_gauge(name, func):
+    """
+    Adds ``func()`` to the snapshot as ``name``. Unlike counters, gauges are
+    read from the process that serves the snapshot.
+    """
+    _gauges[name] = func
+
+
+def counter_key(name):
+    """
+    The raw cache key of ``name``, for code that updates it directly in Redis.
+    """
+    return cache.make_key(f"metrics:{name}")
+
+
+def incr(name, amount=1):
+    register(name)
+    key = f"metrics:{name}"
+    if not cache.add(key, amount, timeout=None):
+        try:
+            cache.incr(key, amount)
+        except ValueError:
+            # Evicted between add() and incr().
+            cache.set(key, amount, timeout=None)
+
+
+def snapshot():
+    """
+    Returns ``{name: value}`` for every registered counter and gauge.
+    """
+    names = sorted(_registry)
+    values = cache.get_many([f"metrics:{name}" for name in names])
+    result = {name: values.get(f"metrics:{name}", 0) for name in names}
+    result.update((name, func()) for name, func in _gauges.items())
+    return result
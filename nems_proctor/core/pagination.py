@@ -0,0 +1,46 @@
+"""
+Pagination of very large tables.
+
+Counting the rows of a table with millions of rows scans all of them.
+``EstimatedCountPaginator`` uses PostgreSQL's planner estimate
+(``pg_class.reltuples``, refreshed by autovacuum) for unfiltered querysets
+of tables estimated at ``ADMIN_ESTIMATED_COUNT_THRESHOLD`` rows or more. It
+counts exactly below that and whenever the queryset is filtered.
+"""
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+ESTIMATE_SQL = "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass"
+
+
+def estimated_count(model, using="default"):
+    """
+    Returns PostgreSQL's estimate of the number of rows of ``model``'s
+    table, or ``None`` if the table has never been analyzed.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(ESTIMATE_SQL, [model._meta.db_table])  # noqa: SLF001
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    object_list: QuerySet
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where and not queryset.query.distinct:
+            estimate = estimated_count(queryset.model, queryset.db)
+            if (
+                estimate is not None
+                and estimate >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD
+            ):
+                return estimate
+        return super().count
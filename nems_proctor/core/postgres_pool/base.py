@@ -0,0 +1,114 @@
+"""
+PostgreSQL backend that takes its connections from a psycopg 3 pool.
+
+Django 4.2 opens a new connection per thread and, with ``CONN_MAX_AGE``,
+keeps it for that thread only; under the Uvicorn worker sync views run in
+changing threads, so connections are opened and closed all the time. With
+this backend ``connect()`` checks a connection out of a process-wide
+``psycopg_pool.ConnectionPool`` and ``close()`` returns it, so a request
+costs a pool checkout instead of a TCP and authentication round trip.
+
+Configured through ``OPTIONS["pool"]`` (see ``DATABASE_POOL`` in the
+settings), which takes ``psycopg_pool.ConnectionPool`` arguments
+(``min_size``, ``max_size``, ``timeout``, ``max_idle``, ``max_lifetime``)
+plus ``check``: whether to test a connection before handing it out. Use it
+with ``CONN_MAX_AGE = 0`` so connections go back to the pool at the end of
+every request.
+"""
+
+import threading
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base
+from django.utils.asyncio import async_unsafe
+from psycopg import IsolationLevel
+from psycopg_pool import ConnectionPool
+from psycopg_pool import PoolTimeout
+
+from nems_proctor.core import metrics
+
+WAITS_METRIC = "db_pool.waits"
+TIMEOUTS_METRIC = "db_pool.timeouts"
+metrics.register(WAITS_METRIC, TIMEOUTS_METRIC)
+
+# A checkout slower than this had to wait for a connection to be returned
+# or opened.
+WAIT_THRESHOLD = 0.005
+
+_pools: dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def pool_stats():
+    """
+    Returns ``{alias: stats}`` for the pools of this process, with the
+    psycopg_pool statistics (size, available connections, waiting and
+    timed-out requests, ...).
+    """
+    return {alias: pool.get_stats() for alias, pool in _pools.items()}
+
+
+metrics.register_gauge("db_pool", pool_stats)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    @property
+    def pool(self):
+        pool = _pools.get(self.alias)
+        if pool is not None:
+            return pool
+        with _pools_lock:
+            if self.alias not in _pools:
+                _pools[self.alias] = self._create_pool()
+        return _pools[self.alias]
+
+    def _create_pool(self):
+        options = dict(self.settings_dict["OPTIONS"].get("pool", {}))
+        check = options.pop("check", True)
+        if self.settings_dict["CONN_MAX_AGE"]:
+            message = "Pooled database connections require CONN_MAX_AGE = 0."
+            raise ImproperlyConfigured(message)
+        return ConnectionPool(
+            kwargs=self.get_connection_params(),
+            check=ConnectionPool.check_connection if check else None,
+            name=f"django-{self.alias}",
+            open=True,
+            **options,
+        )
+
+    def get_connection_params(self):
+        # OPTIONS are passed on to psycopg.connect(); the pool's are not
+        # connection parameters. The settings dict is shared by all threads,
+        # so it is never modified.
+        conn_params = super().get_connection_params()
+        conn_params.pop("pool", None)
+        return conn_params
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        isolation_level = self.settings_dict["OPTIONS"].get("isolation_level")
+        self.isolation_level = (
+            IsolationLevel.READ_COMMITTED
+            if isolation_level is None
+            else IsolationLevel(isolation_level)
+        )
+        started = time.perf_counter()
+        try:
+            connection = self.pool.getconn()
+        except PoolTimeout:
+            metrics.incr(TIMEOUTS_METRIC)
+            raise
+        if time.perf_counter() - started > WAIT_THRESHOLD:
+            metrics.incr(WAITS_METRIC)
+        if isolation_level is not None:
+            connection.isolation_level = self.isolation_level
+        return connection
+
+    @async_unsafe
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                # Rolls back any open transaction and discards broken
+                # connections instead of reusing them.
+                self.pool.putconn(self.connection)
@@ -0,0 +1,64 @@
+"""
+Faster encodings for the API.
+
+``ORJSONRenderer`` and ``ORJSONParser`` are drop-in replacements for DRF's
+JSON renderer and parser, backed by orjson. Types orjson does not encode
+the way DRF does (datetimes, decimals, lazy strings, ...) go through DRF's
+``JSONEncoder``, so the output is the same JSON. Only float exponents are
+written without padding (``1e-6`` instead of ``1e-06``). Indented output
+(as used by the browsable API) is left to DRF.
+
+``MessagePackRenderer`` serves the same data as MessagePack to clients that
+send ``Accept: application/msgpack``.
+"""
+
+import msgpack
+import orjson
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.utils.encoders import JSONEncoder
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        content = orjson.dumps(
+            data,
+            default=self.encoder_class().default,
+            option=ORJSON_OPTIONS,
+        )
+        # Like DRF, escape the line terminators JavaScript strings cannot
+        # contain.
+        return content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9",
+            b"\\u2029",
+        )
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            message = f"JSON parse error - {exc}"
+            raise ParseError(message) from exc
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=JSONEncoder().default)
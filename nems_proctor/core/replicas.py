@@ -0,0 +1,141 @@
+"""
+Routing of read-only API requests to database replicas.
+
+``ReplicaRoutingMiddleware`` marks a request as replica-safe when it is a
+safe HTTP method handled by a DRF view that has not opted out. For such a
+request ``ReplicaRouter`` sends reads to a random alias of
+``DATABASE_REPLICAS``. Writes, and every read after the first write in the
+same request, stay on ``default``. So does all work outside a request
+(Celery tasks, management commands).
+
+Read-your-writes: after a client's successful unsafe request, its reads are
+pinned to ``default`` for ``DATABASE_REPLICA_PIN_SECONDS``. That is long
+enough for the replicas to catch up. Clients are told apart by their
+``Authorization`` header, session cookie or address. The pin lives in the
+shared cache, so it also holds across web workers. Logging in changes that
+credential, so the tables credentials are checked against
+(``PRIMARY_APP_LABELS``) are always read from ``default``: a token or
+session issued a moment ago is never looked up on a lagging replica.
+
+``ATOMIC_REQUESTS`` still wraps each view in a transaction on ``default``.
+Replicas are configured without it, so reads there run in autocommit and
+never hold a transaction open.
+
+Views opt out with ``use_replica = False`` on the class or with the
+``primary_only`` decorator on a function view or viewset action.
+"""
+
+import hashlib
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.views import APIView
+
+PIN_KEY = "db:pinned:{}"
+# Tokens and sessions, read by every authenticated request.
+PRIMARY_APP_LABELS = frozenset({"authtoken", "sessions"})
+
+
+class _RoutingState:
+    __slots__ = ("replica", "wrote")
+
+    def __init__(self):
+        self.replica = False
+        self.wrote = False
+
+
+_state: ContextVar[_RoutingState | None] = ContextVar("replica_routing", default=None)
+
+
+def primary_only(view):
+    """
+    Keeps a view (or viewset action) on the primary database.
+    """
+    view.use_replica = False
+    return view
+
+
+def _client_ident(request):
+    credential = (
+        request.headers.get("Authorization")
+        or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        or request.META.get("REMOTE_ADDR", "")
+    )
+    return hashlib.sha256(credential.encode()).hexdigest()
+
+
+def _uses_replica(view_func):
+    cls = getattr(view_func, "cls", None)
+    if cls is None or not issubclass(cls, APIView):
+        return False
+    if not getattr(view_func, "use_replica", getattr(cls, "use_replica", True)):
+        return False
+    # Viewsets map HTTP methods to actions; any opted-out action disables
+    # replica reads for the route.
+    actions = getattr(view_func, "actions", None) or {}
+    return all(
+        getattr(getattr(cls, action, None), "use_replica", True)
+        for action in actions.values()
+    )
+
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _state.set(_RoutingState())
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method not in SAFE_METHODS
+            and response.status_code < status.HTTP_400_BAD_REQUEST
+        ):
+            cache.set(
+                PIN_KEY.format(_client_ident(request)),
+                value=True,
+                timeout=settings.DATABASE_REPLICA_PIN_SECONDS,
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _state.get()
+        if state is None or not settings.DATABASE_REPLICAS:
+            return
+        state.replica = (
+            request.method in SAFE_METHODS
+            and _uses_replica(view_func)
+            and not cache.get(PIN_KEY.format(_client_ident(request)))
+        )
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if (
+            state is not None
+            and state.replica
+            and not state.wrote
+            and model._meta.app_label not in PRIMARY_APP_LABELS  # noqa: SLF001
+        ):
+            return random.choice(settings.DATABASE_REPLICAS)  # noqa: S311
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
@@ -0,0 +1,64 @@
+import gzip
+
+import brotli
+import pytest
+from django.http import HttpResponse
+from django.http import StreamingHttpResponse
+
+from nems_proctor.core.compression import CompressionMiddleware
+
+BODY = b'{"photos": [' + b'{"id": 1, "photo": "sessions/1/frame.jpg"},' * 100 + b"{}]}"
+
+
+@pytest.fixture()
+def middleware():
+    return CompressionMiddleware(lambda request: HttpResponse())
+
+
+def _response(content=BODY, content_type="application/json"):
+    return HttpResponse(content, content_type=content_type)
+
+
+@pytest.mark.parametrize(
+    ("accept_encoding", "encoding", "decompress"),
+    [
+        ("gzip, deflate, br", "br", brotli.decompress),
+        ("gzip, deflate", "gzip", gzip.decompress),
+    ],
+)
+def test_compresses(rf, middleware, accept_encoding, encoding, decompress):
+    request = rf.get("/", HTTP_ACCEPT_ENCODING=accept_encoding)
+
+    response = middleware.process_response(request, _response())
+
+    assert response["Content-Encoding"] == encoding
+    assert response["Vary"] == "Accept-Encoding"
+    assert decompress(response.content) == BODY
+    assert int(response["Content-Length"]) == len(response.content)
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        _response(BODY[:100]),
+        _response(content_type="image/jpeg"),
+        _response(content_type="text/html"),
+    ],
+)
+def test_skips(rf, middleware, response):
+    request = rf.get("/", HTTP_ACCEPT_ENCODING="gzip, br")
+
+    assert not middleware.process_response(request, response).has_header(
+        "Content-Encoding",
+    )
+
+
+def test_streaming(rf, middleware):
+    request = rf.get("/", HTTP_ACCEPT_ENCODING="br")
+    chunks = [BODY[:1000], BODY[1000:]]
+    response = StreamingHttpResponse(iter(chunks), content_type="application/json")
+
+    response = middleware.process_response(request, response)
+
+    assert response["Content-Encoding"] == "br"
+    assert brotli.decompress(response.getvalue()) == BODY
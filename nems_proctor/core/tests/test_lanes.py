@@ -0,0 +1,30 @@
+from django.conf import settings
+
+from nems_proctor.core.lanes import lane_task
+from nems_proctor.proctoring.tasks import finalize_session
+from nems_proctor.proctoring.tasks import normalize_session_photo
+
+
+def test_lane_task_uses_lane_queue_and_limits():
+    @lane_task("media", name="tests.lanes.noop")
+    def noop():
+        pass
+
+    lane = settings.TASK_LANES["media"]
+    assert noop.queue == "media"
+    assert noop.time_limit == lane["time_limit"]
+    assert noop.soft_time_limit == lane["soft_time_limit"]
+
+
+def test_proctoring_tasks_lanes():
+    assert normalize_session_photo.queue == "media"
+    assert finalize_session.queue == "io"
+
+
+def test_lane_workers_enforce_time_limits():
+    # Celery's thread pool (and gevent's, for soft limits) ignores time limits.
+    for lane in settings.TASK_LANES:
+        start = (
+            settings.BASE_DIR / f"compose/production/django/celery/worker-{lane}/start"
+        )
+        assert "--pool prefork" in start.read_text()
@@ -0,0 +1,72 @@
+import pytest
+from django.db import OperationalError
+from django.db import connections
+
+from nems_proctor.core import metrics
+from nems_proctor.core.postgres_pool.base import TIMEOUTS_METRIC
+from nems_proctor.core.postgres_pool.base import DatabaseWrapper
+from nems_proctor.core.postgres_pool.base import _pools
+from nems_proctor.core.postgres_pool.base import pool_stats
+
+pytestmark = pytest.mark.django_db
+
+ALIAS = "pool-test"
+
+
+@pytest.fixture()
+def make_wrapper():
+    wrappers = []
+
+    def make():
+        default = connections["default"].settings_dict
+        settings_dict = {
+            **default,
+            "ENGINE": "nems_proctor.core.postgres_pool",
+            "ATOMIC_REQUESTS": False,
+            "CONN_MAX_AGE": 0,
+            "OPTIONS": {
+                **default["OPTIONS"],
+                "pool": {"min_size": 1, "max_size": 1, "timeout": 0.2},
+            },
+        }
+        wrapper = DatabaseWrapper(settings_dict, alias=ALIAS)
+        wrappers.append(wrapper)
+        return wrapper
+
+    yield make
+    for wrapper in wrappers:
+        wrapper.close()
+    pool = _pools.pop(ALIAS, None)
+    if pool is not None:
+        pool.close()
+
+
+def _backend_pid(wrapper):
+    with wrapper.cursor() as cursor:
+        cursor.execute("SELECT pg_backend_pid()")
+        return cursor.fetchone()[0]
+
+
+def test_closed_connections_are_reused(make_wrapper):
+    wrapper = make_wrapper()
+    pid = _backend_pid(wrapper)
+    wrapper.close()
+
+    assert _backend_pid(make_wrapper()) == pid
+    assert pool_stats()[ALIAS]["pool_size"] == 1
+
+
+def test_exhausted_pool_times_out(make_wrapper):
+    _backend_pid(make_wrapper())
+
+    with pytest.raises(OperationalError):
+        _backend_pid(make_wrapper())
+    assert metrics.snapshot()[TIMEOUTS_METRIC] >= 1
+
+
+def test_connection_params_leave_settings_alone(make_wrapper):
+    wrapper = make_wrapper()
+    options = dict(wrapper.settings_dict["OPTIONS"])
+
+    assert "pool" not in wrapper.get_connection_params()
+    assert wrapper.settings_dict["OPTIONS"] == options
@@ -0,0 +1,68 @@
+import json
+from datetime import UTC
+from datetime import datetime
+from decimal import Decimal
+from io import BytesIO
+
+import msgpack
+import pytest
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from nems_proctor.core.renderers import MessagePackRenderer
+from nems_proctor.core.renderers import ORJSONParser
+from nems_proctor.core.renderers import ORJSONRenderer
+
+DATA = {
+    "id": 1,
+    "captured_at": datetime(2024, 5, 1, 8, 30, 0, 123456, tzinfo=UTC),
+    "score": Decimal("0.25"),
+    "label": gettext_lazy("Session"),
+    "caption": "line\u2028break é",
+    "counts": {1: 2},
+    "photos": [None, True, 1.5],
+}
+
+
+def test_orjson_matches_drf_json():
+    content = ORJSONRenderer().render(DATA)
+
+    assert content == JSONRenderer().render(DATA)
+
+
+def test_orjson_indent_is_left_to_drf():
+    content = ORJSONRenderer().render(DATA, renderer_context={"indent": 2})
+
+    assert content == JSONRenderer().render(DATA, renderer_context={"indent": 2})
+
+
+def test_orjson_parser():
+    parser = ORJSONParser()
+
+    assert parser.parse(BytesIO(b'{"photos": [1, 2]}')) == {"photos": [1, 2]}
+    with pytest.raises(ParseError):
+        parser.parse(BytesIO(b'{"photos": '))
+
+
+def test_msgpack():
+    content = MessagePackRenderer().render(DATA)
+
+    assert msgpack.unpackb(content, strict_map_key=False) == json.loads(
+        JSONRenderer().render(DATA),
+        object_hook=lambda item: {
+            int(key) if key.isdigit() else key: value for key, value in item.items()
+        },
+    )
+
+
+@pytest.mark.django_db()
+def test_api_negotiates_msgpack(user):
+    client = APIClient()
+    client.force_authenticate(user)
+
+    response = client.get("/api/v1/session-photos/", HTTP_ACCEPT="application/msgpack")
+
+    assert response["Content-Type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content) == []
@@ -0,0 +1,18 @@
+from drf_spectacular.utils import extend_schema
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from nems_proctor.core import metrics
+
+
+@extend_schema(tags=["Metrics"])
+class MetricsView(APIView):
+    """
+    Returns the current value of every shared counter.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(metrics.snapshot())
@@ -1,19 +1,106 @@
 from django.contrib import admin
+from django.forms.models import BaseInlineFormSet
+from django.urls import reverse
+from django.utils.html import format_html
+
+from nems_proctor.core.pagination import EstimatedCountPaginator
 
 from .models import Exam
+from .models import MediaBlob
+from .models import RecordingType
 from .models import Session
 from .models import SessionPhoto
 from .models import SessionRecord
+from .signing import media_urls
+
+THUMBNAIL_WIDTH = 96
+
+
+def _media_url(field_file):
+    # Presigned when MEDIA_SIGNED_URLS is enabled.
+    return media_urls(field_file.storage, [field_file.name])[field_file.name]
+
+
+def _thumbnail(field_file):
+    if not field_file:
+        return "-"
+    url = _media_url(field_file)
+    return format_html(
+        '<a href="{}"><img src="{}" width="{}" loading="lazy" alt=""></a>',
+        url,
+        url,
+        THUMBNAIL_WIDTH,
+    )
+
+
+def _record_preview(record):
+    if record.recording_type == RecordingType.SCREENSHOT or not record.file:
+        return _thumbnail(record.file)
+    return format_html('<a href="{}">{}</a>', _media_url(record.file), record.file.name)
+
+
+class LatestMediaFormSet(BaseInlineFormSet):
+    """
+    Shows only the latest ``max_rows`` items of a session's media. The rest
+    is paginated in the media's own changelist.
+    """
+
+    max_rows: int
+
+    def get_queryset(self):
+        # Evaluated once: the formset reads it for every form.
+        if not hasattr(self, "_latest"):
+            self._latest = list(super().get_queryset()[: self.max_rows])
+        return self._latest
+
+
+class SessionMediaInline(admin.TabularInline):
+    formset = LatestMediaFormSet
+    max_rows = 20
+    extra = 0
+    can_delete = False
+    show_change_link = True
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        if issubclass(formset, LatestMediaFormSet):
+            formset.max_rows = self.max_rows
+        return formset
 
 
-class SessionRecordInline(admin.TabularInline):
+class SessionRecordInline(SessionMediaInline):
     model = SessionRecord
-    extra = 0  # Removes extra empty forms
+    ordering = ("-recorded_at", "-pk")
+    fields = readonly_fields = (
+        "thumbnail",
+        "recording_type",
+        "recorded_at",
+        "stored_bytes",
+    )
 
+    @admin.display(description="Preview")
+    def thumbnail(self, record):
+        return _record_preview(record)
 
-class SessionPhotoInline(admin.TabularInline):
+
+class SessionPhotoInline(SessionMediaInline):
     model = SessionPhoto
-    extra = 0  # Removes extra empty forms
+    ordering = ("-captured_at", "-pk")
+    fields = readonly_fields = (
+        "thumbnail",
+        "captured_at",
+        "motion_score",
+        "brightness",
+        "variance",
+        "stored_bytes",
+    )
+
+    @admin.display(description="Photo")
+    def thumbnail(self, photo):
+        return _thumbnail(photo.photo)
 
 
 @admin.register(Session)
@@ -27,17 +114,74 @@ class SessionAdmin(admin.ModelAdmin):
         "start_time",
         "is_active",
     )  # Customize as needed
+    list_select_related = ("exam", "taker", "proctor")
+    raw_id_fields = ("exam", "taker", "proctor")
+    readonly_fields = ("all_records", "all_photos")
+    # Exact matches on unique columns, so searches use their indexes.
     search_fields = (
-        "exam__exam_title",
-        "taker__username",
-        "proctor__username",
-    )  # Customize as needed
+        "exam__exam_code__exact",
+        "taker__username__exact",
+        "proctor__username__exact",
+    )
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def _media_link(self, url_name, session, count, label):
+        # The counters are maintained with the media, so no rows are counted.
+        return format_html(
+            '<a href="{}?session__id__exact={}">All {} {}</a>',
+            reverse(url_name),
+            session.pk,
+            count,
+            label,
+        )
+
+    @admin.display(description="Records")
+    def all_records(self, session):
+        return self._media_link(
+            "admin:proctoring_sessionrecord_changelist",
+            session,
+            session.record_count,
+            "records",
+        )
+
+    @admin.display(description="Photos")
+    def all_photos(self, session):
+        return self._media_link(
+            "admin:proctoring_sessionphoto_changelist",
+            session,
+            session.photo_count,
+            "photos",
+        )
+
+
+class SessionMediaAdmin(admin.ModelAdmin):
+    raw_id_fields = ("session",)
+    search_fields = (
+        "session__exam__exam_code__exact",
+        "session__taker__username__exact",
+    )
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(SessionRecord)
+class SessionRecordAdmin(SessionMediaAdmin):
+    list_display = ("id", "session_id", "recording_type", "recorded_at", "thumbnail")
+
+    @admin.display(description="Preview")
+    def thumbnail(self, record):
+        return _record_preview(record)
+
+
+@admin.register(SessionPhoto)
+class SessionPhotoAdmin(SessionMediaAdmin):
+    list_display = ("id", "session_id", "captured_at", "motion_score", "thumbnail")
+
+    @admin.display(description="Photo")
+    def thumbnail(self, photo):
+        return _thumbnail(photo.photo)
 
 
 admin.site.register(Exam)
-admin.site.register(
-    SessionRecord,
-)  # Optional if you want SessionRecord to be editable standalone
-admin.site.register(
-    SessionPhoto,
-)  # Optional if you want SessionPhoto to be editable standalone
+admin.site.register(MediaBlob)
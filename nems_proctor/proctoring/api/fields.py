@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import typing
+
+from django.db import models
+from rest_framework import serializers
+from rest_framework.fields import get_attribute
+
+from nems_proctor.proctoring.signing import media_urls
+
+if typing.TYPE_CHECKING:
+    from django.core.files.storage import Storage
+
+# Context key of the URLs presigned for a whole listing.
+MEDIA_URLS = "media_urls"
+
+
+class SignedUrlMixin(serializers.FileField):
+    """
+    Represents a file by its download URL, presigned when
+    ``MEDIA_SIGNED_URLS`` is enabled. Inside a ``SignedMediaListSerializer``
+    the URL comes from the batch signed for the whole listing.
+    """
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        url = self.context.get(MEDIA_URLS, {}).get(value.name)
+        if url is None:
+            url = media_urls(value.storage, [value.name])[value.name]
+        request = self.context.get("request")
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+
+class SignedFileField(SignedUrlMixin, serializers.FileField):
+    pass
+
+
+class SignedImageField(SignedUrlMixin, serializers.ImageField):
+    pass
+
+
+class SignedMediaListSerializer(serializers.ListSerializer):
+    """
+    Signs the URLs of every file in the listing in one batch per storage
+    before the items are serialized.
+    """
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.Manager) else data)
+        child = self.child
+        fields = (
+            child.fields.values() if isinstance(child, serializers.Serializer) else ()
+        )
+        sources = [
+            field.source_attrs for field in fields if isinstance(field, SignedUrlMixin)
+        ]
+        files: dict[Storage, list[str]] = {}
+        for item in items:
+            for source_attrs in sources:
+                value = get_attribute(item, source_attrs)
+                if value:
+                    files.setdefault(value.storage, []).append(value.name)
+        urls = self.context.setdefault(MEDIA_URLS, {})
+        for storage, names in files.items():
+            urls.update(media_urls(storage, names))
+        return super().to_representation(items)
+
+
+class SignedMediaModelSerializer(serializers.ModelSerializer):
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.FileField: SignedFileField,
+        models.ImageField: SignedImageField,
+    }
+
+    class Meta:
+        list_serializer_class = SignedMediaListSerializer
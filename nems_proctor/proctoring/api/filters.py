@@ -0,0 +1,74 @@
+from django.db.models import F
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from nems_proctor.proctoring.scoring import SCORE_FIELDS
+
+PHOTO_ORDERING_FIELDS = ("captured_at", *SCORE_FIELDS)
+SCORE_BOUNDS = (("min", "gte"), ("max", "lte"))
+
+photo_score_params = [
+    OpenApiParameter(
+        name="ordering",
+        type=str,
+        description=(
+            "Comma-separated fields to sort by, prefixed with '-' for "
+            f"descending order: {', '.join(PHOTO_ORDERING_FIELDS)}. "
+            "Unscored photos come last."
+        ),
+    ),
+    *(
+        OpenApiParameter(
+            name=f"{field}_{bound}",
+            type=float,
+            description=f"Only photos with a {field} {comparison} this value.",
+        )
+        for field in SCORE_FIELDS
+        for bound, comparison in (("min", "of at least"), ("max", "of at most"))
+    ),
+]
+
+
+class PhotoScoreFilter(BaseFilterBackend):
+    """
+    Filters session photos by score (``motion_score_min=0.2``,
+    ``brightness_max=0.1``, ...) and sorts them with ``ordering``.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        for field in SCORE_FIELDS:
+            for bound, lookup in SCORE_BOUNDS:
+                name = f"{field}_{bound}"
+                if name not in params:
+                    continue
+                try:
+                    value = float(params[name])
+                except ValueError as exc:
+                    message = "A valid number is required."
+                    raise ValidationError({name: [message]}) from exc
+                queryset = queryset.filter(**{f"{field}__{lookup}": value})
+
+        terms = [term.strip() for term in params.get("ordering", "").split(",")]
+        ordering = [self._order_by(term) for term in terms if term]
+        if ordering:
+            queryset = queryset.order_by(*ordering, "pk")
+        return queryset
+
+    @staticmethod
+    def is_filtering(request):
+        """Whether ``request`` restricts the photos by score."""
+        return any(
+            f"{field}_{bound}" in request.query_params
+            for field in SCORE_FIELDS
+            for bound, _ in SCORE_BOUNDS
+        )
+
+    def _order_by(self, term):
+        field = term.removeprefix("-")
+        if field not in PHOTO_ORDERING_FIELDS:
+            raise ValidationError({"ordering": [f"Cannot order by '{field}'."]})
+        if term.startswith("-"):
+            return F(field).desc(nulls_last=True)
+        return F(field).asc(nulls_last=True)
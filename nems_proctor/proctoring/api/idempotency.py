@@ -0,0 +1,196 @@
+"""
+``Idempotency-Key`` support for write actions that clients retry.
+
+The first request carrying a key claims it in the shared cache with an
+"in flight" marker, refreshed while the request runs so a slow upload does
+not lose it; once its transaction commits, the response is stored under the
+same key. Retries with the same key replay that response (or wait for the
+in-flight one to finish) instead of writing a second row and a second file.
+"""
+
+import functools
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files import File
+from django.db import transaction
+from drf_spectacular.utils import OpenApiParameter
+from drf_spectacular.utils import OpenApiTypes
+from rest_framework import status
+from rest_framework.response import Response
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+IN_FLIGHT = "in_flight"
+DONE = "done"
+
+idempotency_key_param = OpenApiParameter(
+    name=IDEMPOTENCY_HEADER,
+    type=OpenApiTypes.STR,
+    location=OpenApiParameter.HEADER,
+    required=False,
+    description="""
+        Client-generated unique key. Retrying a request with the same key
+        returns the original response instead of performing the write again.
+        """,
+)
+
+
+def _cache_key(request, key):
+    scope = f"{request.user.pk}:{request.method}:{request.path}:{key}"
+    return "idempotency:" + hashlib.sha256(scope.encode()).hexdigest()
+
+
+def _fingerprint(request):
+    """
+    Hashes the request payload so a key reused for a different request can
+    be told apart from a genuine retry. Files contribute their name and size
+    only; hashing their bytes would cost more than the replay saves.
+    """
+    digest = hashlib.sha256()
+    data = request.data
+    items = data.lists() if hasattr(data, "lists") else data.items()
+    for name, values in sorted(items, key=itemgetter(0)):
+        for value in values if isinstance(values, list) else [values]:
+            part = (value.name, value.size) if isinstance(value, File) else value
+            digest.update(f"{name}={part!r};".encode())
+    return digest.hexdigest()
+
+
+def _wait_for_result(cache_key, deadline):
+    entry = cache.get(cache_key)
+    while entry is not None and entry["state"] == IN_FLIGHT:
+        if time.monotonic() >= deadline:
+            break
+        time.sleep(settings.IDEMPOTENCY_POLL_INTERVAL)
+        entry = cache.get(cache_key)
+    return entry
+
+
+def _claim(cache_key, fingerprint):
+    """
+    Claims ``cache_key`` for this request and returns ``None``, or returns
+    the entry of the request that holds it. A key released by a failed
+    request is claimed by exactly one of the retries waiting for it.
+    """
+    deadline = time.monotonic() + settings.IDEMPOTENCY_IN_FLIGHT_WAIT
+    while not cache.add(
+        cache_key,
+        {"state": IN_FLIGHT, "fingerprint": fingerprint},
+        settings.IDEMPOTENCY_IN_FLIGHT_TIMEOUT,
+    ):
+        entry = _wait_for_result(cache_key, deadline)
+        if entry is not None:
+            return entry
+    return None
+
+
+@contextmanager
+def _keep_claimed(cache_key):
+    # Extends the in-flight marker every half timeout until the view
+    # returns, so it only expires if the process holding it dies.
+    stop = threading.Event()
+    timeout = settings.IDEMPOTENCY_IN_FLIGHT_TIMEOUT
+
+    def refresh():
+        while not stop.wait(timeout / 2):
+            cache.touch(cache_key, timeout)
+
+    refresher = threading.Thread(target=refresh, daemon=True)
+    refresher.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        # Never touch the key after the response has been stored under it.
+        refresher.join()
+
+
+def idempotency_cache_key(request):
+    """
+    Returns the cache key ``request``'s ``Idempotency-Key`` is claimed and
+    answered under, or ``None`` without a valid key. A request is replayed
+    if the key is present in the cache.
+    """
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if not key or len(key) > MAX_KEY_LENGTH:
+        return None
+    return _cache_key(request, key)
+
+
+def _replay(entry, fingerprint):
+    if entry["fingerprint"] != fingerprint:
+        return Response(
+            {
+                "detail": f"{IDEMPOTENCY_HEADER} was already used "
+                "for a different request.",
+            },
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    if entry["state"] == IN_FLIGHT:
+        return Response(
+            {"detail": "A request with this Idempotency-Key is still in progress."},
+            status=status.HTTP_409_CONFLICT,
+            headers={"Retry-After": "1"},
+        )
+    return Response(
+        entry["data"],
+        status=entry["status"],
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+def idempotent(view_method):
+    """
+    Makes a viewset action honour the ``Idempotency-Key`` request header.
+
+    Responses below 500 are stored for ``IDEMPOTENCY_KEY_TIMEOUT`` seconds
+    after the request's transaction commits; server errors release the key
+    so the client can retry for real.
+    """
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"detail": f"{IDEMPOTENCY_HEADER} is too long."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        cache_key = _cache_key(request, key)
+        fingerprint = _fingerprint(request)
+        entry = _claim(cache_key, fingerprint)
+        if entry is not None:
+            return _replay(entry, fingerprint)
+
+        try:
+            with _keep_claimed(cache_key):
+                response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            cache.delete(cache_key)
+            raise
+
+        if response.status_code >= status.HTTP_500_INTERNAL_SERVER_ERROR:
+            cache.delete(cache_key)
+            return response
+
+        entry = {
+            "state": DONE,
+            "fingerprint": fingerprint,
+            "status": response.status_code,
+            "data": response.data,
+        }
+        transaction.on_commit(
+            lambda: cache.set(cache_key, entry, settings.IDEMPOTENCY_KEY_TIMEOUT),
+        )
+        return response
+
+    return wrapper
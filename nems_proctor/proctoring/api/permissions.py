@@ -0,0 +1,31 @@
+from rest_framework.permissions import BasePermission
+
+from nems_proctor.proctoring.models import Session
+
+
+class CanAccessSessionMedia(BasePermission):
+    """
+    Sessions' media (their photos, records and contact sheet) are visible to
+    staff, to users of the company they belong to, and to the session's
+    taker and proctor.
+    """
+
+    def has_object_permission(self, request, view, obj):
+        user = request.user
+        if user.is_staff:
+            return True
+        if obj.company_id is not None and obj.company_id == user.company_id:
+            return True
+        session = obj if isinstance(obj, Session) else obj.session
+        return user.pk in (session.taker_id, session.proctor_id)
+
+
+class CanProvisionTakers(BasePermission):
+    """
+    Creating users in bulk is limited to staff and to users allowed to add
+    users, such as company administrators.
+    """
+
+    def has_permission(self, request, view):
+        user = request.user
+        return user.is_staff or user.has_perm("users.add_user")
@@ -0,0 +1,152 @@
+"""
+Read path for large listings that skips model instances and the serializer
+field tree per item.
+
+``RowSerializer`` reads ``values()`` rows and renders them with the fields
+of a model serializer, so the JSON is the same as with
+``serializer_class(queryset, many=True)``. The fields are resolved once
+per listing. Values whose representation is the database value itself are
+copied as they are, datetimes are converted with the time zone resolved
+once, and file URLs are built in one batch (see
+``nems_proctor.proctoring.signing.media_urls``).
+"""
+
+from django.utils import timezone
+from rest_framework import ISO_8601
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.relations import RelatedField
+from rest_framework.settings import api_settings
+
+from nems_proctor.proctoring.signing import media_urls
+
+from .fields import SignedUrlMixin
+
+# Fields that represent a database value as the value itself.
+PLAIN_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.FloatField,
+    serializers.IntegerField,
+    PrimaryKeyRelatedField,
+)
+
+
+def _datetime_converter(field):
+    # DateTimeField.to_representation() looks up the current time zone for
+    # every value; resolve it once per listing instead.
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    field_timezone = (
+        field.timezone if hasattr(field, "timezone") else field.default_timezone()
+    )
+    if (
+        not isinstance(output_format, str)
+        or output_format.lower() != ISO_8601
+        or field_timezone is None
+    ):
+        return field.to_representation
+
+    def convert(value):
+        if timezone.is_naive(value):
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+    return convert
+
+
+class RowSerializer:
+    """
+    Serializes a queryset from ``values()`` rows with the fields of
+    ``serializer_class``. Use ``supports()`` to check that every field can
+    be rendered from a row.
+    """
+
+    def __init__(self, serializer_class, context=None):
+        self.context = context or {}
+        self.fields = [
+            field
+            for field in serializer_class(context=self.context).fields.values()
+            if not field.write_only
+        ]
+
+    def supports(self):
+        """
+        Returns whether every field reads one model field, which rules out
+        method fields, nested serializers, dotted sources and relations
+        represented by anything but their primary key.
+        """
+        return all(
+            field.source_attrs == [field.source]
+            and not isinstance(
+                field,
+                serializers.BaseSerializer | serializers.ManyRelatedField,
+            )
+            and (
+                not isinstance(field, RelatedField)
+                or isinstance(field, PrimaryKeyRelatedField)
+            )
+            for field in self.fields
+        )
+
+    def _absolute_urls(self, urls):
+        # Same result as request.build_absolute_uri() for the quoted URLs
+        # storages return, without parsing each of them.
+        request = self.context.get("request")
+        if request is None:
+            return urls
+        base = request.build_absolute_uri("/").removesuffix("/")
+        return {
+            name: base + url if url.startswith("/") and url[1:2] != "/" else url
+            for name, url in urls.items()
+        }
+
+    def serialize(self, queryset):
+        """
+        Returns the representation of every item in ``queryset``.
+        """
+        model = queryset.model
+        rows = list(queryset.values(*(field.source for field in self.fields)))
+
+        urls = {}
+        for field in self.fields:
+            if isinstance(field, SignedUrlMixin):
+                storage = model._meta.get_field(field.source).storage  # noqa: SLF001
+                names = [row[field.source] for row in rows]
+                urls[field.source] = self._absolute_urls(media_urls(storage, names))
+
+        columns = []
+        for field in self.fields:
+            if field.source in urls:
+                # Files without a name are not in the batch and become None.
+                convert = urls[field.source].get
+            elif isinstance(field, PLAIN_FIELDS):
+                convert = None
+            elif isinstance(field, serializers.DateTimeField):
+                convert = _datetime_converter(field)
+            else:
+                convert = field.to_representation
+            columns.append((field.field_name, field.source, convert))
+
+        data = []
+        for row in rows:
+            item = {}
+            for name, source, convert in columns:
+                value = row[source]
+                if convert is not None and value is not None:
+                    value = convert(value)
+                item[name] = value
+            data.append(item)
+        return data
+
+
+def listing_data(serializer_class, queryset, context):
+    """
+    Returns the same data as ``serializer_class(queryset, many=True)``,
+    from ``values()`` rows when the serializer's fields allow it.
+    """
+    rows = RowSerializer(serializer_class, context)
+    if rows.supports():
+        return rows.serialize(queryset)
+    return serializer_class(queryset, many=True, context=context).data
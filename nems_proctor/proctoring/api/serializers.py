@@ -1,36 +1,82 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import ObjectDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
 from rest_framework import serializers
 
+from nems_proctor.proctoring import media
+from nems_proctor.proctoring import tasks
 from nems_proctor.proctoring.models import Exam
+from nems_proctor.proctoring.models import RecordingType
 from nems_proctor.proctoring.models import Session
 from nems_proctor.proctoring.models import SessionPhoto
 from nems_proctor.proctoring.models import SessionRecord
+from nems_proctor.proctoring.resolvers import provision_users
+from nems_proctor.proctoring.resolvers import resolve_exam
+from nems_proctor.proctoring.resolvers import resolve_user
+from nems_proctor.proctoring.resolvers import resolve_users
+from nems_proctor.proctoring.storage import save_with_media
+from nems_proctor.proctoring.validators import validate_media
+from nems_proctor.users.api.serializers import UserSerializer
 from nems_proctor.users.models import User
 
+from .fields import SignedMediaListSerializer
+from .fields import SignedMediaModelSerializer
+from .sparse import ExpandableFields
+from .sparse import SparseFieldsetMixin
+
+# Exam fields of an expanded session; the latest session is left out, as it
+# costs a query per exam.
+EXAM_SUMMARY_FIELDS = ("id", "exam_code", "exam_title", "description")
+
+
+class CachedUserSlugRelatedField(serializers.SlugRelatedField):
+    """
+    Resolves a username through the cached resolver instead of querying
+    the user table on every request.
+    """
 
-class CreateUserSlugRelatedField(serializers.SlugRelatedField):
     def to_internal_value(self, data):
-        try:
-            return self.get_queryset().get(**{self.slug_field: data})
-        except ObjectDoesNotExist:
-            user_model = get_user_model()
-            user, created = user_model.objects.get_or_create(username=data)
-            return user
+        user = resolve_user(str(data))
+        if user is None:
+            self.fail("does_not_exist", slug_name=self.slug_field, value=str(data))
+        return user
 
 
-class SessionSerializer(serializers.ModelSerializer):
+class CreateUserSlugRelatedField(CachedUserSlugRelatedField):
+    def to_internal_value(self, data):
+        user = resolve_user(str(data))
+        if user is None:
+            request = self.context.get("request")
+            company_id = request.user.company_id if request else None
+            user = provision_users([str(data)], company_id=company_id).get(str(data))
+        if user is None:
+            # The insert was skipped for another reason than the username
+            # existing already.
+            self.fail("does_not_exist", slug_name=self.slug_field, value=str(data))
+        return user
+
+
+class CachedExamSlugRelatedField(serializers.SlugRelatedField):
+    def to_internal_value(self, data):
+        exam = resolve_exam(str(data))
+        if exam is None:
+            self.fail("does_not_exist", slug_name=self.slug_field, value=str(data))
+        return exam
+
+
+class SessionSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     taker = CreateUserSlugRelatedField(
         slug_field="username",
         queryset=get_user_model().objects.all(),
     )
-    proctor = serializers.SlugRelatedField(
+    proctor = CachedUserSlugRelatedField(
         slug_field="username",
         queryset=get_user_model().objects.all(),
         allow_null=True,  # Assuming proctor can be null
         required=False,  # Assuming proctor is not required
     )
-    exam = serializers.SlugRelatedField(
+    exam = CachedExamSlugRelatedField(
         slug_field="exam_code",
         queryset=Exam.objects.all(),
     )
@@ -38,6 +84,30 @@ class SessionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Session
         fields = "__all__"
+        read_only_fields = ("summary", "finalized_at")
+        expandable_fields: ExpandableFields = {
+            "taker": (UserSerializer, {}),
+            "proctor": (UserSerializer, {}),
+            "exam": (
+                "nems_proctor.proctoring.api.serializers.ExamSerializer",
+                {"fields": EXAM_SUMMARY_FIELDS},
+            ),
+            "records": (
+                "nems_proctor.proctoring.api.serializers.SessionRecordSerializer",
+                {"many": True, "source": "sessionrecord_set"},
+            ),
+        }
+
+    def to_internal_value(self, data):
+        # Warm the resolver for taker and proctor together, so a cold cache
+        # costs one query for both fields instead of one each.
+        if hasattr(data, "get"):
+            resolve_users(
+                str(data[field])
+                for field in ("taker", "proctor")
+                if data.get(field) is not None
+            )
+        return super().to_internal_value(data)
 
     def create(self, validated_data):
         return super().create(validated_data)
@@ -50,10 +120,13 @@ class SessionSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
-class SessionRecordSerializer(serializers.ModelSerializer):
+class SessionRecordSerializer(SparseFieldsetMixin, SignedMediaModelSerializer):
     class Meta:
         model = SessionRecord
-        fields = "__all__"
+        list_serializer_class = SignedMediaListSerializer
+        expandable_fields: ExpandableFields = {"session": (SessionSerializer, {})}
+        # The activity index has its own endpoint.
+        exclude = ("activity",)
 
 
 class SessionRecordCreateSerializer(serializers.ModelSerializer):
@@ -61,22 +134,68 @@ class SessionRecordCreateSerializer(serializers.ModelSerializer):
         model = SessionRecord
         fields = ("recording_type", "file")
 
+    def validate(self, attrs):
+        try:
+            validate_media(attrs["file"], attrs["recording_type"])
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError({"file": exc.messages}) from exc
+        return attrs
 
-class SessionPhotoSerializer(serializers.ModelSerializer):
+    def create(self, validated_data):
+        screenshot = validated_data["recording_type"] == RecordingType.SCREENSHOT
+        if screenshot:
+            file, validated_data["original_bytes"] = media.prepare_upload(
+                validated_data["file"],
+            )
+            validated_data["file"] = file
+        else:
+            validated_data["original_bytes"] = validated_data["file"].size
+        record = save_with_media(SessionRecord(**validated_data), "file")
+        if screenshot and settings.MEDIA_NORMALIZE_MODE == media.DEFERRED:
+            transaction.on_commit(
+                lambda: tasks.normalize_session_record.delay(record.pk),
+            )
+        if validated_data["recording_type"] == RecordingType.AUDIO:
+            transaction.on_commit(
+                lambda: tasks.index_session_record_audio.delay(record.pk),
+            )
+        return record
+
+
+class SessionPhotoSerializer(SparseFieldsetMixin, SignedMediaModelSerializer):
     class Meta:
         model = SessionPhoto
         fields = "__all__"
+        list_serializer_class = SignedMediaListSerializer
+        expandable_fields: ExpandableFields = {"session": (SessionSerializer, {})}
 
 
 class SessionPhotoCreateSerializer(serializers.ModelSerializer):
-    photo = serializers.ImageField(max_length=None, use_url=True)
+    photo = serializers.FileField(use_url=True)
 
     class Meta:
         model = SessionPhoto
         fields = ("photo",)
 
+    def validate_photo(self, value):
+        # Reads only the file header instead of decoding the whole image.
+        validate_media(value, "photo")
+        return value
 
-class ExamSerializer(serializers.ModelSerializer):
+    def create(self, validated_data):
+        photo, validated_data["original_bytes"] = media.prepare_upload(
+            validated_data["photo"],
+        )
+        validated_data["photo"] = photo
+        instance = save_with_media(SessionPhoto(**validated_data), "photo")
+        if settings.MEDIA_NORMALIZE_MODE == media.DEFERRED:
+            transaction.on_commit(
+                lambda: tasks.normalize_session_photo.delay(instance.pk),
+            )
+        return instance
+
+
+class ExamSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     latest_session_end_time = serializers.SerializerMethodField()
 
     class Meta:
@@ -96,3 +215,11 @@ class GetTakersByExamSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ("id", "username", "attempts_count", "latest_attempt")
+
+
+class ProvisionTakersSerializer(serializers.Serializer):
+    usernames = serializers.ListField(
+        child=serializers.CharField(max_length=150),
+        allow_empty=False,
+        max_length=settings.PROCTORING_PROVISION_MAX_USERNAMES,
+    )
@@ -0,0 +1,171 @@
+"""
+Sparse fieldsets and expansion of related resources.
+
+Serializers with ``SparseFieldsetMixin`` render only the fields a client
+asks for with ``?fields=id,start_time``, so unrequested fields cost no
+lookups or computation. ``?expand=taker,exam`` replaces the relations
+listed in ``Meta.expandable_fields`` with the nested resource. Both only
+apply to the top-level serializer of a read request.
+
+``optimize_queryset`` joins or prefetches exactly the relations the
+resulting fields read, so expansions and slug relations cost one query
+per relation rather than one per row.
+"""
+
+from django.utils.module_loading import import_string
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import serializers
+from rest_framework import viewsets
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.relations import RelatedField
+
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+# The type of ``Meta.expandable_fields``.
+ExpandableFields = dict[str, tuple[type[serializers.BaseSerializer] | str, dict]]
+
+
+def _names(value):
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+class SparseFieldsetMixin(serializers.ModelSerializer):
+    """
+    Adds ``fields`` and ``expand`` selection to a model serializer, from
+    keyword arguments or from the request's query parameters.
+
+    ``Meta.expandable_fields`` maps a field name to the serializer class
+    (or its dotted path) and the keyword arguments of its expanded form.
+    """
+
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requested_fields = fields
+        self.requested_expand = expand
+
+    def _is_root(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def _requested(self):
+        only, expand = self.requested_fields, self.requested_expand
+        request = self.context.get("request")
+        if request is not None and request.method in SAFE_METHODS and self._is_root():
+            params = request.GET
+            if FIELDS_PARAM in params:
+                only = _names(params[FIELDS_PARAM])
+            if EXPAND_PARAM in params:
+                expand = _names(params[EXPAND_PARAM])
+        return only, expand
+
+    def get_fields(self):
+        fields = super().get_fields()
+        only, expand = self._requested()
+        expandable = getattr(self.Meta, "expandable_fields", {})
+
+        for name in expand:
+            if name not in expandable:
+                message = f"Cannot expand '{name}'."
+                raise ValidationError({EXPAND_PARAM: [message]})
+            serializer_class, kwargs = expandable[name]
+            if isinstance(serializer_class, str):
+                serializer_class = import_string(serializer_class)
+            fields[name] = serializer_class(read_only=True, **kwargs)
+
+        if only is None:
+            return fields
+        unknown = [name for name in only if name not in fields]
+        if unknown:
+            message = f"Unknown fields: {', '.join(unknown)}."
+            raise ValidationError({FIELDS_PARAM: [message]})
+        # Expanded relations are returned even if not listed.
+        return {
+            name: field
+            for name, field in fields.items()
+            if name in only or name in expand
+        }
+
+
+def related_lookups(serializer, prefix=""):
+    """
+    Returns the ``select_related`` and ``prefetch_related`` lookups that
+    the fields of ``serializer`` read.
+    """
+    select, prefetch = [], []
+    for field in serializer.fields.values():
+        if field.write_only or field.source_attrs != [field.source]:
+            continue
+        path = f"{prefix}{field.source}"
+        if isinstance(field, serializers.ListSerializer):
+            prefetch.append(path)
+            nested = related_lookups(field.child, f"{path}__")
+            prefetch.extend(nested[0] + nested[1])
+        elif isinstance(field, serializers.ManyRelatedField):
+            prefetch.append(path)
+        elif isinstance(field, serializers.BaseSerializer):
+            select.append(path)
+            nested = related_lookups(field, f"{path}__")
+            select.extend(nested[0])
+            prefetch.extend(nested[1])
+        elif isinstance(field, RelatedField) and not isinstance(
+            field,
+            PrimaryKeyRelatedField,
+        ):
+            select.append(path)
+    return select, prefetch
+
+
+def optimize_queryset(queryset, serializer):
+    """
+    Joins and prefetches the relations ``serializer`` renders.
+    """
+    select, prefetch = related_lookups(serializer)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+class SparseFieldsetViewMixin(viewsets.GenericViewSet):
+    """
+    Optimizes the queryset of list and retrieve actions for the fields the
+    request asks for.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ("list", "retrieve"):
+            queryset = optimize_queryset(queryset, self.get_serializer())
+        return queryset
+
+
+def sparse_fieldset_params(serializer_class):
+    """
+    OpenAPI parameters for ``fields`` and ``expand`` of ``serializer_class``.
+    """
+    expandable = getattr(serializer_class.Meta, "expandable_fields", {})
+    params = [
+        OpenApiParameter(
+            name=FIELDS_PARAM,
+            type=str,
+            description=("Comma-separated fields to return; all fields when omitted."),
+        ),
+    ]
+    if expandable:
+        params.append(
+            OpenApiParameter(
+                name=EXPAND_PARAM,
+                type=str,
+                description=(
+                    "Comma-separated relations to return as nested objects: "
+                    f"{', '.join(expandable)}."
+                ),
+            ),
+        )
+    return params
@@ -0,0 +1,214 @@
+"""
+Token-bucket rate limiting for media uploads.
+
+Every upload takes one token from three buckets: the session's, the taker's
+and the company's. The buckets refill continuously at their configured rate
+(``UPLOAD_RATE_LIMITS``). With django-redis all buckets are checked and
+updated by a single Lua script, i.e. one Redis round-trip and no database
+access per decision; other cache backends fall back to a best-effort,
+non-atomic implementation suitable for development and tests. If Redis
+cannot be reached, uploads are let through rather than failing.
+"""
+
+import logging
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.throttling import BaseThrottle
+
+from nems_proctor.core import metrics
+from nems_proctor.proctoring.api.idempotency import idempotency_cache_key
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_METRIC = "upload_throttle.allowed"
+THROTTLED_METRIC = "upload_throttle.throttled"
+metrics.register(ALLOWED_METRIC, THROTTLED_METRIC)
+
+# KEYS: the bucket hashes, the allowed and throttled counters, and
+# optionally the request's idempotency key: a request replayed from it takes
+# no token.
+# ARGV: capacity and refill rate (tokens/second) of each bucket.
+CONSUME_SCRIPT = """
+local buckets = #ARGV / 2
+local replay = KEYS[buckets + 3]
+if replay and redis.call("EXISTS", replay) == 1 then
+    return {1, "0"}
+end
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local tokens = {}
+local wait = 0
+for i = 1, buckets do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    local state = redis.call("HMGET", KEYS[i], "tokens", "ts")
+    local available = tonumber(state[1]) or capacity
+    local elapsed = math.max(0, now - (tonumber(state[2]) or now))
+    available = math.min(capacity, available + elapsed * rate)
+    tokens[i] = available
+    if available < 1 then
+        wait = math.max(wait, (1 - available) / rate)
+    end
+end
+local allowed = wait == 0
+for i = 1, buckets do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    local available = tokens[i]
+    if allowed then
+        available = available - 1
+    end
+    redis.call("HSET", KEYS[i], "tokens", tostring(available), "ts", tostring(now))
+    redis.call("EXPIRE", KEYS[i], math.ceil(capacity / rate) + 1)
+end
+if allowed then
+    redis.call("INCR", KEYS[buckets + 1])
+    return {1, "0"}
+end
+redis.call("INCR", KEYS[buckets + 2])
+return {0, tostring(wait)}
+"""
+
+_script = None
+
+
+def _redis_script():
+    """
+    Returns the registered Lua script, or ``None`` when the default cache is
+    not backed by django-redis.
+    """
+    global _script  # noqa: PLW0603
+    if _script is None:
+        try:
+            from django_redis import get_redis_connection
+
+            _script = get_redis_connection("default").register_script(
+                CONSUME_SCRIPT,
+            )
+        except (ImportError, NotImplementedError):
+            _script = False
+    return _script or None
+
+
+def _consume_locally(buckets, replay_key):
+    now = time.time()
+    keys = [key for key, _, _ in buckets]
+    if replay_key is not None:
+        keys.append(replay_key)
+    states = cache.get_many(keys)
+    if replay_key in states:
+        return 0
+    wait = 0.0
+    updated = {}
+    for key, capacity, rate in buckets:
+        available, stamp = states.get(key, (capacity, now))
+        available = min(capacity, available + max(0.0, now - stamp) * rate)
+        updated[key] = available
+        if available < 1:
+            wait = max(wait, (1 - available) / rate)
+    for key, capacity, rate in buckets:
+        available = updated[key] - (0 if wait else 1)
+        cache.set(key, (available, now), math.ceil(capacity / rate) + 1)
+    metrics.incr(THROTTLED_METRIC if wait else ALLOWED_METRIC)
+    return wait
+
+
+def consume(buckets, replay_key=None):
+    """
+    Takes one token from each ``(key, capacity, rate)`` bucket if all of
+    them have one, and returns 0. Otherwise takes nothing and returns the
+    seconds until the emptiest bucket refills. Returns 0 without taking
+    anything if the cache holds ``replay_key``, and also when Redis cannot
+    be reached.
+    """
+    script = _redis_script()
+    if script is None:
+        return _consume_locally(buckets, replay_key)
+    keys = [cache.make_key(key) for key, _, _ in buckets]
+    keys += [metrics.counter_key(ALLOWED_METRIC), metrics.counter_key(THROTTLED_METRIC)]
+    if replay_key is not None:
+        keys.append(cache.make_key(replay_key))
+    args = []
+    for _, capacity, rate in buckets:
+        args += [capacity, rate]
+    try:
+        _, wait = script(keys=keys, args=args)
+    except (RedisConnectionError, RedisTimeoutError):
+        logger.warning("Upload rate limits unavailable.", exc_info=True)
+        return 0
+    return float(wait)
+
+
+class UploadThrottled(APIException):
+    status_code = status.HTTP_429_TOO_MANY_REQUESTS
+    default_code = "throttled"
+
+    def __init__(self, wait, capture_interval):
+        # DRF's exception handler turns ``wait`` into the Retry-After header.
+        self.wait = math.ceil(wait)
+        super().__init__()
+        # Keep the numbers as numbers instead of DRF's ErrorDetail strings.
+        self.detail = {
+            "detail": ErrorDetail(
+                "Upload rate exceeded, slow down.",
+                code=self.default_code,
+            ),
+            "retry_after": self.wait,
+            "capture_interval": capture_interval,
+        }
+
+
+class UploadRateThrottle(BaseThrottle):
+    """
+    Limits media uploads per session, per taker and per company.
+
+    Everything needed to pick the buckets comes from the URL and the
+    authenticated user, so a decision never touches the database. A
+    throttled request gets a 429 with ``Retry-After`` and the capture
+    interval (in seconds) the client should switch to.
+    """
+
+    def get_buckets(self, request, view):
+        limits = settings.UPLOAD_RATE_LIMITS
+        idents = {
+            "session": view.kwargs.get(view.lookup_url_kwarg or view.lookup_field),
+            "taker": request.user.pk,
+            "company": getattr(request.user, "company_id", None),
+        }
+        return [
+            (
+                f"throttle:upload:{scope}:{ident}",
+                limits[scope]["capacity"],
+                limits[scope]["rate"],
+            )
+            for scope, ident in idents.items()
+            if ident is not None and scope in limits
+        ]
+
+    def allow_request(self, request, view):
+        buckets = self.get_buckets(request, view)
+        if not buckets:
+            return True
+        # A retry of an upload that is in flight or done is replayed without
+        # storing anything, so it takes no token.
+        wait = consume(buckets, replay_key=idempotency_cache_key(request))
+        if wait:
+            raise UploadThrottled(wait, capture_interval=self.capture_interval())
+        return True
+
+    def capture_interval(self):
+        # The company bucket is shared by many clients, so only the per-client
+        # rates say how often a single client may capture.
+        limits = settings.UPLOAD_RATE_LIMITS
+        rates = [
+            limits[scope]["rate"] for scope in ("session", "taker") if scope in limits
+        ]
+        return round(1 / min(rates), 2) if rates else None
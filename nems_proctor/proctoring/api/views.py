@@ -1,9 +1,14 @@
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import transaction
 from django.db.models import Count
 from django.db.models import Max
 from django.shortcuts import get_object_or_404
 from drf_spectacular.utils import OpenApiParameter
 from drf_spectacular.utils import OpenApiTypes
 from drf_spectacular.utils import extend_schema
+from drf_spectacular.utils import extend_schema_view
+from rest_framework import mixins
 from rest_framework import status
 from rest_framework import viewsets
 from rest_framework.decorators import action
@@ -13,19 +18,48 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from nems_proctor.proctoring.contact_sheet import sheet_name
+from nems_proctor.proctoring.delivery import media_response
+from nems_proctor.proctoring.delivery import stored_response
 from nems_proctor.proctoring.models import Exam
+from nems_proctor.proctoring.models import RecordingType
 from nems_proctor.proctoring.models import Session
 from nems_proctor.proctoring.models import SessionPhoto
 from nems_proctor.proctoring.models import SessionRecord
+from nems_proctor.proctoring.resolvers import provision_users
+from nems_proctor.proctoring.tasks import finalize_session
+from nems_proctor.proctoring.tasks import index_session_record_audio
+from nems_proctor.proctoring.tasks import render_contact_sheet
+from nems_proctor.proctoring.validators import IngestUploadHandler
 from nems_proctor.users.models import User
 
+from .filters import PhotoScoreFilter
+from .filters import photo_score_params
+from .idempotency import idempotency_key_param
+from .idempotency import idempotent
+from .permissions import CanAccessSessionMedia
+from .permissions import CanProvisionTakers
+from .rows import listing_data
 from .serializers import ExamSerializer
 from .serializers import GetTakersByExamSerializer
+from .serializers import ProvisionTakersSerializer
 from .serializers import SessionPhotoCreateSerializer
 from .serializers import SessionPhotoSerializer
 from .serializers import SessionRecordCreateSerializer
 from .serializers import SessionRecordSerializer
 from .serializers import SessionSerializer
+from .sparse import SparseFieldsetViewMixin
+from .sparse import optimize_queryset
+from .sparse import sparse_fieldset_params
+from .throttling import UploadRateThrottle
+
+# Seconds a queued contact sheet render blocks re-queuing the same version,
+# and the Retry-After suggested to clients meanwhile.
+CONTACT_SHEET_WAIT = 60
+CONTACT_SHEET_RETRY_AFTER = 2
+# The same for indexing an audio recording's activity.
+AUDIO_INDEX_WAIT = 60
+AUDIO_INDEX_RETRY_AFTER = 5
 
 sort_param = OpenApiParameter(
     name="sort",
@@ -40,6 +74,42 @@ sort_param = OpenApiParameter(
 )
 
 
+class NonAtomicActionsMixin(viewsets.ViewSetMixin):
+    """
+    Lets the viewset actions listed in ``non_atomic_actions`` run outside the
+    transaction ``ATOMIC_REQUESTS`` wraps around every view. Those actions
+    open their own short transactions, e.g. around a row insert that follows
+    a slow storage upload.
+    """
+
+    non_atomic_actions: tuple[str, ...] = ()
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        if actions and set(actions.values()) <= set(cls.non_atomic_actions):
+            view = transaction.non_atomic_requests(view)
+        return view
+
+
+class RowListMixin(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Serves unpaginated listings from ``values()`` rows (see
+    ``nems_proctor.proctoring.api.rows``) with the same JSON.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if self.paginator is not None:
+            return super().list(request, *args, **kwargs)
+        return Response(
+            listing_data(
+                self.get_serializer_class(),
+                self.filter_queryset(self.get_queryset()),
+                self.get_serializer_context(),
+            ),
+        )
+
+
 @extend_schema(
     parameters=[
         OpenApiParameter(
@@ -63,7 +133,15 @@ sort_param = OpenApiParameter(
     ],
     tags=["Session"],
 )
-class SessionViewSet(viewsets.ModelViewSet):
+@extend_schema_view(
+    list=extend_schema(parameters=sparse_fieldset_params(SessionSerializer)),
+    retrieve=extend_schema(parameters=sparse_fieldset_params(SessionSerializer)),
+)
+class SessionViewSet(
+    NonAtomicActionsMixin,
+    SparseFieldsetViewMixin,
+    viewsets.ModelViewSet,
+):
     """
     API endpoint that allows sessions to be viewed or edited.
 
@@ -71,10 +149,28 @@ class SessionViewSet(viewsets.ModelViewSet):
     - `taker`: Filter sessions by taker username.
     - `exam`: Filter sessions by exam code.
     - `proctor`: Filter sessions by proctor username.
+    - `fields`, `expand`: Return only some fields, or related resources
+      (taker, proctor, exam, records) nested.
     """
 
     queryset = Session.objects.all()
     serializer_class = SessionSerializer
+    # Upload kinds accepted by each media action, checked while streaming.
+    upload_kinds = {
+        "add_photo": ("photo",),
+        "add_record": tuple(RecordingType.values),
+    }
+    # Media uploads write to storage before their (short) transaction.
+    non_atomic_actions = tuple(upload_kinds)
+
+    def initialize_request(self, request, *args, **kwargs):
+        request = super().initialize_request(request, *args, **kwargs)
+        if self.action in self.upload_kinds:
+            request.upload_handlers.insert(
+                0,
+                IngestUploadHandler(request, self.upload_kinds[self.action]),
+            )
+        return request
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -90,19 +186,57 @@ class SessionViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(proctor__username=proctor_username)
         return queryset
 
+    @extend_schema(parameters=[idempotency_key_param])
     @action(detail=False, methods=["post"], url_path="start_session")
+    @idempotent
     def start_session(self, request):
-        serializer = SessionSerializer(data=request.data)  # Use your updated serializer
+        serializer = SessionSerializer(
+            data=request.data,
+            context={"request": request},
+        )  # Use your updated serializer
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @extend_schema(request=ProvisionTakersSerializer)
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="provision_takers",
+        permission_classes=[IsAuthenticated, CanProvisionTakers],
+    )
+    def provision_takers(self, request):
+        """
+        Creates every taker in a roster that does not exist yet. Only staff
+        and users allowed to add users may provision takers.
+
+        Missing users are inserted in a single statement under the caller's
+        company, so an exam's roster can be provisioned ahead of the start
+        burst instead of one `start_session` at a time.
+        """
+        serializer = ProvisionTakersSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        usernames = serializer.validated_data["usernames"]
+        users = provision_users(usernames, company_id=request.user.company_id)
+        return Response(
+            {
+                "count": len(users),
+                "takers": {username: user.pk for username, user in users.items()},
+            },
+            status=status.HTTP_200_OK,
+        )
+
     @action(detail=True, methods=["post"], url_path="end_session")
     def end_session(self, request, pk=None):
         """
         Ends an active session. Only authenticated users can end sessions.
+
+        The session's duration, media summary and manifest are computed in
+        the background and appear on the session once finalized.
         """
         session = self.get_queryset().get(pk=pk)
 
@@ -113,24 +247,70 @@ class SessionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        session.is_active = False
-        session.save()
+        session.end_session()
+        # Summaries, the manifest and downstream processing are computed by
+        # a Celery task so the request returns right away.
+        transaction.on_commit(lambda: finalize_session.delay(session.pk))
 
         return Response(
             {"detail": "Session successfully ended."},
             status=status.HTTP_200_OK,
         )
 
+    @extend_schema(
+        responses={
+            (200, "image/jpeg"): OpenApiTypes.BINARY,
+            202: OpenApiTypes.OBJECT,
+            204: None,
+            304: None,
+        },
+    )
+    @action(
+        detail=True,
+        methods=["get"],
+        url_path="contact_sheet",
+        permission_classes=[IsAuthenticated, CanAccessSessionMedia],
+    )
+    def contact_sheet(self, request, pk=None):
+        """
+        Returns a single image with frames sampled across the session, each
+        labelled with its time from the session start. It is delivered like
+        photo content, never from a public storage URL.
+
+        If no sheet matches the session's current photos yet, one is
+        rendered in the background and 202 is returned; retry after the
+        `Retry-After` seconds. Sessions without photos return 204.
+        """
+        session = self.get_object()
+        if not session.photo_count:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        name = sheet_name(session)
+        if default_storage.exists(name):
+            return stored_response(request, default_storage, name)
+
+        # Only one render per sheet version is queued at a time.
+        if cache.add(f"contact-sheet:{name}", value=True, timeout=CONTACT_SHEET_WAIT):
+            render_contact_sheet.delay(session.pk)
+        return Response(
+            {"detail": "The contact sheet is being rendered."},
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Retry-After": str(CONTACT_SHEET_RETRY_AFTER)},
+        )
+
     @extend_schema(
         request=SessionPhotoCreateSerializer,
         responses={201: SessionPhotoCreateSerializer},
+        parameters=[idempotency_key_param],
     )
     @action(
         detail=True,
         methods=["post"],
         url_path="add_photo",
         parser_classes=[MultiPartParser, FormParser],
+        throttle_classes=[UploadRateThrottle],
     )
+    @idempotent
     def add_photo(self, request, pk=None):
         """
         Add a photo to an active session.
@@ -157,13 +337,16 @@ class SessionViewSet(viewsets.ModelViewSet):
     @extend_schema(
         request=SessionRecordCreateSerializer,
         responses={201: SessionRecordCreateSerializer},
+        parameters=[idempotency_key_param],
     )
     @action(
         detail=True,
         methods=["post"],
         url_path="add_record",
         parser_classes=[MultiPartParser, FormParser],
+        throttle_classes=[UploadRateThrottle],
     )
+    @idempotent
     def add_record(self, request, pk=None):
         """
         API endpoint for managing session records.
@@ -189,7 +372,17 @@ class SessionViewSet(viewsets.ModelViewSet):
 
 
 @extend_schema(tags=["Session Record"])
-class SessionRecordViewSet(viewsets.ModelViewSet):
+@extend_schema_view(
+    list=extend_schema(parameters=sparse_fieldset_params(SessionRecordSerializer)),
+    retrieve=extend_schema(
+        parameters=sparse_fieldset_params(SessionRecordSerializer),
+    ),
+)
+class SessionRecordViewSet(
+    RowListMixin,
+    SparseFieldsetViewMixin,
+    viewsets.ModelViewSet,
+):
     """
     API endpoint for managing session photos.
 
@@ -199,21 +392,128 @@ class SessionRecordViewSet(viewsets.ModelViewSet):
     queryset = SessionRecord.objects.all()
     serializer_class = SessionRecordSerializer
 
+    @extend_schema(
+        responses={
+            (200, "application/octet-stream"): OpenApiTypes.BINARY,
+            (206, "application/octet-stream"): OpenApiTypes.BINARY,
+            304: None,
+            416: None,
+        },
+    )
+    @action(
+        detail=True,
+        methods=["get"],
+        url_path="content",
+        permission_classes=[IsAuthenticated, CanAccessSessionMedia],
+    )
+    def content(self, request, pk=None):
+        """
+        Streams the recording file to staff, users of its company and the
+        session's taker and proctor. Supports `Range` requests (206) for
+        seeking, `If-Range`, and revalidation with `ETag`/`Last-Modified`.
+        """
+        return media_response(request, self.get_object().file)
+
+    @extend_schema(
+        responses={
+            200: OpenApiTypes.OBJECT,
+            202: OpenApiTypes.OBJECT,
+            404: OpenApiTypes.OBJECT,
+            422: OpenApiTypes.OBJECT,
+        },
+    )
+    @action(detail=True, methods=["get"], url_path="activity")
+    def activity(self, request, pk=None):
+        """
+        Returns the activity index of an audio recording: its `duration`, a
+        loudness `envelope` in dBFS with one value every `interval` seconds,
+        and the voice `segments` as [start, end] seconds.
+
+        If the recording has not been indexed yet, that is done in the
+        background and 202 is returned; retry after the `Retry-After`
+        seconds. Recordings that cannot be decoded return 422.
+        """
+        record = self.get_object()
+        if record.recording_type != RecordingType.AUDIO:
+            return Response(
+                {"detail": "Only audio recordings have an activity index."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        if record.activity is None:
+            if cache.add(
+                f"audio-index:{record.pk}",
+                value=True,
+                timeout=AUDIO_INDEX_WAIT,
+            ):
+                index_session_record_audio.delay(record.pk)
+            return Response(
+                {"detail": "The recording is being indexed."},
+                status=status.HTTP_202_ACCEPTED,
+                headers={"Retry-After": str(AUDIO_INDEX_RETRY_AFTER)},
+            )
+        if "error" in record.activity:
+            return Response(
+                {"detail": record.activity["error"]},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        return Response(record.activity)
+
 
 @extend_schema(tags=["Session Photo"])
-class SessionPhotoViewSet(viewsets.ModelViewSet):
+@extend_schema_view(
+    list=extend_schema(
+        parameters=[
+            *photo_score_params,
+            *sparse_fieldset_params(SessionPhotoSerializer),
+        ],
+    ),
+    retrieve=extend_schema(parameters=sparse_fieldset_params(SessionPhotoSerializer)),
+)
+class SessionPhotoViewSet(
+    RowListMixin,
+    SparseFieldsetViewMixin,
+    viewsets.ModelViewSet,
+):
     """
     API endpoint for managing session records.
 
     Supports actions to list, create, retrieve, update, and delete session photos.
+    Listings can be filtered and sorted by frame scores.
     """
 
     queryset = SessionPhoto.objects.all()
     serializer_class = SessionPhotoSerializer
+    filter_backends = [PhotoScoreFilter]
+
+    @extend_schema(
+        responses={
+            (200, "application/octet-stream"): OpenApiTypes.BINARY,
+            (206, "application/octet-stream"): OpenApiTypes.BINARY,
+            304: None,
+            416: None,
+        },
+    )
+    @action(
+        detail=True,
+        methods=["get"],
+        url_path="content",
+        permission_classes=[IsAuthenticated, CanAccessSessionMedia],
+    )
+    def content(self, request, pk=None):
+        """
+        Streams the photo file to staff, users of its company and the
+        session's taker and proctor. Supports `Range` requests (206) for
+        seeking, `If-Range`, and revalidation with `ETag`/`Last-Modified`.
+        """
+        return media_response(request, self.get_object().photo)
 
 
 @extend_schema(tags=["Exam"])
-class ExamViewSet(viewsets.ModelViewSet):
+@extend_schema_view(
+    list=extend_schema(parameters=sparse_fieldset_params(ExamSerializer)),
+    retrieve=extend_schema(parameters=sparse_fieldset_params(ExamSerializer)),
+)
+class ExamViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing exams.
 
@@ -226,7 +526,7 @@ class ExamViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user_company_id = self.request.user.company_id
-        return Exam.objects.filter(company_id=user_company_id)
+        return super().get_queryset().filter(company_id=user_company_id)
 
     def perform_create(self, serializer):
         serializer.save(company_id=self.request.user.company_id)
@@ -282,6 +582,7 @@ class GetTakersByExam(APIView):
             """,
             required=False,
         ),
+        *sparse_fieldset_params(SessionSerializer),
     ],
 )
 class GetSessionsByExamAndTaker(APIView):
@@ -301,62 +602,74 @@ class GetSessionsByExamAndTaker(APIView):
         sort_order = request.query_params.get("sort", "asc")
         order_by = "-id" if sort_order == "desc" else "id"
 
-        sessions = Session.objects.filter(exam=exam, taker=taker).order_by(order_by)
-        session_count = sessions.count()
-        session_photo_count = SessionPhoto.objects.filter(session__in=sessions).count()
-        session_record_count = SessionRecord.objects.filter(
-            session__in=sessions,
-        ).count()
-
-        sessions_data = []
-        for session in sessions:
-            session_data = self.serializer_class(
-                session,
-                context={"request": request},
-            ).data
-            session_data["photo_count"] = SessionPhoto.objects.filter(
-                session=session,
-            ).count()
-            sessions_data.append(session_data)
+        context = {"request": request}
+        sessions = list(
+            optimize_queryset(
+                Session.objects.filter(exam=exam, taker=taker).order_by(order_by),
+                self.serializer_class(context=context),
+            ),
+        )
+        # Each session carries its own photo_count/record_count.
+        sessions_data = self.serializer_class(
+            sessions,
+            many=True,
+            context=context,
+        ).data
 
         data = {
-            "count": session_count,
-            "photo_count": session_photo_count,
-            "record_count": session_record_count,
+            "count": len(sessions),
+            "photo_count": sum(session.photo_count for session in sessions),
+            "record_count": sum(session.record_count for session in sessions),
             "sessions": sessions_data,
         }
 
         return Response(data)
 
 
-@extend_schema(tags=["Session"])
+@extend_schema(
+    tags=["Session"],
+    parameters=[*photo_score_params, *sparse_fieldset_params(SessionPhotoSerializer)],
+)
 class GetSessionsPhotoBySession(APIView):
     """
     Retrieve a list of photos for a given session id.
 
     This endpoint provides a list of photos
-    who have sessions associated with the specified session id.
+    who have sessions associated with the specified session id,
+    optionally filtered and sorted by frame scores.
     """
 
     serializer_class = SessionPhotoSerializer
 
     def get(self, request, session_id):
         session = get_object_or_404(Session, id=session_id)
-        photos = SessionPhoto.objects.filter(session=session)
-        serializer = self.serializer_class(
-            photos,
-            many=True,
-            context={"request": request},
+        context = {"request": request}
+        photos = PhotoScoreFilter().filter_queryset(
+            request,
+            optimize_queryset(
+                SessionPhoto.objects.filter(session=session),
+                self.serializer_class(context=context),
+            ),
+            self,
         )
+        rows = listing_data(self.serializer_class, photos, context)
         data = {
-            "count": photos.count(),
-            "photos": serializer.data,
+            # The stored counter only counts the whole session.
+            "count": (
+                len(rows)
+                if PhotoScoreFilter.is_filtering(request)
+                else session.photo_count
+            ),
+            "photos": rows,
         }
 
         return Response(data)
 
 
-@extend_schema(tags=["Session"])
+@extend_schema(
+    tags=["Session"],
+    parameters=sparse_fieldset_params(SessionRecordSerializer),
+)
 class GetSessionsRecordBySession(APIView):
     """
     Retrieve a list of records for a given session id.
@@ -369,16 +682,14 @@ class GetSessionsRecordBySession(APIView):
 
     def get(self, request, session_id):
         session = get_object_or_404(Session, id=session_id)
-        records = SessionRecord.objects.filter(session=session)
-        serializer = self.serializer_class(
-            records,
-            many=True,
-            context={"request": request},
+        context = {"request": request}
+        records = optimize_queryset(
+            SessionRecord.objects.filter(session=session),
+            self.serializer_class(context=context),
         )
-
         data = {
-            "count": records.count(),
-            "records": serializer.data,
+            "count": session.record_count,
+            "records": listing_data(self.serializer_class, records, context),
         }
 
         return Response(data)
@@ -1,6 +1,12 @@
+import contextlib
+
 from django.apps import AppConfig
 
 
 class ProctoringConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "nems_proctor.proctoring"
+
+    def ready(self):
+        with contextlib.suppress(ImportError):
+            import nems_proctor.proctoring.signals  # noqa: F401
@@ -0,0 +1,216 @@
+"""
+Activity index of audio recordings: a compact loudness envelope and the
+segments that contain voice. The review UI uses it to jump to speech
+without downloading the audio.
+
+WAV is decoded with the standard library. MP3 and Ogg are decoded with
+ffmpeg when it is installed (``FFMPEG_BINARY``); otherwise they cannot be
+indexed. Audio is read in chunks and reduced to one RMS level per
+``FRAME_SECONDS`` as it is decoded, so memory does not grow with the
+length of the recording.
+
+Voice activity is energy based. A frame counts as active when it is
+``VOICE_MARGIN_DB`` louder than the recording's noise floor (a low
+percentile of its frame levels) and above ``VOICE_MIN_DB``. Gaps shorter
+than ``MIN_GAP_SECONDS`` are bridged, and blips shorter than
+``MIN_SEGMENT_SECONDS`` are dropped.
+"""
+
+import shutil
+import subprocess
+import tempfile
+import wave
+from pathlib import PurePath
+
+import numpy as np
+from django.conf import settings
+
+FRAME_SECONDS = 0.05
+SILENCE_DB = -90.0
+NOISE_FLOOR_PERCENTILE = 20
+VOICE_MARGIN_DB = 12.0
+VOICE_MIN_DB = -50.0
+MIN_GAP_SECONDS = 0.3
+MIN_SEGMENT_SECONDS = 0.2
+DECODE_CHUNK_FRAMES = 200
+FFMPEG_SAMPLE_RATE = 16_000
+SAMPLE_DTYPES = {1: np.uint8, 2: np.int16, 4: np.int32}
+
+
+class AudioDecodeError(Exception):
+    pass
+
+
+def _wav_chunks(content):
+    try:
+        reader = wave.open(content, "rb")
+    except (wave.Error, EOFError) as exc:
+        raise AudioDecodeError(str(exc)) from exc
+    with reader:
+        width = reader.getsampwidth()
+        channels = reader.getnchannels()
+        rate = reader.getframerate()
+        if width not in SAMPLE_DTYPES:
+            message = f"Unsupported sample width: {width * 8} bits."
+            raise AudioDecodeError(message)
+        scale = float(2 ** (width * 8 - 1))
+        frame_length = max(1, round(rate * FRAME_SECONDS))
+        yield rate
+        frame_bytes = width * channels
+        while data := reader.readframes(frame_length * DECODE_CHUNK_FRAMES):
+            # A truncated file can end in the middle of a frame.
+            data = data[: len(data) // frame_bytes * frame_bytes]
+            samples = np.frombuffer(data, dtype=SAMPLE_DTYPES[width])
+            samples = samples.astype(np.float32)
+            if width == 1:
+                # 8-bit WAV is unsigned.
+                samples -= 128
+            yield samples.reshape(-1, channels).mean(axis=1) / scale
+
+
+def _ffmpeg_chunks(content, name):
+    binary = shutil.which(settings.FFMPEG_BINARY)
+    if binary is None:
+        message = "ffmpeg is needed to decode this format."
+        raise AudioDecodeError(message)
+    frame_length = round(FFMPEG_SAMPLE_RATE * FRAME_SECONDS)
+    chunk_bytes = frame_length * DECODE_CHUNK_FRAMES * 2
+    with (
+        tempfile.NamedTemporaryFile(suffix=PurePath(name).suffix) as source,
+        # stderr goes to a file: an unread pipe could fill up and block
+        # ffmpeg while stdout is being read.
+        tempfile.TemporaryFile() as errors,
+    ):
+        shutil.copyfileobj(content, source)
+        source.flush()
+        command = [
+            binary,
+            "-nostdin",
+            "-v",
+            "error",
+            "-i",
+            source.name,
+            "-f",
+            "s16le",
+            "-ac",
+            "1",
+            "-ar",
+            str(FFMPEG_SAMPLE_RATE),
+            "pipe:1",
+        ]
+        with subprocess.Popen(
+            command,  # noqa: S603
+            stdout=subprocess.PIPE,
+            stderr=errors,
+        ) as process:
+            assert process.stdout is not None
+            yield FFMPEG_SAMPLE_RATE
+            while data := process.stdout.read(chunk_bytes):
+                samples = np.frombuffer(data[: len(data) // 2 * 2], dtype=np.int16)
+                yield samples.astype(np.float32) / 2**15
+            if process.wait() != 0:
+                errors.seek(0)
+                raise AudioDecodeError(errors.read().decode(errors="replace"))
+
+
+def frame_levels(content, name):
+    """
+    Decodes the audio in ``content`` and returns its sample rate and the
+    RMS level of every ``FRAME_SECONDS`` frame in dBFS.
+    """
+    if PurePath(name).suffix.lower() == ".wav":
+        chunks = _wav_chunks(content)
+    else:
+        chunks = _ffmpeg_chunks(content, name)
+    rate = next(chunks)
+    frame_length = max(1, round(rate * FRAME_SECONDS))
+    levels = []
+    carry = np.empty(0, dtype=np.float32)
+    for chunk in chunks:
+        samples = np.concatenate((carry, chunk))
+        whole = len(samples) // frame_length * frame_length
+        carry = samples[whole:]
+        if whole:
+            levels.append(_rms_db(samples[:whole].reshape(-1, frame_length)))
+    if len(carry):
+        levels.append(_rms_db(carry[np.newaxis]))
+    if not levels:
+        return rate, np.empty(0)
+    return rate, np.concatenate(levels)
+
+
+def _rms_db(frames):
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+    return np.maximum(20 * np.log10(np.maximum(rms, 1e-10)), SILENCE_DB)
+
+
+def envelope(levels, points):
+    """
+    Reduces frame ``levels`` to at most ``points`` values (the loudest frame
+    of each bucket). Returns the values and the seconds each one spans.
+    """
+    per_point = max(1, -(-len(levels) // points))
+    padded = np.full(-(-len(levels) // per_point) * per_point, SILENCE_DB)
+    padded[: len(levels)] = levels
+    return padded.reshape(-1, per_point).max(axis=1), per_point * FRAME_SECONDS
+
+
+def voice_segments(levels):
+    """
+    Returns ``[start, end]`` pairs in seconds of the voiced parts of frame
+    ``levels``.
+    """
+    if not len(levels):
+        return []
+    floor = np.percentile(levels, NOISE_FLOOR_PERCENTILE)
+    active = (levels > floor + VOICE_MARGIN_DB) & (levels > VOICE_MIN_DB)
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], active.view(np.int8), [0]))))
+    segments = edges.reshape(-1, 2) * FRAME_SECONDS
+
+    merged: list[list[float]] = []
+    for start, end in segments.tolist():
+        if merged and start - merged[-1][1] < MIN_GAP_SECONDS:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [
+        [round(start, 2), round(end, 2)]
+        for start, end in merged
+        if end - start >= MIN_SEGMENT_SECONDS
+    ]
+
+
+def activity_index(content, name):
+    """
+    Returns the activity index of the audio in ``content``: its duration,
+    a dBFS envelope of at most ``PROCTORING_AUDIO_ENVELOPE_POINTS`` values
+    ``interval`` seconds apart, and the voice segments.
+    """
+    _, levels = frame_levels(content, name)
+    values, interval = envelope(levels, settings.PROCTORING_AUDIO_ENVELOPE_POINTS)
+    return {
+        "duration": round(len(levels) * FRAME_SECONDS, 2),
+        "interval": round(interval, 3),
+        "envelope": np.round(values).astype(int).tolist(),
+        "segments": voice_segments(levels),
+    }
+
+
+def index_record(record):
+    """
+    Computes and stores the activity index of an audio ``SessionRecord``.
+    Recordings that cannot be read or decoded get an ``error`` instead, so
+    they are not queued for indexing again.
+    """
+    try:
+        with record.file.open("rb") as content:
+            record.activity = activity_index(content, record.file.name)
+    except FileNotFoundError:
+        record.activity = {"error": "The recording file is missing."}
+    except AudioDecodeError as exc:
+        record.activity = {"error": str(exc) or "The audio could not be decoded."}
+    except (OSError, EOFError, ValueError, wave.Error):
+        # Truncated or corrupt files fail inside the decoders.
+        record.activity = {"error": "The audio could not be decoded."}
+    record.save(update_fields=["activity"])
+    return record.activity
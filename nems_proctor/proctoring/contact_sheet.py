@@ -0,0 +1,120 @@
+"""
+Contact sheets: one image with a grid of frames sampled evenly across a
+session, each labelled with its offset from the session start.
+
+Sheets are rendered by a Celery task and stored under the session's key
+prefix, named after the session's ``photo_count`` and its latest photo's
+primary key. Adding or deleting a photo changes one of them, so the stored
+sheet no longer matches and the next request renders a fresh one; older
+sheets are removed when it is written.
+"""
+
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Max
+from PIL import Image
+from PIL import ImageDraw
+from PIL import UnidentifiedImageError
+
+from nems_proctor.proctoring.storage import delete_names
+from nems_proctor.proctoring.storage import list_prefix
+from nems_proctor.proctoring.storage import session_prefix
+
+BACKGROUND = (24, 24, 24)
+LABEL_HEIGHT = 14
+
+
+def sheet_prefix(session):
+    return f"{session_prefix(session)}contact-sheet/"
+
+
+def sheet_name(session):
+    # The count alone repeats when a photo is deleted and another added;
+    # primary keys only grow.
+    latest = session.sessionphoto_set.aggregate(pk=Max("pk"))["pk"] or 0
+    return f"{sheet_prefix(session)}{session.photo_count}-{latest}.jpg"
+
+
+def sample(items, count):
+    """
+    Returns at most ``count`` items spread evenly over ``items``, always
+    including the first and the last.
+    """
+    if len(items) <= count:
+        return list(items)
+    if count == 1:
+        return [items[0]]
+    step = (len(items) - 1) / (count - 1)
+    return [items[round(i * step)] for i in range(count)]
+
+
+def _label(offset):
+    seconds = max(0, int(offset.total_seconds()))
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def render(session):
+    """
+    Returns the contact sheet of ``session`` as JPEG bytes, or ``None`` when
+    it has no photos.
+    """
+    columns = settings.PROCTORING_CONTACT_SHEET_COLUMNS
+    tile_width = settings.PROCTORING_CONTACT_SHEET_TILE_WIDTH
+    tile_height = tile_width * 3 // 4
+    photos = session.sessionphoto_set.order_by("captured_at").only(
+        "photo",
+        "captured_at",
+    )
+    photos = sample(list(photos), settings.PROCTORING_CONTACT_SHEET_MAX_FRAMES)
+    if not photos:
+        return None
+
+    rows = -(-len(photos) // columns)
+    cell_height = tile_height + LABEL_HEIGHT
+    sheet = Image.new("RGB", (columns * tile_width, rows * cell_height), BACKGROUND)
+    draw = ImageDraw.Draw(sheet)
+    for index, photo in enumerate(photos):
+        left = index % columns * tile_width
+        top = index // columns * cell_height
+        try:
+            with photo.photo.open("rb") as content, Image.open(content) as image:
+                image.draft("RGB", (tile_width, tile_height))
+                tile = image.convert("RGB")
+        except (UnidentifiedImageError, OSError):
+            # A missing or broken frame leaves its tile blank.
+            tile = None
+        if tile is not None:
+            tile.thumbnail((tile_width, tile_height))
+            sheet.paste(
+                tile,
+                (
+                    left + (tile_width - tile.width) // 2,
+                    top + (tile_height - tile.height) // 2,
+                ),
+            )
+        draw.text(
+            (left + 4, top + tile_height + 1),
+            _label(photo.captured_at - session.start_time),
+            fill="white",
+        )
+
+    buffer = BytesIO()
+    sheet.save(buffer, "JPEG", quality=80)
+    return buffer.getvalue()
+
+
+def store(session):
+    """
+    Renders and stores the contact sheet for the current photos of
+    ``session``, removing outdated ones. Returns its name, or ``None``.
+    """
+    content = render(session)
+    if content is None:
+        return None
+    name = sheet_name(session)
+    outdated = list(list_prefix(default_storage, sheet_prefix(session)))
+    delete_names(default_storage, outdated)
+    return default_storage.save(name, ContentFile(content))
@@ -0,0 +1,140 @@
+"""
+Denormalized media counters on ``Session``.
+
+``photo_count``, ``record_count``, ``total_bytes`` and ``last_media_at`` are
+kept up to date with single ``UPDATE ... SET x = x + n`` statements when
+media is added, removed or re-encoded, so concurrent uploads never lose an
+increment and listings never have to count rows. ``reconcile()`` recomputes
+them from the media tables to repair any drift.
+"""
+
+from django.db.models import Count
+from django.db.models import F
+from django.db.models import Max
+from django.db.models import OuterRef
+from django.db.models import Subquery
+from django.db.models import Sum
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from django.db.models.functions import Greatest
+
+from nems_proctor.proctoring.models import Session
+from nems_proctor.proctoring.models import SessionPhoto
+from nems_proctor.proctoring.models import SessionRecord
+from nems_proctor.proctoring.storage import stat_name
+
+COUNT_FIELDS = {SessionPhoto: "photo_count", SessionRecord: "record_count"}
+TIMESTAMP_FIELDS = {SessionPhoto: "captured_at", SessionRecord: "recorded_at"}
+FIELDS = ("photo_count", "record_count", "total_bytes", "last_media_at")
+
+
+def media_added(instance):
+    timestamp = Value(getattr(instance, TIMESTAMP_FIELDS[type(instance)]))
+    Session.objects.filter(pk=instance.session_id).update(
+        **{COUNT_FIELDS[type(instance)]: F(COUNT_FIELDS[type(instance)]) + 1},
+        total_bytes=F("total_bytes") + (instance.stored_bytes or 0),
+        last_media_at=Greatest(Coalesce("last_media_at", timestamp), timestamp),
+    )
+
+
+def media_removed(instance):
+    # Counters never go below zero, even if they drifted (e.g. sessions
+    # created before the counters existed); reconcile() repairs them.
+    field = COUNT_FIELDS[type(instance)]
+    Session.objects.filter(pk=instance.session_id).update(
+        **{field: Greatest(F(field) - 1, 0)},
+        total_bytes=Greatest(F("total_bytes") - (instance.stored_bytes or 0), 0),
+    )
+
+
+def bytes_changed(session_id, delta):
+    if delta:
+        Session.objects.filter(pk=session_id).update(
+            total_bytes=Greatest(F("total_bytes") + delta, 0),
+        )
+
+
+def _aggregate(model, expression):
+    return Subquery(
+        model.objects.filter(session=OuterRef("pk"))
+        .order_by()
+        .values("session")
+        .annotate(value=expression)
+        .values("value"),
+    )
+
+
+def _total(model, expression):
+    return Coalesce(_aggregate(model, expression), 0)
+
+
+def actual_counters(queryset):
+    """
+    Annotates ``queryset`` with the counters recomputed from the media
+    tables, as ``actual_<field>``.
+    """
+    # PostgreSQL's GREATEST ignores NULLs, i.e. sessions with only photos
+    # or only records.
+    return queryset.annotate(
+        actual_photo_count=_total(SessionPhoto, Count("id")),
+        actual_record_count=_total(SessionRecord, Count("id")),
+        actual_total_bytes=_total(SessionPhoto, Sum("stored_bytes"))
+        + _total(SessionRecord, Sum("stored_bytes")),
+        actual_last_media_at=Greatest(
+            _aggregate(SessionPhoto, Max("captured_at")),
+            _aggregate(SessionRecord, Max("recorded_at")),
+        ),
+    )
+
+
+def backfill_stored_bytes(queryset, field_name, batch_size=1000):
+    """
+    Sets the missing ``stored_bytes`` of the media rows in ``queryset``
+    (saved before the field existed) from the size of their file in
+    storage. Rows whose file is gone keep ``None``.
+    """
+    rows = (
+        queryset.filter(stored_bytes__isnull=True)
+        .exclude(**{field_name: ""})
+        .order_by("pk")
+        .only("pk", field_name)
+    )
+    last_pk = 0
+    while batch := list(rows.filter(pk__gt=last_pk)[:batch_size]):
+        last_pk = batch[-1].pk
+        sized = []
+        for media in batch:
+            field_file = getattr(media, field_name)
+            try:
+                media.stored_bytes, _ = stat_name(field_file.storage, field_file.name)
+            except FileNotFoundError:
+                continue
+            sized.append(media)
+        queryset.model.objects.bulk_update(sized, ["stored_bytes"])
+
+
+def reconcile(queryset, batch_size=1000):
+    """
+    Recomputes the counters of the sessions in ``queryset`` and saves the
+    ones that drifted. Returns the number of sessions fixed.
+    """
+    photos = SessionPhoto.objects.filter(session__in=queryset)
+    records = SessionRecord.objects.filter(session__in=queryset)
+    backfill_stored_bytes(photos, "photo", batch_size)
+    backfill_stored_bytes(records, "file", batch_size)
+
+    fixed = 0
+    last_pk = 0
+    queryset = actual_counters(queryset.order_by("pk")).only("pk", *FIELDS)
+    while batch := list(queryset.filter(pk__gt=last_pk)[:batch_size]):
+        last_pk = batch[-1].pk
+        drifted = []
+        for session in batch:
+            actual = {field: getattr(session, f"actual_{field}") for field in FIELDS}
+            if any(getattr(session, field) != actual[field] for field in FIELDS):
+                for field, value in actual.items():
+                    setattr(session, field, value)
+                drifted.append(session)
+        Session.objects.bulk_update(drifted, FIELDS)
+        fixed += len(drifted)
+    return fixed
@@ -0,0 +1,200 @@
+"""
+Delivery of session media to authenticated users.
+
+Responses stream the file from storage in chunks and support HTTP range
+requests. A player can seek through a long recording by fetching only the
+bytes it needs, and on S3 only those bytes are read. ``ETag`` and
+``Last-Modified`` let clients revalidate with ``If-None-Match`` /
+``If-Modified-Since``. ``If-Range`` makes sure a resumed download does not
+mix bytes of two versions of a file.
+
+Only single ranges are served partially. Multi-range requests get the
+whole file, which RFC 9110 allows.
+
+With ``MEDIA_DELIVERY_MODE = "x-accel"`` Django only authorizes the request
+and answers with an ``X-Accel-Redirect`` to an internal nginx location (see
+``compose/production/nginx/default.conf``), so no Python worker streams
+bytes. Files on the local file system are sent by nginx itself. S3 objects
+are proxied from a short-lived presigned URL passed in ``X-Accel-S3-URL``.
+Range and conditional requests are then handled by nginx or S3.
+"""
+
+import hashlib
+import mimetypes
+from pathlib import PurePosixPath
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import Http404
+from django.http import HttpResponse
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.cache import patch_cache_control
+from django.utils.http import content_disposition_header
+from django.utils.http import http_date
+from django.utils.http import parse_http_date_safe
+from django.utils.http import quote_etag
+
+from nems_proctor.proctoring.storage import backing_storage
+from nems_proctor.proctoring.storage import is_s3
+from nems_proctor.proctoring.storage import presigned_url
+from nems_proctor.proctoring.storage import read_range
+from nems_proctor.proctoring.storage import stat_name
+
+STREAM = "stream"
+X_ACCEL = "x-accel"
+
+
+class RangeNotSatisfiableError(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """
+    Returns the inclusive ``(start, end)`` of a ``Range`` header for a file
+    of ``size`` bytes. Returns ``None`` when the whole file should be sent
+    (no, malformed or multi-range header). Raises
+    ``RangeNotSatisfiableError`` when the range lies outside the file.
+    """
+    units, _, spec = (header or "").partition("=")
+    first, dash, last = spec.strip().partition("-")
+    if (
+        units.strip().lower() != "bytes"
+        or not dash
+        or not (first or last)
+        or not all(part.isdigit() for part in (first, last) if part)
+    ):
+        return None
+    if not first:
+        # Suffix range: the last ``last`` bytes.
+        length = int(last)
+        if not length or not size:
+            raise RangeNotSatisfiableError
+        return max(0, size - length), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiableError
+    end = min(int(last), size - 1) if last else size - 1
+    return start, end
+
+
+def _if_range_matches(request, etag, last_modified):
+    validator = request.headers.get("If-Range")
+    if validator is None:
+        return True
+    if validator.startswith(('"', "W/")):
+        # If-Range requires a strong comparison.
+        return validator == etag
+    return parse_http_date_safe(validator) == last_modified
+
+
+def media_response(request, field_file):
+    """
+    Returns a streaming response with the file of ``field_file`` for
+    ``request``, honouring ``Range``, ``If-Range`` and conditional headers.
+    """
+    return stored_response(request, field_file.storage, field_file.name)
+
+
+def stored_response(request, storage, name):
+    """
+    Like ``media_response()``, for the file ``name`` of ``storage``.
+    """
+    if settings.MEDIA_DELIVERY_MODE == X_ACCEL:
+        return _accel_response(storage, name)
+
+    try:
+        size, modified = stat_name(storage, name)
+    except FileNotFoundError as exc:
+        raise Http404 from exc
+    last_modified = int(modified.timestamp())
+    etag = quote_etag(
+        hashlib.md5(
+            f"{name}:{size}:{last_modified}".encode(),
+            usedforsecurity=False,
+        ).hexdigest(),
+    )
+
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified,
+    )
+    if response is None:
+        response = _content_response(request, storage, name, size, etag, last_modified)
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Accept-Ranges"] = "bytes"
+    _patch_cache_control(response)
+    return response
+
+
+def _patch_cache_control(response):
+    patch_cache_control(
+        response,
+        private=True,
+        max_age=settings.MEDIA_DELIVERY_MAX_AGE,
+    )
+
+
+def _content_headers(response, name):
+    content_type, _ = mimetypes.guess_type(name)
+    response["Content-Type"] = content_type or "application/octet-stream"
+    response["Content-Disposition"] = content_disposition_header(
+        as_attachment=False,
+        filename=PurePosixPath(name).name,
+    )
+
+
+def _accel_response(storage, name):
+    # nginx keeps Content-Type, Content-Disposition and Cache-Control of
+    # this response and takes the rest from the internal location.
+    storage = backing_storage(storage)
+    response = HttpResponse()
+    if is_s3(storage):
+        response["X-Accel-Redirect"] = settings.MEDIA_DELIVERY_ACCEL_S3_LOCATION
+        response["X-Accel-S3-URL"] = presigned_url(
+            storage,
+            name,
+            settings.MEDIA_DELIVERY_PRESIGN_SECONDS,
+        )
+    else:
+        response[
+            "X-Accel-Redirect"
+        ] = f"{settings.MEDIA_DELIVERY_ACCEL_LOCATION}{quote(name)}"
+    _content_headers(response, name)
+    _patch_cache_control(response)
+    return response
+
+
+def _content_response(request, storage, name, size, etag, last_modified):  # noqa: PLR0913
+    try:
+        byte_range = (
+            parse_range(request.headers.get("Range"), size)
+            if _if_range_matches(request, etag, last_modified)
+            else None
+        )
+    except RangeNotSatisfiableError:
+        unsatisfiable = HttpResponse(status=416)
+        unsatisfiable["Content-Range"] = f"bytes */{size}"
+        return unsatisfiable
+
+    start, end = byte_range or (0, size - 1)
+    if request.method == "HEAD" or end < start:
+        body = ()
+    else:
+        body = read_range(
+            storage,
+            name,
+            start,
+            end,
+            settings.MEDIA_DELIVERY_CHUNK_BYTES,
+        )
+    response = StreamingHttpResponse(body, status=206 if byte_range else 200)
+    _content_headers(response, name)
+    response["Content-Length"] = str(end - start + 1)
+    if byte_range:
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return response
@@ -0,0 +1,115 @@
+"""
+Post-exam processing of a session.
+
+``SessionViewSet.end_session`` only closes the session and enqueues
+``tasks.finalize_session``, which computes the duration and the final media
+counts and byte totals, stores them as ``Session.summary``, writes a JSON
+manifest of the session's media next to it in storage and then hands the
+session to the downstream tasks in ``PROCTORING_FINALIZATION_TASKS``.
+"""
+
+import json
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Count
+from django.db.models import Max
+from django.db.models import Sum
+from django.utils import timezone
+
+from nems_proctor.proctoring.storage import session_prefix
+
+MANIFEST_NAME = "manifest.json"
+
+
+def manifest_name(session):
+    return f"{session_prefix(session)}{MANIFEST_NAME}"
+
+
+def build_summary(session):
+    photos = session.sessionphoto_set.aggregate(
+        count=Count("id"),
+        bytes=Sum("stored_bytes"),
+        last=Max("captured_at"),
+    )
+    records = (
+        session.sessionrecord_set.values("recording_type")
+        .annotate(count=Count("id"), bytes=Sum("stored_bytes"))
+        .order_by("recording_type")
+    )
+    records = {
+        row["recording_type"]: {"count": row["count"], "bytes": row["bytes"] or 0}
+        for row in records
+    }
+    duration = session.duration or (
+        session.end_time - session.start_time if session.end_time else None
+    )
+    return {
+        "duration_seconds": duration.total_seconds() if duration else None,
+        "photo_count": photos["count"],
+        "photo_bytes": photos["bytes"] or 0,
+        "record_count": sum(row["count"] for row in records.values()),
+        "record_bytes": sum(row["bytes"] for row in records.values()),
+        "records": records,
+        "last_photo_at": photos["last"].isoformat() if photos["last"] else None,
+    }
+
+
+def build_manifest(session, summary):
+    return {
+        "session": session.pk,
+        "exam": session.exam.exam_code,
+        "taker": session.taker.username,
+        "company_id": session.company_id,
+        "start_time": session.start_time.isoformat(),
+        "end_time": session.end_time.isoformat() if session.end_time else None,
+        "summary": summary,
+        "photos": [
+            {"name": name, "captured_at": captured_at.isoformat(), "bytes": size}
+            for name, captured_at, size in session.sessionphoto_set.order_by(
+                "captured_at",
+            ).values_list("photo", "captured_at", "stored_bytes")
+        ],
+        "records": [
+            {
+                "name": name,
+                "recording_type": recording_type,
+                "recorded_at": recorded_at.isoformat(),
+                "bytes": size,
+            }
+            for name, recording_type, recorded_at, size in (
+                session.sessionrecord_set.order_by("recorded_at").values_list(
+                    "file",
+                    "recording_type",
+                    "recorded_at",
+                    "stored_bytes",
+                )
+            )
+        ],
+    }
+
+
+def write_manifest(session, manifest):
+    name = manifest_name(session)
+    # Re-finalizing a session replaces its manifest instead of adding one.
+    default_storage.delete(name)
+    content = ContentFile(json.dumps(manifest, indent=2).encode())
+    return default_storage.save(name, content)
+
+
+def finalize(session):
+    """
+    Stores the duration and summary of an ended ``session`` and writes its
+    manifest. Safe to run more than once.
+    """
+    if session.end_time and not session.duration:
+        session.duration = session.end_time - session.start_time
+    summary = build_summary(session)
+    summary["manifest"] = write_manifest(
+        session,
+        build_manifest(session, summary),
+    )
+    session.summary = summary
+    session.finalized_at = timezone.now()
+    session.save(update_fields=["duration", "summary", "finalized_at"])
+    return summary
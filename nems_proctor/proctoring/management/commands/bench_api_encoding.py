@@ -0,0 +1,77 @@
+import gzip
+import json
+import time
+
+import brotli
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.urls import resolve
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+from rest_framework.test import force_authenticate
+
+from nems_proctor.core.renderers import MessagePackRenderer
+from nems_proctor.core.renderers import ORJSONRenderer
+from nems_proctor.proctoring.management.commands.bench_listing_serialization import (
+    create_photo_session,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Renders the photo listing of one large session with DRF's JSON "
+        "renderer, orjson and MessagePack, and compresses the result with "
+        "gzip and brotli. Reports encode times and payload sizes. The data "
+        "is created in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--photos", type=int, default=10_000)
+        parser.add_argument("--rounds", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            session = create_photo_session(options["photos"])
+            path = f"/api/v1/sessions/{session.pk}/photos/"
+            request = APIRequestFactory().get(path, HTTP_HOST="localhost")
+            force_authenticate(request, session.taker)
+            data = resolve(path).func(request, session_id=session.pk).data
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"Photo listing of {options['photos']:,} photos")
+        encoded = {}
+        for label, renderer in (
+            ("DRF JSON", JSONRenderer()),
+            ("orjson", ORJSONRenderer()),
+            ("MessagePack", MessagePackRenderer()),
+        ):
+            encoded[label] = self._report(
+                label,
+                options["rounds"],
+                lambda renderer=renderer: renderer.render(data),
+            )
+        if json.loads(encoded["orjson"]) != json.loads(encoded["DRF JSON"]):
+            self.stderr.write("orjson does not match DRF's JSON.")
+
+        for label in ("orjson", "MessagePack"):
+            content = encoded[label]
+            for codec, compress in (
+                ("gzip 6", lambda content: gzip.compress(content, 6, mtime=0)),
+                ("brotli 4", lambda content: brotli.compress(content, quality=4)),
+                ("brotli 11", lambda content: brotli.compress(content, quality=11)),
+            ):
+                self._report(
+                    f"{label} + {codec}",
+                    1,
+                    lambda content=content, compress=compress: compress(content),
+                )
+
+    def _report(self, label, rounds, run):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            content = run()
+        elapsed = (time.perf_counter() - started) / rounds
+        self.stdout.write(
+            f"  {label}: {elapsed * 1000:.1f} ms, {len(content) / 1024:,.0f} KiB",
+        )
+        return content
@@ -0,0 +1,86 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.utils import load_backend
+
+
+def _percentile(samples, percent):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * percent / 100))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulates requests with CONN_MAX_AGE = 0 (connect, one query, close) "
+        "from concurrent threads. It compares connection setup time and "
+        "request latency for Django's PostgreSQL backend and the pooled "
+        "backend."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--pool-size", type=int, default=8)
+
+    def handle(self, *args, **options):
+        default = connections["default"].settings_dict
+        options_without_pool = {
+            key: value for key, value in default["OPTIONS"].items() if key != "pool"
+        }
+        backends = (
+            ("django.db.backends.postgresql", options_without_pool),
+            (
+                "nems_proctor.core.postgres_pool",
+                {
+                    **options_without_pool,
+                    "pool": {
+                        "min_size": options["pool_size"],
+                        "max_size": options["pool_size"],
+                    },
+                },
+            ),
+        )
+        for engine, engine_options in backends:
+            settings_dict = {
+                **default,
+                "ENGINE": engine,
+                "CONN_MAX_AGE": 0,
+                "ATOMIC_REQUESTS": False,
+                "OPTIONS": engine_options,
+            }
+            self._run(engine, settings_dict, options)
+
+    def _run(self, engine, settings_dict, options):
+        wrapper_class = load_backend(engine).DatabaseWrapper
+        alias = f"bench-{engine}"
+
+        def request(_):
+            wrapper = wrapper_class(settings_dict, alias=alias)
+            started = time.perf_counter()
+            wrapper.ensure_connection()
+            connected = time.perf_counter()
+            with wrapper.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            wrapper.close()
+            return connected - started, time.perf_counter() - started
+
+        # Warm-up, which also opens the pool.
+        request(None)
+        total = options["threads"] * options["requests"]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["threads"]) as executor:
+            results = list(executor.map(request, range(total)))
+        elapsed = time.perf_counter() - started
+
+        setup = [connect for connect, _ in results]
+        latency = [duration for _, duration in results]
+        self.stdout.write(
+            f"{engine}: {total / elapsed:.0f} requests/s, "
+            f"connect mean {statistics.fmean(setup) * 1e3:.2f} ms, "
+            f"latency p50 {_percentile(latency, 50) * 1e3:.2f} ms, "
+            f"p99 {_percentile(latency, 99) * 1e3:.2f} ms",
+        )
@@ -0,0 +1,87 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from nems_proctor.proctoring.api.rows import RowSerializer
+from nems_proctor.proctoring.api.serializers import SessionPhotoSerializer
+from nems_proctor.proctoring.models import Exam
+from nems_proctor.proctoring.models import Session
+from nems_proctor.proctoring.models import SessionPhoto
+from nems_proctor.users.models import User
+
+
+def create_photo_session(count):
+    """A session with ``count`` scored photos, for benchmarks."""
+    user = User.objects.create(username="bench-listing-serialization")
+    exam = Exam.objects.create(exam_code="BENCH-LISTING", exam_title="Bench")
+    session = Session.objects.create(exam=exam, taker=user)
+    started = timezone.now()
+    rng = random.Random(0)
+    SessionPhoto.objects.bulk_create(
+        SessionPhoto(
+            session=session,
+            photo=f"sessions/0/{exam.pk}/{session.pk}/photos/{index:06}.jpg",
+            captured_at=started + timedelta(seconds=index * 2),
+            stored_bytes=rng.randint(20_000, 60_000),
+            motion_score=rng.random(),
+            brightness=rng.random(),
+            variance=rng.random() / 10,
+            scored_at=started,
+        )
+        for index in range(count)
+    )
+    return session
+
+
+class Command(BaseCommand):
+    help = (
+        "Lists the photos of one large session with SessionPhotoSerializer "
+        "and with the values() row path, and reports rows/sec including the "
+        "query. The data is created in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--photos", type=int, default=10_000)
+        parser.add_argument("--rounds", type=int, default=3)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            session = create_photo_session(options["photos"])
+            queryset = SessionPhoto.objects.filter(session=session).order_by("pk")
+            request = APIRequestFactory().get("/", HTTP_HOST="localhost")
+            context = {"request": request}
+            rows = RowSerializer(SessionPhotoSerializer, context)
+
+            def full():
+                return SessionPhotoSerializer(
+                    queryset.all(),
+                    many=True,
+                    context=context,
+                ).data
+
+            def values():
+                return rows.serialize(queryset.all())
+
+            if full() != values():
+                self.stderr.write("The row path does not match the serializer.")
+            for label, run in (
+                ("SessionPhotoSerializer", full),
+                ("values() rows", values),
+            ):
+                self._report(label, options, run)
+            transaction.set_rollback(True)
+
+    def _report(self, label, options, run):
+        started = time.perf_counter()
+        for _ in range(options["rounds"]):
+            run()
+        elapsed = (time.perf_counter() - started) / options["rounds"]
+        self.stdout.write(
+            f"{label}: {elapsed * 1000:.0f} ms per listing of "
+            f"{options['photos']:,} photos, {options['photos'] / elapsed:,.0f} rows/s",
+        )
@@ -0,0 +1,47 @@
+import time
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from PIL import Image
+from rest_framework import serializers
+
+from nems_proctor.proctoring.validators import validate_media
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares validation CPU per frame of DRF's ImageField (full decode) "
+        "and the header-only ingest validator."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--frames", type=int, default=200)
+        parser.add_argument("--width", type=int, default=1280)
+        parser.add_argument("--height", type=int, default=720)
+
+    def handle(self, *args, **options):
+        image_field = serializers.ImageField()
+        for image_format, name in (("JPEG", "frame.jpg"), ("PNG", "frame.png")):
+            frame = self._frame(image_format, options["width"], options["height"])
+            upload = SimpleUploadedFile(name, frame)
+            for label, validate in (
+                ("ImageField", image_field.to_internal_value),
+                ("validate_media", lambda file: validate_media(file, "photo")),
+            ):
+                started = time.process_time()
+                for _ in range(options["frames"]):
+                    upload.seek(0)
+                    validate(upload)
+                elapsed = time.process_time() - started
+                self.stdout.write(
+                    f"{image_format} {len(frame) / 1024:.0f} KB {label}: "
+                    f"{elapsed / options['frames'] * 1e6:.0f} us CPU/frame",
+                )
+
+    def _frame(self, image_format, width, height):
+        # Noise compresses badly, like a real webcam frame.
+        image = Image.effect_noise((width, height), 64).convert("RGB")
+        buffer = BytesIO()
+        image.save(buffer, image_format)
+        return buffer.getvalue()
@@ -0,0 +1,79 @@
+import time
+from io import BytesIO
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from PIL import Image
+from PIL import ImageChops
+from PIL import ImageStat
+
+from nems_proctor.proctoring.scoring import decode
+from nems_proctor.proctoring.scoring import frame_size
+from nems_proctor.proctoring.scoring import score_frames
+
+
+def _frames(count, size):
+    """JPEG webcam-sized frames: a noisy scene with a moving block."""
+    rng = np.random.default_rng(0)
+    frames = []
+    for index in range(count):
+        pixels = rng.integers(60, 120, size=(size[1], size[0], 3), dtype=np.uint8)
+        left = index * 7 % (size[0] - 160)
+        pixels[120:360, left : left + 160] = 200
+        buffer = BytesIO()
+        Image.fromarray(pixels).save(buffer, "JPEG", quality=80)
+        frames.append(buffer.getvalue())
+    return frames
+
+
+def _score_per_frame(images):
+    """Scores frame by frame with Pillow, the non-vectorized baseline."""
+    previous = None
+    for image in images:
+        stat = ImageStat.Stat(image)
+        _ = stat.mean[0], stat.var[0]
+        if previous is not None:
+            _ = ImageStat.Stat(ImageChops.difference(image, previous)).mean[0]
+        previous = image
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures photo scoring throughput in frames/sec on one core: JPEG "
+        "decoding at full and at scoring resolution, and scoring frame by "
+        "frame with Pillow against the vectorized NumPy batch."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--frames", type=int, default=500)
+        parser.add_argument("--width", type=int, default=640)
+        parser.add_argument("--height", type=int, default=480)
+
+    def handle(self, *args, **options):
+        count = options["frames"]
+        size = frame_size()
+        frames = _frames(count, (options["width"], options["height"]))
+
+        def full_decode():
+            for content in frames:
+                with Image.open(BytesIO(content)) as image:
+                    image.convert("L").resize(size, Image.Resampling.BILINEAR)
+
+        decoded: list[np.ndarray] = []
+
+        def draft_decode():
+            decoded.extend(decode(BytesIO(content), size) for content in frames)
+
+        self._report("decode, full resolution", count, full_decode)
+        self._report("decode, draft mode", count, draft_decode)
+
+        images = [Image.fromarray(frame) for frame in decoded]
+        batch = np.stack(decoded)
+        self._report("score, per frame", count, lambda: _score_per_frame(images))
+        self._report("score, NumPy batch", count, lambda: score_frames(batch))
+
+    def _report(self, label, count, run):
+        started = time.process_time()
+        run()
+        elapsed = time.process_time() - started
+        self.stdout.write(f"{label}: {count / elapsed:,.0f} frames/s per core")
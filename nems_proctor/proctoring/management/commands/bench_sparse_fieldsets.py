@@ -0,0 +1,86 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db import transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+from rest_framework.test import force_authenticate
+
+from nems_proctor.proctoring.api.serializers import SessionSerializer
+from nems_proctor.proctoring.models import Exam
+from nems_proctor.proctoring.models import Session
+from nems_proctor.users.models import User
+
+PATH = "/api/v1/sessions/"
+SPARSE_FIELDS = "id,start_time,is_active"
+
+
+class Command(BaseCommand):
+    help = (
+        "Lists sessions with and without ?fields= and ?expand= and reports "
+        "queries, payload size and time per request. The data is created in "
+        "a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sessions", type=int, default=500)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = self._sessions(options["sessions"])
+            factory = APIRequestFactory()
+
+            def unoptimized():
+                # Every field, with the slug relations looked up row by row.
+                request = factory.get(PATH, HTTP_HOST="localhost")
+                return SessionSerializer(
+                    Session.objects.filter(exam__exam_code="BENCH-SPARSE"),
+                    many=True,
+                    context={"request": request},
+                ).data
+
+            self._report("all fields, unoptimized", unoptimized)
+            for label, params in (
+                ("all fields", {}),
+                (
+                    "fields=id,start_time,is_active",
+                    {"fields": "id,start_time,is_active"},
+                ),
+                ("expand=taker,exam", {"expand": "taker,exam"}),
+            ):
+
+                def view(params=params):
+                    request = factory.get(
+                        PATH,
+                        {"exam": "BENCH-SPARSE", **params},
+                        HTTP_HOST="localhost",
+                    )
+                    force_authenticate(request, user)
+                    return resolve(PATH).func(request).data
+
+                self._report(label, view)
+            transaction.set_rollback(True)
+
+    def _sessions(self, count):
+        exam = Exam.objects.create(exam_code="BENCH-SPARSE", exam_title="Bench")
+        users = User.objects.bulk_create(
+            User(username=f"bench-sparse-{index}") for index in range(count)
+        )
+        Session.objects.bulk_create(
+            Session(exam=exam, taker=user, proctor=users[0]) for user in users
+        )
+        return users[0]
+
+    def _report(self, label, run):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            data = run()
+            elapsed = time.perf_counter() - started
+        size = len(JSONRenderer().render(data))
+        self.stdout.write(
+            f"{label}: {len(queries)} queries, {size / 1024:,.0f} KiB, "
+            f"{elapsed * 1000:.0f} ms",
+        )
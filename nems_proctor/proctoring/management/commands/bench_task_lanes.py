@@ -0,0 +1,165 @@
+import os
+import subprocess
+import sys
+import time
+
+from celery import shared_task
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from config import celery_app
+
+WORKER_READY_TIMEOUT = 30
+
+
+@shared_task(name="bench.lanes.cpu")
+def cpu_task(milliseconds):
+    """Burns ``milliseconds`` of CPU time, like a photo normalization."""
+    deadline = time.process_time() + milliseconds / 1000
+    while time.process_time() < deadline:
+        pass
+    return time.time()
+
+
+@shared_task(name="bench.lanes.io")
+def io_task(milliseconds):
+    """Waits ``milliseconds``, like a storage write or a notification."""
+    time.sleep(milliseconds / 1000)
+    return time.time()
+
+
+def _percentile(samples, percent):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * percent / 100))]
+
+
+def _mixed_backlog(cpu_tasks, io_tasks):
+    """Lane names of ``cpu_tasks`` media tasks spread among ``io_tasks``."""
+    backlog = ["io"] * io_tasks
+    step = (io_tasks + 1) / max(1, cpu_tasks)
+    for index in reversed(range(cpu_tasks)):
+        backlog.insert(min(len(backlog), int(index * step)), "media")
+    return backlog
+
+
+class Command(BaseCommand):
+    help = (
+        "Starts Celery workers and enqueues a mixed backlog of CPU-bound "
+        "(media) and I/O-bound tasks. It compares end-to-end latency per lane "
+        "when one prefork worker consumes both kinds of task with separate "
+        "media (prefetch 1) and io (high concurrency) prefork lane workers. "
+        "Needs the broker and result backend of CELERY_BROKER_URL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cpu-tasks", type=int, default=40)
+        parser.add_argument("--cpu-ms", type=int, default=100)
+        parser.add_argument("--io-tasks", type=int, default=400)
+        parser.add_argument("--io-ms", type=int, default=50)
+        parser.add_argument("--media-concurrency", type=int, default=2)
+        parser.add_argument("--io-concurrency", type=int, default=16)
+
+    def handle(self, *args, **options):
+        shared = [
+            (
+                "bench-shared",
+                ["--pool", "prefork", "-c", str(options["media_concurrency"])],
+            ),
+        ]
+        lanes = [
+            (
+                "bench-media",
+                [
+                    "--pool",
+                    "prefork",
+                    "-c",
+                    str(options["media_concurrency"]),
+                    "--prefetch-multiplier",
+                    "1",
+                    "-O",
+                    "fair",
+                ],
+            ),
+            (
+                "bench-io",
+                ["--pool", "prefork", "-c", str(options["io_concurrency"])],
+            ),
+        ]
+        self._run("shared worker", shared, "bench-shared", "bench-shared", options)
+        self._run("lane workers", lanes, "bench-media", "bench-io", options)
+
+    def _run(self, label, workers, cpu_queue, io_queue, options):  # noqa: PLR0913
+        with celery_app.connection_for_write() as connection:
+            for queue, _ in workers:
+                connection.default_channel.queue_declare(queue=queue, durable=True)
+                connection.default_channel.queue_purge(queue)
+        processes = [
+            self._start_worker(queue, arguments) for queue, arguments in workers
+        ]
+        try:
+            self._wait_for_workers([f"{queue}@bench" for queue, _ in workers])
+            # Interleave the lanes the way uploads and finalizations arrive.
+            backlog = _mixed_backlog(options["cpu_tasks"], options["io_tasks"])
+            queues = {"media": cpu_queue, "io": io_queue}
+            sent = [
+                (lane, time.time(), self._send(lane, queues[lane], options))
+                for lane in backlog
+            ]
+
+            latencies: dict[str, list[float]] = {"media": [], "io": []}
+            for lane, sent_at, result in sent:
+                latencies[lane].append(result.get(timeout=600) - sent_at)
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.wait()
+
+        for lane, samples in latencies.items():
+            self.stdout.write(
+                f"{label}, {lane} lane: {len(samples)} tasks, latency "
+                f"p50 {_percentile(samples, 50) * 1e3:.0f} ms, "
+                f"p95 {_percentile(samples, 95) * 1e3:.0f} ms, "
+                f"max {max(samples) * 1e3:.0f} ms",
+            )
+
+    def _send(self, lane, queue, options):
+        if lane == "media":
+            return cpu_task.apply_async((options["cpu_ms"],), queue=queue)
+        return io_task.apply_async((options["io_ms"],), queue=queue)
+
+    def _start_worker(self, queue, arguments):
+        command = [
+            sys.executable,
+            "-m",
+            "celery",
+            "-A",
+            "config.celery_app",
+            "worker",
+            "-Q",
+            queue,
+            "-n",
+            f"{queue}@bench",
+            "-I",
+            __name__,
+            "-l",
+            "WARNING",
+            "--without-gossip",
+            "--without-mingle",
+            *arguments,
+        ]
+        return subprocess.Popen(
+            command,  # noqa: S603
+            env=os.environ.copy(),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def _wait_for_workers(self, names):
+        deadline = time.monotonic() + WORKER_READY_TIMEOUT
+        while time.monotonic() < deadline:
+            replies = celery_app.control.ping(destination=names, timeout=0.5)
+            if len(replies) == len(names):
+                return
+        message = f"Workers {', '.join(names)} did not start."
+        raise CommandError(message)
@@ -0,0 +1,160 @@
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db import connections
+from django.db import transaction
+from django.test.utils import override_settings
+from django.urls import resolve
+from PIL import Image
+from rest_framework.test import APIRequestFactory
+from rest_framework.test import force_authenticate
+
+from nems_proctor.proctoring.models import Exam
+from nems_proctor.proctoring.models import Session
+from nems_proctor.proctoring.models import SessionPhoto
+from nems_proctor.users.models import User
+
+# Backends of other sessions on this database and how many of them are in a
+# transaction. Without the pool every connection a request holds is one
+# backend; with it, checked-out connections come from the pool statistics.
+ACTIVITY_SQL = """
+    SELECT count(*), count(*) FILTER (WHERE xact_start IS NOT NULL)
+    FROM pg_stat_activity
+    WHERE datname = current_database()
+        AND backend_type = 'client backend'
+        AND pid <> pg_backend_pid()
+"""
+
+
+def _checked_out_counter():
+    """
+    Returns a function counting the pooled connections checked out by the
+    uploads, or ``None`` without the connection pool.
+    """
+    if not hasattr(connections["default"], "pool"):
+        return None
+    from nems_proctor.core.postgres_pool.base import pool_stats
+
+    def checked_out():
+        stats = pool_stats()["default"]
+        # The sampler holds one connection itself.
+        return stats["pool_size"] - stats["pool_available"] - 1
+
+    return checked_out
+
+
+class SlowStorage(FileSystemStorage):
+    """A file system storage that takes ``latency`` seconds per write."""
+
+    def __init__(self, latency, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+
+    def save(self, name, content, max_length=None):
+        time.sleep(self.latency)
+        return super().save(name, content, max_length=max_length)
+
+
+class Command(BaseCommand):
+    help = (
+        "Sends concurrent add_photo uploads to a storage with simulated "
+        "latency and samples pg_stat_activity (and the pool statistics with "
+        "DATABASE_POOL). It compares how many database connections are held "
+        "and transactions open when the whole request is atomic (as under "
+        "ATOMIC_REQUESTS) with the non-atomic upload path."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--uploads", type=int, default=32)
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0.5,
+            help="Seconds each storage write takes.",
+        )
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(username="bench-upload-transactions")
+        exam, _ = Exam.objects.get_or_create(
+            exam_code="BENCH-UPLOADS",
+            defaults={"exam_title": "Bench"},
+        )
+        session = Session.objects.create(exam=exam, taker=user)
+        field = SessionPhoto._meta.get_field("photo")  # noqa: SLF001
+        original_storage = field.storage
+        try:
+            with (
+                tempfile.TemporaryDirectory() as root,
+                override_settings(UPLOAD_RATE_LIMITS={}, MEDIA_NORMALIZE_MODE="off"),
+            ):
+                field.storage = SlowStorage(options["latency"], location=root)
+                for label, atomic in (
+                    ("atomic request", True),
+                    ("non-atomic upload", False),
+                ):
+                    self._run(label, atomic, user, session, options)
+        finally:
+            field.storage = original_storage
+            session.delete()
+            exam.delete()
+            user.delete()
+
+    def _run(self, label, atomic, user, session, options):  # noqa: PLR0913
+        path = f"/api/v1/sessions/{session.pk}/add_photo/"
+        view = resolve(path).func
+        factory = APIRequestFactory()
+        frame = BytesIO()
+        Image.new("RGB", (640, 480), "gray").save(frame, "JPEG")
+        samples = []
+        done = threading.Event()
+        checked_out = _checked_out_counter()
+
+        def upload(_):
+            photo = SimpleUploadedFile("frame.jpg", frame.getvalue())
+            request = factory.post(path, {"photo": photo})
+            force_authenticate(request, user)
+            try:
+                if atomic:
+                    with transaction.atomic():
+                        return view(request, pk=session.pk).status_code
+                return view(request, pk=session.pk).status_code
+            finally:
+                connections.close_all()
+
+        def sample():
+            with connections["default"].cursor() as cursor:
+                while not done.is_set():
+                    cursor.execute(ACTIVITY_SQL)
+                    backends, transactions = cursor.fetchone()
+                    held = backends if checked_out is None else checked_out()
+                    samples.append((held, transactions))
+                    time.sleep(0.01)
+            connections.close_all()
+
+        # Only the uploads' connections should be counted.
+        connection.close()
+        sampler = threading.Thread(target=sample)
+        sampler.start()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["uploads"]) as executor:
+            statuses = list(executor.map(upload, range(options["uploads"])))
+        elapsed = time.perf_counter() - started
+        done.set()
+        sampler.join()
+
+        held, transactions = zip(*samples or [(0, 0)], strict=True)
+        self.stdout.write(
+            f"{label}: {statuses.count(201)}/{len(statuses)} uploads in "
+            f"{elapsed:.2f}s, connections held peak {max(held)}, "
+            f"mean {statistics.fmean(held):.1f}, open transactions peak "
+            f"{max(transactions)}, mean {statistics.fmean(transactions):.1f}",
+        )
+        connection.close()
@@ -0,0 +1,73 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from nems_proctor.proctoring.signing import S3UrlSigner
+from nems_proctor.proctoring.signing import _session
+from nems_proctor.proctoring.signing import _sigv4_client
+
+
+def _storage():
+    from storages.backends.s3 import S3Storage
+
+    return S3Storage(
+        bucket_name="media-bucket",
+        location="media",
+        access_key="AKIAEXAMPLE",
+        secret_key="secret",  # noqa: S106
+        region_name="eu-west-1",
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the signing overhead of a photo listing: boto3 presigning "
+        "every URL against the batch signer with a cold and a warm cache. "
+        "Needs django-storages and boto3 (production requirements)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--photos", type=int, default=1000)
+        parser.add_argument("--rounds", type=int, default=5)
+
+    @override_settings(MEDIA_SIGNED_URLS=True)
+    def handle(self, *args, **options):
+        storage = _storage()
+        count = options["photos"]
+        rounds = options["rounds"]
+        names = [f"sessions/1/2/3/photo-{index:06}.jpg" for index in range(count)]
+        client = _sigv4_client(_session(storage), storage)
+
+        def presign_each():
+            for name in names:
+                client.generate_presigned_url(
+                    "get_object",
+                    Params={"Bucket": storage.bucket_name, "Key": f"media/{name}"},
+                    ExpiresIn=3600,
+                )
+
+        signer = S3UrlSigner(storage)
+        now = time.time()
+
+        def batch_cold():
+            # Every round starts a new window, so nothing is cached.
+            signer.window_start = None
+            signer.sign(names, now=now)
+
+        def batch_warm():
+            signer.sign(names, now=now)
+
+        self._report("boto3, per URL", count, rounds, presign_each)
+        self._report("batch signer, cold cache", count, rounds, batch_cold)
+        self._report("batch signer, warm cache", count, rounds, batch_warm)
+
+    def _report(self, label, count, rounds, run):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            run()
+        elapsed = (time.perf_counter() - started) / rounds
+        self.stdout.write(
+            f"{label}: {elapsed * 1000:.1f} ms per listing of {count} photos, "
+            f"{elapsed / count * 1e6:.1f} us per URL",
+        )
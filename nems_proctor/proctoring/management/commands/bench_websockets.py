@@ -0,0 +1,206 @@
+import asyncio
+import multiprocessing
+import resource
+import statistics
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from config.workers import WebSocketUvicornWorker
+
+LAG_INTERVAL = 0.05
+
+
+def _rss_bytes(pid):
+    for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1]) * 1024
+    return 0
+
+
+def _percentile(samples, percent):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * percent / 100))]
+
+
+def _serve(port, config_kwargs, measuring, stop, results):
+    """
+    Runs ``config.asgi`` under uvicorn in this (child) process and samples
+    how late its event loop wakes up while ``measuring`` is set.
+    """
+    import uvicorn
+
+    async def main():
+        config = uvicorn.Config(
+            "config.asgi:application",
+            port=port,
+            log_level="warning",
+            backlog=4096,
+            **config_kwargs,
+        )
+        server = uvicorn.Server(config)
+        serving = asyncio.create_task(server.serve())
+        lags = []
+        while not stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(LAG_INTERVAL)
+            if measuring.is_set():
+                lags.append(time.perf_counter() - started - LAG_INTERVAL)
+        server.should_exit = True
+        await serving
+        results.put(lags)
+
+    asyncio.run(main())
+
+
+class Command(BaseCommand):
+    help = (
+        "Opens many WebSocket connections against config.asgi served by "
+        "uvicorn in a child process, pings on each of them periodically and "
+        "reports server memory per connection, event-loop lag and "
+        "round-trip latency. Client and server share this host, so each "
+        "connection costs two file descriptors."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--connections", type=int, default=5000)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Seconds between pings on each connection.",
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=30.0,
+            help="Seconds to measure once all connections are open.",
+        )
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument(
+            "--worker",
+            choices=["default", "websocket"],
+            default="default",
+            help=(
+                "Serve with uvicorn's defaults or with the settings of the "
+                "dedicated WebSocket workers (config.workers)."
+            ),
+        )
+        parser.add_argument("--connect-concurrency", type=int, default=200)
+
+    def handle(self, *args, **options):
+        # Raise the soft descriptor limit as far as the hard limit allows.
+        _, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+        context = multiprocessing.get_context("spawn")
+        measuring, stop, results = context.Event(), context.Event(), context.Queue()
+        config_kwargs = {"lifespan": "off"}
+        if options["worker"] == "websocket":
+            config_kwargs = WebSocketUvicornWorker.CONFIG_KWARGS
+        server = context.Process(
+            target=_serve,
+            args=(options["port"], config_kwargs, measuring, stop, results),
+        )
+        server.start()
+        try:
+            report = asyncio.run(self._run(server.pid, measuring, options))
+        finally:
+            stop.set()
+            lags = results.get(timeout=30)
+            server.join()
+
+        self.stdout.write(
+            f"connections: {report['open']} open, {report['failed']} failed",
+        )
+        self.stdout.write(
+            f"server RSS: {report['rss_before'] / 2**20:.1f} MB idle, "
+            f"{report['rss_after'] / 2**20:.1f} MB loaded, "
+            f"{report['per_connection'] / 1024:.1f} KB/connection",
+        )
+        self.stdout.write(
+            f"event-loop lag: p50 {_percentile(lags, 50) * 1e3:.1f} ms, "
+            f"p99 {_percentile(lags, 99) * 1e3:.1f} ms, "
+            f"max {max(lags, default=0) * 1e3:.1f} ms",
+        )
+        latencies = report["latencies"]
+        self.stdout.write(
+            f"round trip ({len(latencies)} pings, "
+            f"{report['open'] / options['interval']:.0f}/s): "
+            f"p50 {_percentile(latencies, 50) * 1e3:.1f} ms, "
+            f"p99 {_percentile(latencies, 99) * 1e3:.1f} ms, "
+            f"mean {statistics.fmean(latencies or [0]) * 1e3:.1f} ms",
+        )
+
+    async def _run(self, server_pid, measuring, options):
+        import websockets
+
+        url = f"ws://127.0.0.1:{options['port']}/"
+        await self._wait_for_server(url)
+        rss_before = _rss_bytes(server_pid)
+
+        gate = asyncio.Semaphore(options["connect_concurrency"])
+
+        async def connect():
+            async with gate:
+                try:
+                    return await websockets.connect(url, ping_interval=None)
+                except OSError:
+                    return None
+
+        sockets = await asyncio.gather(
+            *(connect() for _ in range(options["connections"])),
+        )
+        failed = sockets.count(None)
+        sockets = [socket for socket in sockets if socket is not None]
+        await asyncio.sleep(1)
+        rss_after = _rss_bytes(server_pid)
+
+        latencies = []
+        deadline = time.perf_counter() + options["duration"]
+
+        async def ping(socket, offset):
+            # Spread the pings evenly over the interval.
+            await asyncio.sleep(offset)
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                await socket.send("ping")
+                await socket.recv()
+                latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(options["interval"])
+
+        measuring.set()
+        interval = options["interval"]
+        await asyncio.gather(
+            *(
+                ping(socket, index * interval / len(sockets))
+                for index, socket in enumerate(sockets)
+            ),
+        )
+        measuring.clear()
+        await asyncio.gather(*(socket.close() for socket in sockets))
+        return {
+            "open": len(sockets),
+            "failed": failed,
+            "rss_before": rss_before,
+            "rss_after": rss_after,
+            "per_connection": (rss_after - rss_before) / max(len(sockets), 1),
+            "latencies": latencies,
+        }
+
+    async def _wait_for_server(self, url):
+        import websockets
+
+        for _ in range(100):
+            try:
+                async with websockets.connect(url) as socket:
+                    await socket.send("ping")
+                    await socket.recv()
+                    return
+            except OSError:
+                await asyncio.sleep(0.1)
+        message = f"No WebSocket server answered at {url}."
+        raise RuntimeError(message)
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.db.models import F
+from django.db.models import Sum
+
+from nems_proctor.proctoring.models import MediaBlob
+from nems_proctor.proctoring.models import SessionPhoto
+from nems_proctor.proctoring.models import SessionRecord
+
+
+class Command(BaseCommand):
+    help = (
+        "Reports original vs. stored media bytes per company, and the bytes "
+        "saved by content-addressed deduplication."
+    )
+
+    def handle(self, *args, **options):
+        totals: dict[int, dict[str, int]] = {}
+        normalized = (
+            SessionPhoto.objects.filter(original_bytes__isnull=False),
+            SessionRecord.objects.filter(original_bytes__isnull=False),
+        )
+        for queryset in normalized:
+            rows = queryset.values("company_id").annotate(
+                files=Count("id"),
+                original=Sum("original_bytes"),
+                stored=Sum("stored_bytes"),
+            )
+            for row in rows:
+                total = totals.setdefault(
+                    row["company_id"],
+                    {"files": 0, "original": 0, "stored": 0},
+                )
+                total["files"] += row["files"]
+                total["original"] += row["original"] or 0
+                total["stored"] += row["stored"] or 0
+
+        self.stdout.write(
+            f"{'company':>10} {'files':>10} {'original MB':>12} "
+            f"{'stored MB':>12} {'saved':>7}",
+        )
+        for company_id, total in sorted(totals.items(), key=lambda item: str(item[0])):
+            saved = 1 - total["stored"] / total["original"] if total["original"] else 0
+            self.stdout.write(
+                f"{company_id!s:>10} {total['files']:>10} "
+                f"{total['original'] / 1e6:>12.1f} {total['stored'] / 1e6:>12.1f} "
+                f"{saved:>7.1%}",
+            )
+
+        dedup = MediaBlob.objects.aggregate(
+            blobs=Count("sha256"),
+            stored=Sum("size"),
+            saved=Sum(F("size") * F("dedup_hits")),
+        )
+        self.stdout.write(
+            f"Deduplication: {dedup['blobs']} unique objects, "
+            f"{(dedup['stored'] or 0) / 1e6:.1f} MB stored, "
+            f"{(dedup['saved'] or 0) / 1e6:.1f} MB of duplicate uploads skipped.",
+        )
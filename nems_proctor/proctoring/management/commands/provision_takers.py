@@ -0,0 +1,28 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from nems_proctor.proctoring.resolvers import provision_users
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates all missing takers of an exam roster in one statement. "
+        "Usernames are read one per line from the given file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("roster", type=Path)
+        parser.add_argument("--company-id", type=int, default=None)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        with options["roster"].open() as roster:
+            usernames = [line.strip() for line in roster if line.strip()]
+
+        batch_size = options["batch_size"]
+        total = 0
+        for start in range(0, len(usernames), batch_size):
+            batch = usernames[start : start + batch_size]
+            total += len(provision_users(batch, company_id=options["company_id"]))
+        self.stdout.write(self.style.SUCCESS(f"{total} takers provisioned."))
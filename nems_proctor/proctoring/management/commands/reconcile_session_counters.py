@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from nems_proctor.proctoring.counters import reconcile
+from nems_proctor.proctoring.models import Session
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the photo/record counts, byte totals and last media time "
+        "stored on sessions and fixes the ones that drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--active-only",
+            action="store_true",
+            help="Only reconcile sessions that are still active.",
+        )
+
+    def handle(self, *args, **options):
+        sessions = Session.objects.all()
+        if options["active_only"]:
+            sessions = sessions.filter(is_active=True)
+        fixed = reconcile(sessions, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"{fixed} sessions reconciled."))
@@ -0,0 +1,87 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.utils import timezone
+
+from nems_proctor.proctoring.models import SessionPhoto
+from nems_proctor.proctoring.models import SessionRecord
+from nems_proctor.proctoring.storage import S3_BATCH_SIZE
+from nems_proctor.proctoring.storage import ContentAddressedStorage
+from nems_proctor.proctoring.storage import copy_name
+from nems_proctor.proctoring.storage import delete_names
+from nems_proctor.proctoring.storage import media_storage
+from nems_proctor.proctoring.storage import session_media_key
+
+# model, file field, key kind, timestamp field
+MEDIA = (
+    (SessionPhoto, "photo", "photos", "captured_at"),
+    (SessionRecord, "file", "recordings", "recorded_at"),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves session media stored under the flat photos/ and recordings/ "
+        "prefixes to the sessions/<company>/<exam>/<session>/<date>/ layout. "
+        "Objects are copied in parallel, the rows updated per batch and the "
+        "old objects deleted afterwards; the command can be re-run safely."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=S3_BATCH_SIZE)
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument(
+            "--keep-old",
+            action="store_true",
+            help="Do not delete the objects under their old keys.",
+        )
+
+    def handle(self, *args, **options):
+        storage = media_storage()
+        if isinstance(storage, ContentAddressedStorage):
+            message = "Content-addressed media keys are derived from their content."
+            raise CommandError(message)
+
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            for model, field, kind, timestamp in MEDIA:
+                moved = self.rekey(model, field, kind, timestamp, executor, options)
+                self.stdout.write(f"{model.__name__}: {moved} files re-keyed.")
+        self.stdout.write(self.style.SUCCESS("Done."))
+
+    def rekey(self, model, field, kind, timestamp, executor, options):  # noqa: PLR0913
+        storage = media_storage()
+        queryset = (
+            model.objects.exclude(**{field: ""})
+            .exclude(**{f"{field}__startswith": "sessions/"})
+            .select_related("session")
+            .order_by("pk")
+        )
+
+        def copy(row):
+            source = getattr(row, field).name
+            target = session_media_key(
+                row.session,
+                kind,
+                source,
+                day=timezone.localdate(getattr(row, timestamp)),
+            )
+            return source, copy_name(storage, source, target)
+
+        moved = 0
+        last_pk = 0
+        while batch := list(queryset.filter(pk__gt=last_pk)[: options["batch_size"]]):
+            last_pk = batch[-1].pk
+            old_names = []
+            for row, (source, target) in zip(
+                batch,
+                executor.map(copy, batch),
+                strict=True,
+            ):
+                getattr(row, field).name = target
+                old_names.append(source)
+            model.objects.bulk_update(batch, [field])
+            if not options["keep_old"]:
+                delete_names(storage, old_names)
+            moved += len(batch)
+        return moved
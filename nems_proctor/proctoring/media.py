@@ -0,0 +1,102 @@
+"""
+Ingest-time normalization of session images.
+
+Webcam frames and screenshots arrive as whatever the client produced (raw
+PNG screenshots, full-resolution JPEGs with EXIF). When enabled, they are
+downscaled to ``MEDIA_NORMALIZE_MAX_DIMENSION``, stripped of metadata and
+re-encoded as ``MEDIA_NORMALIZE_FORMAT`` either before they are stored
+(``inline``) or by a Celery task after the upload has been committed
+(``deferred``). Both the original and the stored size are kept on the row.
+"""
+
+from io import BytesIO
+from pathlib import PurePath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image
+from PIL import ImageOps
+from PIL import UnidentifiedImageError
+
+from nems_proctor.proctoring import counters
+
+OFF = "off"
+INLINE = "inline"
+DEFERRED = "deferred"
+
+EXTENSIONS = {"WEBP": "webp", "JPEG": "jpg", "PNG": "png"}
+
+
+def normalize_image(content):
+    """
+    Returns the normalized image as a ``ContentFile`` (unnamed), or ``None``
+    when ``content`` is not a decodable image or re-encoding would not make
+    it any smaller.
+    """
+    max_dimension = settings.MEDIA_NORMALIZE_MAX_DIMENSION
+    image_format = settings.MEDIA_NORMALIZE_FORMAT
+    content.seek(0)
+    try:
+        image = Image.open(content)
+        # Lets the JPEG decoder downscale by a power of two while decoding,
+        # which is much cheaper than decoding at full size.
+        image.draft("RGB", (max_dimension, max_dimension))
+        image = ImageOps.exif_transpose(image)
+    except (UnidentifiedImageError, OSError):
+        return None
+
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+
+    buffer = BytesIO()
+    # No ``exif``/``icc_profile`` is passed on, so all metadata is dropped.
+    image.save(buffer, image_format, quality=settings.MEDIA_NORMALIZE_QUALITY)
+    if buffer.tell() >= content.size:
+        return None
+    return ContentFile(buffer.getvalue())
+
+
+def normalized_name(name):
+    extension = EXTENSIONS[settings.MEDIA_NORMALIZE_FORMAT]
+    return str(PurePath(name).with_suffix(f".{extension}").name)
+
+
+def prepare_upload(upload):
+    """
+    Returns ``(file, original_bytes)`` for a freshly uploaded image: the
+    normalized file in ``inline`` mode when that is smaller, the upload
+    itself otherwise.
+    """
+    original_bytes = upload.size
+    if settings.MEDIA_NORMALIZE_MODE == INLINE:
+        normalized = normalize_image(upload)
+        if normalized is not None:
+            normalized.name = normalized_name(upload.name)
+            return normalized, original_bytes
+    upload.seek(0)
+    return upload, original_bytes
+
+
+def normalize_stored(instance, field_name):
+    """
+    Re-encodes the image already stored in ``instance.<field_name>`` and
+    replaces it, for ``deferred`` mode. Returns whether anything changed.
+    """
+    field_file = getattr(instance, field_name)
+    with field_file.open("rb") as content:
+        normalized = normalize_image(content)
+    if normalized is None:
+        return False
+
+    old_name = field_file.name
+    old_bytes = instance.stored_bytes or 0
+    field_file.save(normalized_name(old_name), normalized, save=False)
+    instance.stored_bytes = field_file.size
+    instance.save(update_fields=[field_name, "stored_bytes"])
+    counters.bytes_changed(instance.session_id, instance.stored_bytes - old_bytes)
+    # Storages that overwrite (S3's default) reuse the key when the format
+    # is unchanged; the "old" file is then the new one.
+    if field_file.name != old_name:
+        field_file.storage.delete(old_name)
+    return True
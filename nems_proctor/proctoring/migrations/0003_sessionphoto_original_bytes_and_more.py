@@ -0,0 +1,39 @@
+# Generated by Django 4.2.16 on 2026-10-19 06:16
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proctoring', '0002_exam_company_id_session_company_id_session_duration_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sessionphoto',
+            name='original_bytes',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='sessionphoto',
+            name='stored_bytes',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='sessionrecord',
+            name='original_bytes',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='sessionrecord',
+            name='stored_bytes',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='sessionrecord',
+            name='file',
+            field=models.FileField(upload_to='recordings/', validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['mp4', 'webm', 'ogg', 'jpg', 'png', 'webp'])]),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-19 06:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proctoring', '0003_sessionphoto_original_bytes_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sessionrecord',
+            name='file',
+            field=models.FileField(upload_to='recordings/'),
+        ),
+    ]
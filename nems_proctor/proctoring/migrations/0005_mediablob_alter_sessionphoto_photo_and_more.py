@@ -0,0 +1,39 @@
+# Generated by Django 4.2.16 on 2026-10-19 06:20
+
+from django.db import migrations, models
+import nems_proctor.proctoring.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proctoring', '0004_alter_sessionrecord_file'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('size', models.PositiveBigIntegerField()),
+                ('refcount', models.PositiveIntegerField(default=0)),
+                ('dedup_hits', models.PositiveIntegerField(default=0, help_text='Number of uploads that reused this content instead of storing it.')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Media Blob',
+                'verbose_name_plural': 'Media Blobs',
+            },
+        ),
+        migrations.AlterField(
+            model_name='sessionphoto',
+            name='photo',
+            field=models.ImageField(storage=nems_proctor.proctoring.storage.media_storage, upload_to='photos/'),
+        ),
+        migrations.AlterField(
+            model_name='sessionrecord',
+            name='file',
+            field=models.FileField(storage=nems_proctor.proctoring.storage.media_storage, upload_to='recordings/'),
+        ),
+    ]
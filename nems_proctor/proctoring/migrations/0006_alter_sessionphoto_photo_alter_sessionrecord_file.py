@@ -0,0 +1,24 @@
+# Generated by Django 4.2.16 on 2026-10-19 06:22
+
+from django.db import migrations, models
+import nems_proctor.proctoring.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proctoring', '0005_mediablob_alter_sessionphoto_photo_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sessionphoto',
+            name='photo',
+            field=models.ImageField(storage=nems_proctor.proctoring.storage.media_storage, upload_to=nems_proctor.proctoring.storage.session_photo_path),
+        ),
+        migrations.AlterField(
+            model_name='sessionrecord',
+            name='file',
+            field=models.FileField(storage=nems_proctor.proctoring.storage.media_storage, upload_to=nems_proctor.proctoring.storage.session_record_path),
+        ),
+    ]
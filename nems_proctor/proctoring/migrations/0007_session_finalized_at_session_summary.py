@@ -0,0 +1,23 @@
+# Generated by Django 4.2.16 on 2026-10-19 06:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proctoring', '0006_alter_sessionphoto_photo_alter_sessionrecord_file'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='finalized_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='session',
+            name='summary',
+            field=models.JSONField(blank=True, help_text='Media counts and byte totals computed when the session ends.', null=True),
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 4.2.16 on 2026-10-19 06:25
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest
+
+
+def _backfill_stored_bytes(model, field_name):
+    # Rows saved before 0003 have no stored_bytes; take the size of the
+    # file. Missing or unreadable files stay unset.
+    rows = model.objects.filter(stored_bytes__isnull=True).exclude(**{field_name: ""})
+    for media in rows.only("pk", field_name).iterator():
+        field_file = getattr(media, field_name)
+        try:
+            media.stored_bytes = field_file.storage.size(field_file.name)
+        except Exception:
+            continue
+        media.save(update_fields=["stored_bytes"])
+
+
+def _aggregate(model, expression):
+    return Subquery(
+        model.objects.filter(session=OuterRef("pk"))
+        .order_by()
+        .values("session")
+        .annotate(value=expression)
+        .values("value"),
+    )
+
+
+def _total(model, expression):
+    return Coalesce(_aggregate(model, expression), 0)
+
+
+def backfill_counters(apps, schema_editor):
+    Session = apps.get_model("proctoring", "Session")
+    SessionPhoto = apps.get_model("proctoring", "SessionPhoto")
+    SessionRecord = apps.get_model("proctoring", "SessionRecord")
+    _backfill_stored_bytes(SessionPhoto, "photo")
+    _backfill_stored_bytes(SessionRecord, "file")
+    # GREATEST ignores NULLs, i.e. sessions with only photos or records.
+    Session.objects.update(
+        photo_count=_total(SessionPhoto, Count("id")),
+        record_count=_total(SessionRecord, Count("id")),
+        total_bytes=_total(SessionPhoto, Sum("stored_bytes"))
+        + _total(SessionRecord, Sum("stored_bytes")),
+        last_media_at=Greatest(
+            _aggregate(SessionPhoto, Max("captured_at")),
+            _aggregate(SessionRecord, Max("recorded_at")),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proctoring', '0007_session_finalized_at_session_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='last_media_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='session',
+            name='photo_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='session',
+            name='record_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='session',
+            name='total_bytes',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.16 on 2026-10-19 06:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proctoring', '0008_session_last_media_at_session_photo_count_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sessionphoto',
+            name='brightness',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='sessionphoto',
+            name='motion_score',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='sessionphoto',
+            name='scored_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='sessionphoto',
+            name='variance',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-19 06:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proctoring', '0009_sessionphoto_brightness_sessionphoto_motion_score_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sessionrecord',
+            name='activity',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
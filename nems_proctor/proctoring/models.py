@@ -1,10 +1,12 @@
 from django.conf import settings
-from django.core.exceptions import ValidationError
-from django.core.validators import FileExtensionValidator
 from django.db import models
 from django.utils import timezone
 
 from nems_proctor.core.models import BaseModel
+from nems_proctor.proctoring.storage import media_storage
+from nems_proctor.proctoring.storage import session_photo_path
+from nems_proctor.proctoring.storage import session_record_path
+from nems_proctor.proctoring.validators import validate_media
 
 
 class RecordingType(models.TextChoices):
@@ -80,6 +82,17 @@ class Session(BaseModel):
     end_time = models.DateTimeField(null=True, blank=True)
     duration = models.DurationField(blank=True, null=True)
     is_active = models.BooleanField(default=True)
+    summary = models.JSONField(
+        null=True,
+        blank=True,
+        help_text="Media counts and byte totals computed when the session ends.",
+    )
+    finalized_at = models.DateTimeField(null=True, blank=True)
+    # Maintained by nems_proctor.proctoring.counters.
+    photo_count = models.PositiveIntegerField(default=0, editable=False)
+    record_count = models.PositiveIntegerField(default=0, editable=False)
+    total_bytes = models.PositiveBigIntegerField(default=0, editable=False)
+    last_media_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     def __str__(self):
         """
@@ -125,44 +138,35 @@ class SessionRecord(BaseModel):
         max_length=10,
         choices=RecordingType.choices,
     )
-    file = models.FileField(
-        upload_to="recordings/",
-        validators=[
-            FileExtensionValidator(
-                allowed_extensions=["mp4", "webm", "ogg", "jpg", "png"],
-            ),
-        ],
-    )
+    file = models.FileField(upload_to=session_record_path, storage=media_storage)
     recorded_at = models.DateTimeField(auto_now_add=True)
+    original_bytes = models.PositiveBigIntegerField(null=True, blank=True)
+    stored_bytes = models.PositiveBigIntegerField(null=True, blank=True)
+    # Loudness envelope and voice segments of audio recordings, see
+    # nems_proctor.proctoring.audio.
+    activity = models.JSONField(null=True, blank=True, editable=False)
 
     def __str__(self):
         """
         Returns a string representation of the recording,
         including its type and associated session ID.
         """
-        return f"{self.recording_type} recording for session {self.session.id}"
+        return f"{self.recording_type} recording for session {self.session_id}"
 
     def clean(self):
         """
-        Validates the file extension based on the recording type.
-        Raises a ValidationError if the file's extension is not allowed
-        for the recording type.
-        """
-        valid_extensions = {
-            RecordingType.VIDEO: ["mp4", "webm", "ogg"],
-            RecordingType.AUDIO: ["mp3", "wav", "ogg"],
-            RecordingType.SCREENSHOT: ["jpg", "png"],
-        }
-        extension = self.file.name.split(".")[-1].lower()  # Get file extension
-        if extension not in valid_extensions[self.recording_type]:
-            error_message = f"""
-                Invalid file extension for {self.recording_type} recording type.
-                Allowed extensions: {valid_extensions[self.recording_type]}."""
-            raise ValidationError(error_message)
+        Validates that the file's content matches the recording type.
+        Raises a ValidationError if the file's format, extension or size is
+        not allowed for the recording type.
+        """
+        if self.file and self.recording_type in RecordingType.values:
+            validate_media(self.file, self.recording_type)
 
     def save(self, *args, **kwargs):
         if not self.company_id:
             self.company_id = self.session.taker.company_id
+        if self.stored_bytes is None and self.file:
+            self.stored_bytes = self.file.size
         super().save(*args, **kwargs)
 
 
@@ -173,17 +177,59 @@ class SessionPhoto(BaseModel):
     """
 
     session = models.ForeignKey("Session", on_delete=models.CASCADE)
-    photo = models.ImageField(upload_to="photos/")
+    photo = models.ImageField(upload_to=session_photo_path, storage=media_storage)
     captured_at = models.DateTimeField(auto_now_add=True)
+    original_bytes = models.PositiveBigIntegerField(null=True, blank=True)
+    stored_bytes = models.PositiveBigIntegerField(null=True, blank=True)
+    # Frame scores in [0, 1], computed in batches by
+    # nems_proctor.proctoring.scoring.
+    motion_score = models.FloatField(null=True, blank=True, editable=False)
+    brightness = models.FloatField(null=True, blank=True, editable=False)
+    variance = models.FloatField(null=True, blank=True, editable=False)
+    scored_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     def __str__(self):
         """
         Returns a string representation of the photo,
         including session ID and capture time.
         """
-        return f"Photo for session {self.session.id} captured at {self.captured_at}"
+        return f"Photo for session {self.session_id} captured at {self.captured_at}"
+
+    def clean(self):
+        """
+        Validates the photo's format, extension, size and dimensions.
+        """
+        if self.photo:
+            validate_media(self.photo, "photo")
 
     def save(self, *args, **kwargs):
         if not self.company_id:
             self.company_id = self.session.taker.company_id
+        if self.stored_bytes is None and self.photo:
+            self.stored_bytes = self.photo.size
         super().save(*args, **kwargs)
+
+
+class MediaBlob(models.Model):
+    """
+    A unique piece of media content stored by ``ContentAddressedStorage``,
+    keyed by the SHA-256 of its bytes and shared by every file that has the
+    same content.
+    """
+
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    name = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    refcount = models.PositiveIntegerField(default=0)
+    dedup_hits = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of uploads that reused this content instead of storing it.",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Media Blob"
+        verbose_name_plural = "Media Blobs"
+
+    def __str__(self):
+        return f"{self.sha256} ({self.refcount} references)"
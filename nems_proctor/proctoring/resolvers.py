@@ -0,0 +1,141 @@
+"""
+Cached slug -> row resolution for the session API.
+
+``start_session`` names its taker, proctor and exam by username / exam code.
+Resolving those on every call costs one query per field, and at exam start
+thousands of takers arrive at once. The helpers below keep the
+``(id, company_id)`` of each slug in the shared cache and hand out unsaved
+model stubs carrying just those columns, which is all a ``Session`` insert
+needs.
+"""
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+
+from nems_proctor.proctoring.models import Exam
+from nems_proctor.users.models import User
+
+USER_KEY = "resolve:user:{}"
+USER_ID_KEY = "resolve:user-id:{}"
+EXAM_KEY = "resolve:exam:{}"
+EXAM_ID_KEY = "resolve:exam-id:{}"
+
+
+def _user_stub(username, row):
+    pk, company_id, is_active = row
+    return User(pk=pk, username=username, company_id=company_id, is_active=is_active)
+
+
+def _cache_users(rows):
+    timeout = settings.PROCTORING_RESOLVER_CACHE_TIMEOUT
+    values = {}
+    for pk, username, company_id, is_active in rows:
+        values[USER_KEY.format(username)] = (pk, company_id, is_active)
+        values[USER_ID_KEY.format(pk)] = username
+    cache.set_many(values, timeout)
+
+
+def resolve_users(usernames):
+    """
+    Returns ``{username: User}`` for every username that exists, using at
+    most one query for all cache misses.
+    """
+    usernames = {username for username in usernames if username}
+    if not usernames:
+        return {}
+    cached = cache.get_many([USER_KEY.format(username) for username in usernames])
+    users = {}
+    missing = []
+    for username in usernames:
+        row = cached.get(USER_KEY.format(username))
+        if row is None:
+            missing.append(username)
+        else:
+            users[username] = _user_stub(username, row)
+    if missing:
+        rows = list(
+            User.objects.filter(username__in=missing).values_list(
+                "pk",
+                "username",
+                "company_id",
+                "is_active",
+            ),
+        )
+        _cache_users(rows)
+        for pk, username, company_id, is_active in rows:
+            users[username] = _user_stub(username, (pk, company_id, is_active))
+    return users
+
+
+def resolve_user(username):
+    return resolve_users([username]).get(username)
+
+
+def provision_users(usernames, company_id=None):
+    """
+    Creates every missing user in ``usernames`` with a single INSERT and
+    returns ``{username: User}`` for all of them.
+
+    Conflicting concurrent inserts are ignored by the database instead of
+    raising ``IntegrityError``, so simultaneous first requests for the same
+    taker are safe.
+    """
+    usernames = {username for username in usernames if username}
+    users = resolve_users(usernames)
+    missing = usernames - users.keys()
+    if missing:
+        User.objects.bulk_create(
+            [
+                User(
+                    username=username,
+                    company_id=company_id,
+                    password=make_password(None),
+                )
+                for username in sorted(missing)
+            ],
+            ignore_conflicts=True,
+        )
+        users.update(resolve_users(missing))
+    return users
+
+
+def resolve_exam(exam_code):
+    """
+    Returns an ``Exam`` stub for ``exam_code`` or ``None``.
+    """
+    if not exam_code:
+        return None
+    row = cache.get(EXAM_KEY.format(exam_code))
+    if row is None:
+        row = (
+            Exam.objects.filter(exam_code=exam_code)
+            .values_list("pk", "company_id")
+            .first()
+        )
+        if row is None:
+            return None
+        cache.set_many(
+            {EXAM_KEY.format(exam_code): row, EXAM_ID_KEY.format(row[0]): exam_code},
+            settings.PROCTORING_RESOLVER_CACHE_TIMEOUT,
+        )
+    pk, company_id = row
+    return Exam(pk=pk, exam_code=exam_code, company_id=company_id)
+
+
+def invalidate_user(user):
+    # The user may have been renamed, so also drop whatever username was
+    # cached for this id.
+    keys = [USER_KEY.format(user.username), USER_ID_KEY.format(user.pk)]
+    previous = cache.get(USER_ID_KEY.format(user.pk))
+    if previous:
+        keys.append(USER_KEY.format(previous))
+    cache.delete_many(keys)
+
+
+def invalidate_exam(exam):
+    keys = [EXAM_KEY.format(exam.exam_code), EXAM_ID_KEY.format(exam.pk)]
+    previous = cache.get(EXAM_ID_KEY.format(exam.pk))
+    if previous:
+        keys.append(EXAM_KEY.format(previous))
+    cache.delete_many(keys)
@@ -0,0 +1,125 @@
+"""
+Automatic scores for session photos, so proctors can jump to the frames
+worth a look instead of paging through all of them.
+
+Frames are decoded as small grayscale images (JPEG frames are scaled down
+while decoding) and stacked into one array per batch. Each score is then a
+single vectorized reduction over the batch:
+
+* ``brightness``: mean luminance. Near 0 when the camera is covered or the
+  room is dark.
+* ``variance``: luminance variance. Near 0 for blank, covered or frozen
+  frames, whatever their brightness.
+* ``motion_score``: mean absolute difference from the previous frame. High
+  on scene changes, such as the taker leaving or someone else stepping in.
+
+All scores are in [0, 1]. A session's first frame has no motion score.
+Frames that cannot be decoded are marked as scored without values, so they
+are not retried.
+"""
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image
+from PIL import UnidentifiedImageError
+
+SCORE_FIELDS = ("motion_score", "brightness", "variance")
+
+
+def frame_size():
+    width = settings.PROCTORING_SCORING_FRAME_WIDTH
+    return width, width * 3 // 4
+
+
+def decode(content, size):
+    """
+    Returns the image in ``content`` as a ``uint8`` grayscale array of
+    ``size`` (width, height), or ``None`` if it cannot be decoded.
+    """
+    try:
+        with Image.open(content) as image:
+            image.draft("L", size)
+            frame = image.convert("L").resize(size, Image.Resampling.BILINEAR)
+    except (UnidentifiedImageError, OSError, ValueError):
+        return None
+    return np.asarray(frame, dtype=np.uint8)
+
+
+def _decode_photo(photo, size):
+    try:
+        with photo.photo.open("rb") as content:
+            return decode(content, size)
+    except OSError:
+        return None
+
+
+def score_frames(frames, previous=None):
+    """
+    Scores a batch of frames, an ``(n, height, width)`` ``uint8`` array in
+    capture order. ``previous`` is the frame before the batch, if any.
+    Returns ``{field: array of n floats}``; ``motion_score`` of the first
+    frame is NaN without ``previous``.
+    """
+    frames = frames.astype(np.float32) / 255
+    first = frames[:1] if previous is None else previous[np.newaxis] / 255
+    reference = np.concatenate((first, frames[:-1]))
+    motion = np.abs(frames - reference).mean(axis=(1, 2))
+    if previous is None:
+        motion[0] = np.nan
+    return {
+        "motion_score": motion,
+        "brightness": frames.mean(axis=(1, 2)),
+        "variance": frames.var(axis=(1, 2)),
+    }
+
+
+def score_session(session, batch_size=None):
+    """
+    Scores the not yet scored photos of ``session`` in batches of
+    ``batch_size`` frames and returns how many were scored.
+    """
+    from nems_proctor.proctoring.models import SessionPhoto
+
+    batch_size = batch_size or settings.PROCTORING_SCORING_BATCH_SIZE
+    size = frame_size()
+    photos = SessionPhoto.objects.filter(session=session).order_by("captured_at", "pk")
+    pending = photos.filter(scored_at__isnull=True).only("photo", "captured_at")
+
+    first = pending.first()
+    if first is None:
+        return 0
+    # Motion of the first pending frame is measured against the last frame
+    # scored earlier, e.g. before the session ended.
+    previous_photo = (
+        photos.filter(scored_at__isnull=False, brightness__isnull=False)
+        .filter(
+            Q(captured_at__lt=first.captured_at)
+            | Q(captured_at=first.captured_at, pk__lt=first.pk),
+        )
+        .only("photo")
+        .last()
+    )
+    previous = previous_photo and _decode_photo(previous_photo, size)
+
+    scored = 0
+    while batch := list(pending[:batch_size]):
+        decoded = [(photo, _decode_photo(photo, size)) for photo in batch]
+        decoded = [(photo, frame) for photo, frame in decoded if frame is not None]
+        if decoded:
+            scores = score_frames(
+                np.stack([frame for _, frame in decoded]),
+                previous,
+            )
+            for index, (photo, _) in enumerate(decoded):
+                for field in SCORE_FIELDS:
+                    value = float(scores[field][index])
+                    setattr(photo, field, None if np.isnan(value) else value)
+            previous = decoded[-1][1]
+        now = timezone.now()
+        for photo in batch:
+            photo.scored_at = now
+        SessionPhoto.objects.bulk_update(batch, [*SCORE_FIELDS, "scored_at"])
+        scored += len(batch)
+    return scored
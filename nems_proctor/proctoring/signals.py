@@ -0,0 +1,48 @@
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from nems_proctor.proctoring import counters
+from nems_proctor.proctoring.models import Exam
+from nems_proctor.proctoring.models import SessionPhoto
+from nems_proctor.proctoring.models import SessionRecord
+from nems_proctor.proctoring.resolvers import invalidate_exam
+from nems_proctor.proctoring.resolvers import invalidate_user
+from nems_proctor.proctoring.storage import ContentAddressedStorage
+from nems_proctor.users.models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_resolved_user(sender, instance, **kwargs):
+    invalidate_user(instance)
+
+
+@receiver(post_save, sender=Exam)
+@receiver(post_delete, sender=Exam)
+def invalidate_resolved_exam(sender, instance, **kwargs):
+    invalidate_exam(instance)
+
+
+@receiver(post_save, sender=SessionPhoto)
+@receiver(post_save, sender=SessionRecord)
+def count_added_media(sender, instance, created, **kwargs):
+    if created:
+        counters.media_added(instance)
+
+
+@receiver(post_delete, sender=SessionPhoto)
+@receiver(post_delete, sender=SessionRecord)
+def count_removed_media(sender, instance, **kwargs):
+    counters.media_removed(instance)
+
+
+@receiver(post_delete, sender=SessionPhoto)
+@receiver(post_delete, sender=SessionRecord)
+def release_media_blob(sender, instance, **kwargs):
+    # Drops the row's reference to its shared content-addressed blob once
+    # the deletion is committed. Other storages keep the file, as before.
+    field_file = instance.photo if sender is SessionPhoto else instance.file
+    if field_file and isinstance(field_file.storage, ContentAddressedStorage):
+        transaction.on_commit(lambda: field_file.delete(save=False))
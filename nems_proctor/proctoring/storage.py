@@ -0,0 +1,421 @@
+"""
+Storage helpers for session media.
+
+Session files are keyed ``sessions/<company>/<exam>/<session>/<date>/<kind>/``
+so everything belonging to a session (or an exam, or a company) shares a
+prefix and can be listed or deleted without looking up each file's row.
+On S3 that is one request per 1000 objects.
+"""
+
+import hashlib
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.storage import Storage
+from django.core.files.storage import default_storage
+from django.core.files.storage import storages
+from django.db import connections
+from django.db import router
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+# Maximum number of keys S3 returns per list request and accepts per
+# DeleteObjects request.
+S3_BATCH_SIZE = 1000
+
+
+@deconstructible
+class ContentAddressedStorage(Storage):
+    """
+    Stores files under the SHA-256 of their content in another storage.
+
+    The digest is computed while streaming the upload's chunks; content that
+    is already stored is not written again, only its reference count is
+    bumped. ``delete()`` drops a reference and removes the object once no
+    file points at it any more. Reference counts and dedup hits are kept in
+    ``MediaBlob`` rows. New objects are uploaded before their row is
+    created, in a short transaction that locks it, so a slow upload never
+    holds a lock; deleting an object happens under that lock. Deleting a
+    ``SessionPhoto`` or ``SessionRecord`` drops its reference once the
+    deletion is committed (see ``signals.py``).
+    """
+
+    def __init__(self, inner="default", prefix="cas"):
+        self.inner_alias = inner
+        self.prefix = prefix
+
+    @property
+    def inner(self):
+        if isinstance(self.inner_alias, Storage):
+            return self.inner_alias
+        return storages[self.inner_alias]
+
+    def key(self, digest, name):
+        suffix = PurePosixPath(name).suffix.lower()
+        return f"{self.prefix}/{digest[:2]}/{digest[2:4]}/{digest}{suffix}"
+
+    def get_available_name(self, name, max_length=None):
+        # Names are derived from the content in _save(), never from ``name``.
+        return name
+
+    def _save(self, name, content):
+        from nems_proctor.proctoring.models import MediaBlob
+
+        hasher = hashlib.sha256()
+        size = 0
+        for chunk in content.chunks():
+            hasher.update(chunk)
+            size += len(chunk)
+        digest = hasher.hexdigest()
+
+        stored = self._add_reference(digest)
+        if stored is not None and self.inner.exists(stored):
+            return stored
+        # Objects are written with no transaction open, so a slow upload
+        # never holds a row lock. Only the reference count update is
+        # transactional.
+        release_connection(MediaBlob)
+        content.seek(0)
+        if stored is not None:
+            # The blob is referenced but its object went missing; the
+            # reference taken above keeps it from being deleted meanwhile.
+            uploaded = self.inner.save(stored, content)
+            if uploaded != stored:
+                MediaBlob.objects.filter(sha256=digest).update(name=uploaded)
+            return uploaded
+        uploaded = self.inner.save(self.key(digest, name), content)
+        with transaction.atomic():
+            blob, created = MediaBlob.objects.select_for_update().get_or_create(
+                sha256=digest,
+                defaults={"name": uploaded, "size": size, "refcount": 1},
+            )
+            if not created:
+                # Another upload of the same content got there first.
+                blob.refcount = F("refcount") + 1
+                blob.dedup_hits = F("dedup_hits") + 1
+                blob.save(update_fields=["refcount", "dedup_hits"])
+            elif not self.inner.exists(uploaded):
+                # The last reference to the same content was dropped while
+                # it was being uploaded, and its object deleted.
+                content.seek(0)
+                blob.name = self.inner.save(uploaded, content)
+                blob.save(update_fields=["name"])
+        if blob.name != uploaded:
+            self.inner.delete(uploaded)
+        return blob.name
+
+    def _add_reference(self, digest):
+        # Returns the name of the stored blob with ``digest``, if any, after
+        # counting one more reference to it.
+        from nems_proctor.proctoring.models import MediaBlob
+
+        with transaction.atomic():
+            blob = MediaBlob.objects.select_for_update().filter(sha256=digest).first()
+            if blob is None:
+                return None
+            blob.refcount = F("refcount") + 1
+            blob.dedup_hits = F("dedup_hits") + 1
+            blob.save(update_fields=["refcount", "dedup_hits"])
+        return blob.name
+
+    def delete(self, name):
+        from nems_proctor.proctoring.models import MediaBlob
+
+        digest = PurePosixPath(name).stem
+        with transaction.atomic():
+            blob = MediaBlob.objects.select_for_update().filter(sha256=digest).first()
+            if blob is None:
+                # Not tracked (e.g. written before content addressing was
+                # enabled); behave like the wrapped storage.
+                self.inner.delete(name)
+                return
+            if blob.refcount > 1:
+                blob.refcount = F("refcount") - 1
+                blob.save(update_fields=["refcount"])
+                return
+            blob.delete()
+            self.inner.delete(blob.name)
+
+    def _open(self, name, mode="rb"):
+        return self.inner.open(name, mode)
+
+    def exists(self, name):
+        return self.inner.exists(name)
+
+    def size(self, name):
+        return self.inner.size(name)
+
+    def url(self, name):
+        return self.inner.url(name)
+
+    def path(self, name):
+        return self.inner.path(name)
+
+    def listdir(self, path):
+        return self.inner.listdir(path)
+
+    def get_accessed_time(self, name):
+        return self.inner.get_accessed_time(name)
+
+    def get_created_time(self, name):
+        return self.inner.get_created_time(name)
+
+    def get_modified_time(self, name):
+        return self.inner.get_modified_time(name)
+
+
+def media_storage():
+    """
+    Storage for ``SessionPhoto`` and ``SessionRecord`` files, content
+    addressed when ``MEDIA_CONTENT_ADDRESSED`` is enabled.
+    """
+    if settings.MEDIA_CONTENT_ADDRESSED:
+        return ContentAddressedStorage()
+    return default_storage
+
+
+def release_connection(model):
+    """
+    Hands back the database connection used for ``model`` before a slow
+    storage write, unless a transaction is open on it.
+
+    With ``CONN_MAX_AGE = 0`` (always the case with the connection pool)
+    Django closes the connection at the end of the request anyway; closing
+    it now returns it to the pool, or frees its server process, while the
+    upload runs. The next query checks out a connection again.
+    """
+    connection = connections[router.db_for_write(model)]
+    if connection.in_atomic_block or connection.settings_dict["CONN_MAX_AGE"] != 0:
+        return
+    connection.close()
+
+
+def save_with_media(instance, field_name):
+    """
+    Saves a new ``instance`` whose ``field_name`` holds an uploaded file.
+
+    The file is written to storage first, with no transaction open and the
+    request's connection released, so a slow upload to S3 never keeps a
+    database transaction or connection busy. The row is then inserted in a
+    short transaction, and the stored object is deleted again if that fails.
+    """
+    field_file = getattr(instance, field_name)
+    release_connection(type(instance))
+    field_file.save(field_file.name, field_file.file, save=False)
+    try:
+        with transaction.atomic():
+            instance.save()
+    except BaseException:
+        field_file.storage.delete(field_file.name)
+        raise
+    return instance
+
+
+def session_prefix(session):
+    """
+    Returns the key prefix shared by all media of ``session``.
+    """
+    company = session.company_id if session.company_id is not None else "_"
+    return f"sessions/{company}/{session.exam_id}/{session.pk}/"
+
+
+def session_media_key(session, kind, filename, day=None):
+    day = day or timezone.localdate()
+    name = PurePosixPath(filename).name
+    return f"{session_prefix(session)}{day:%Y/%m/%d}/{kind}/{name}"
+
+
+def session_photo_path(instance, filename):
+    return session_media_key(instance.session, "photos", filename)
+
+
+def session_record_path(instance, filename):
+    return session_media_key(instance.session, "recordings", filename)
+
+
+def s3_key(storage, name):
+    return f"{storage.location}/{name}" if storage.location else name
+
+
+def _s3_name(storage, key):
+    return key[len(storage.location) + 1 :] if storage.location else key
+
+
+def is_s3(storage):
+    return hasattr(storage, "bucket")
+
+
+def backing_storage(storage):
+    """
+    Returns the storage that holds the bytes of ``storage``'s files.
+    """
+    if isinstance(storage, ContentAddressedStorage):
+        return storage.inner
+    return storage
+
+
+def stat_name(storage, name):
+    """
+    Returns the size and modification time of ``name``, with a single HEAD
+    request on S3. Raises ``FileNotFoundError`` if it does not exist.
+    """
+    storage = backing_storage(storage)
+    if not is_s3(storage):
+        return storage.size(name), storage.get_modified_time(name)
+
+    from botocore.exceptions import ClientError
+
+    obj = storage.bucket.Object(s3_key(storage, name))
+    try:
+        obj.load()
+    except ClientError as exc:
+        raise FileNotFoundError(name) from exc
+    return obj.content_length, obj.last_modified
+
+
+def read_range(storage, name, start, end, chunk_size):
+    """
+    Yields bytes ``start`` to ``end`` (inclusive) of ``name`` in chunks of
+    ``chunk_size``. On S3 only that range is requested.
+    """
+    storage = backing_storage(storage)
+    if is_s3(storage):
+        obj = storage.bucket.Object(s3_key(storage, name))
+        body = obj.get(Range=f"bytes={start}-{end}")["Body"]
+        try:
+            yield from body.iter_chunks(chunk_size)
+        finally:
+            body.close()
+        return
+
+    with storage.open(name, "rb") as content:
+        content.seek(start)
+        remaining = end - start + 1
+        while remaining > 0 and (chunk := content.read(min(chunk_size, remaining))):
+            remaining -= len(chunk)
+            yield chunk
+
+
+def presigned_url(storage, name, expires):
+    """
+    Returns a GET URL for ``name`` on an S3 storage, signed for ``expires``
+    seconds, even when the storage itself hands out unsigned URLs.
+    """
+    storage = backing_storage(storage)
+    return storage.bucket.meta.client.generate_presigned_url(
+        "get_object",
+        Params={"Bucket": storage.bucket.name, "Key": s3_key(storage, name)},
+        ExpiresIn=expires,
+    )
+
+
+def list_prefix(storage, prefix):
+    """
+    Yields the name of every file under ``prefix``.
+    """
+    if is_s3(storage):
+        objects = storage.bucket.objects.filter(
+            Prefix=s3_key(storage, prefix),
+        ).page_size(S3_BATCH_SIZE)
+        for obj in objects:
+            yield _s3_name(storage, obj.key)
+        return
+
+    try:
+        directories, files = storage.listdir(prefix)
+    except FileNotFoundError:
+        return
+    for name in files:
+        yield f"{prefix.rstrip('/')}/{name}"
+    for directory in directories:
+        yield from list_prefix(storage, f"{prefix.rstrip('/')}/{directory}/")
+
+
+def delete_names(storage, names):
+    """
+    Deletes the given files, in batches of ``S3_BATCH_SIZE`` per request on
+    S3. Returns how many names were passed.
+    """
+    deleted = 0
+    if not is_s3(storage):
+        for name in names:
+            storage.delete(name)
+            deleted += 1
+        return deleted
+
+    names = list(names)
+    for start in range(0, len(names), S3_BATCH_SIZE):
+        batch = names[start : start + S3_BATCH_SIZE]
+        storage.bucket.delete_objects(
+            Delete={
+                "Objects": [{"Key": s3_key(storage, name)} for name in batch],
+                "Quiet": True,
+            },
+        )
+        deleted += len(batch)
+    return deleted
+
+
+def delete_prefix(storage, prefix):
+    """
+    Deletes every file under ``prefix`` and returns how many there were.
+    """
+    return delete_names(storage, list(list_prefix(storage, prefix)))
+
+
+def copy_name(storage, source, target):
+    """
+    Copies ``source`` to an available name based on ``target`` and returns
+    that name; server side on S3.
+    """
+    target = storage.get_available_name(target)
+    if is_s3(storage):
+        storage.bucket.Object(s3_key(storage, target)).copy_from(
+            CopySource={
+                "Bucket": storage.bucket.name,
+                "Key": s3_key(storage, source),
+            },
+        )
+        return target
+    with storage.open(source) as content:
+        return storage.save(target, content)
+
+
+def list_session_media(session):
+    """
+    Returns the names of all files stored for ``session``.
+    """
+    storage = media_storage()
+    if isinstance(storage, ContentAddressedStorage):
+        return list(_session_files(session))
+    return list(list_prefix(storage, session_prefix(session)))
+
+
+def delete_session_media(session):
+    """
+    Deletes all files stored for ``session`` and returns their number.
+
+    Content-addressed objects may be shared with other sessions and their
+    references belong to the media rows, so there the session's photos and
+    records are deleted, each dropping its reference on commit.
+    """
+    storage = media_storage()
+    if isinstance(storage, ContentAddressedStorage):
+        count = len(list(_session_files(session)))
+        session.sessionphoto_set.all().delete()
+        session.sessionrecord_set.all().delete()
+        return count
+    return delete_prefix(storage, session_prefix(session))
+
+
+def _session_files(session):
+    yield from session.sessionphoto_set.exclude(photo="").values_list(
+        "photo",
+        flat=True,
+    )
+    yield from session.sessionrecord_set.exclude(file="").values_list(
+        "file",
+        flat=True,
+    )
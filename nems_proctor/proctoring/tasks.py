@@ -0,0 +1,74 @@
+from celery import signature
+from django.conf import settings
+
+from nems_proctor.core.lanes import lane_task
+from nems_proctor.proctoring import audio
+from nems_proctor.proctoring import contact_sheet
+from nems_proctor.proctoring import finalization
+from nems_proctor.proctoring import scoring
+from nems_proctor.proctoring.media import normalize_stored
+from nems_proctor.proctoring.models import Session
+from nems_proctor.proctoring.models import SessionPhoto
+from nems_proctor.proctoring.models import SessionRecord
+
+
+@lane_task("media")
+def normalize_session_photo(photo_id):
+    """Re-encodes a stored session photo (deferred normalization)."""
+    photo = SessionPhoto.objects.filter(pk=photo_id).first()
+    if photo is None:
+        return False
+    return normalize_stored(photo, "photo")
+
+
+@lane_task("media")
+def normalize_session_record(record_id):
+    """Re-encodes a stored screenshot record (deferred normalization)."""
+    record = SessionRecord.objects.filter(pk=record_id).first()
+    if record is None:
+        return False
+    return normalize_stored(record, "file")
+
+
+@lane_task("media")
+def index_session_record_audio(record_id):
+    """Computes the activity index of an audio recording."""
+    record = SessionRecord.objects.filter(pk=record_id).first()
+    if record is None:
+        return None
+    return audio.index_record(record)
+
+
+@lane_task("io")
+def finalize_session(session_id):
+    """
+    Computes and stores the summary and manifest of an ended session, then
+    starts the downstream tasks in ``PROCTORING_FINALIZATION_TASKS``.
+    """
+    session = (
+        Session.objects.select_related("exam", "taker").filter(pk=session_id).first()
+    )
+    if session is None:
+        return None
+    summary = finalization.finalize(session)
+    for task_name in settings.PROCTORING_FINALIZATION_TASKS:
+        signature(task_name, args=(session_id,)).delay()
+    return summary
+
+
+@lane_task("media")
+def render_contact_sheet(session_id):
+    """Renders and stores the contact sheet of a session's current photos."""
+    session = Session.objects.filter(pk=session_id).first()
+    if session is None:
+        return None
+    return contact_sheet.store(session)
+
+
+@lane_task("media")
+def score_session_photos(session_id):
+    """Scores the session's photos that have not been scored yet."""
+    session = Session.objects.filter(pk=session_id).first()
+    if session is None:
+        return 0
+    return scoring.score_session(session)
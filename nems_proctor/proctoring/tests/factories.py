@@ -0,0 +1,38 @@
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from factory import Faker
+from factory import Sequence
+from factory import SubFactory
+from factory.django import DjangoModelFactory
+from PIL import Image
+
+from nems_proctor.proctoring.models import Exam
+from nems_proctor.proctoring.models import Session
+from nems_proctor.users.tests.factories import UserFactory
+
+
+def image_file(name="frame.png", size=(32, 24), image_format="PNG", color="gray"):
+    buffer = BytesIO()
+    Image.new("RGB", size, color).save(buffer, image_format)
+    return SimpleUploadedFile(
+        name,
+        buffer.getvalue(),
+        content_type=f"image/{image_format.lower()}",
+    )
+
+
+class ExamFactory(DjangoModelFactory):
+    exam_title = Faker("sentence", nb_words=3)
+    exam_code = Sequence(lambda n: f"EXAM-{n:04d}")
+
+    class Meta:
+        model = Exam
+
+
+class SessionFactory(DjangoModelFactory):
+    exam = SubFactory(ExamFactory)
+    taker = SubFactory(UserFactory)
+
+    class Meta:
+        model = Session
@@ -0,0 +1,146 @@
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+from nems_proctor.core import pagination
+from nems_proctor.core.pagination import EstimatedCountPaginator
+from nems_proctor.core.pagination import estimated_count
+from nems_proctor.proctoring.admin import SessionMediaInline
+from nems_proctor.proctoring.models import RecordingType
+from nems_proctor.proctoring.models import Session
+from nems_proctor.proctoring.models import SessionPhoto
+from nems_proctor.proctoring.models import SessionRecord
+from nems_proctor.proctoring.tests.factories import SessionFactory
+from nems_proctor.proctoring.tests.factories import image_file
+
+pytestmark = pytest.mark.django_db
+
+# Queries an admin page may make, whatever the number of rows: the admin
+# session and user, the page's rows and their related objects, counts and
+# the ATOMIC_REQUESTS savepoints.
+QUERY_BUDGET = 15
+
+
+def _session_with_media(count):
+    session = SessionFactory()
+    for _ in range(count):
+        SessionPhoto.objects.create(session=session, photo=image_file())
+        SessionRecord.objects.create(
+            session=session,
+            recording_type=RecordingType.SCREENSHOT,
+            file=image_file(),
+        )
+    return session
+
+
+@pytest.mark.parametrize("count", [2, SessionMediaInline.max_rows + 5])
+@pytest.mark.parametrize(
+    "url_name",
+    [
+        "admin:proctoring_session_changelist",
+        "admin:proctoring_sessionphoto_changelist",
+        "admin:proctoring_sessionrecord_changelist",
+    ],
+)
+def test_changelists_stay_within_budget(
+    admin_client,
+    django_assert_max_num_queries,
+    url_name,
+    count,
+):
+    SessionFactory.create_batch(count, proctor=_session_with_media(count).taker)
+
+    with django_assert_max_num_queries(QUERY_BUDGET):
+        response = admin_client.get(reverse(url_name))
+
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_session_change_page_shows_latest_media(
+    admin_client,
+    django_assert_max_num_queries,
+):
+    count = SessionMediaInline.max_rows + 5
+    session = _session_with_media(count)
+    url = reverse("admin:proctoring_session_change", args=[session.pk])
+
+    with django_assert_max_num_queries(QUERY_BUDGET):
+        response = admin_client.get(url)
+
+    assert response.status_code == HTTPStatus.OK
+    formsets = response.context["inline_admin_formsets"]
+    assert [len(inline.formset.forms) for inline in formsets] == [
+        SessionMediaInline.max_rows,
+    ] * 2
+    assert f"All {count} photos" in response.content.decode()
+
+
+def test_session_change_page_saves(admin_client):
+    session = _session_with_media(SessionMediaInline.max_rows + 1)
+    url = reverse("admin:proctoring_session_change", args=[session.pk])
+    response = admin_client.get(url)
+    data = {
+        "exam": session.exam_id,
+        "taker": session.taker_id,
+        "is_active": "",
+    }
+    for inline in response.context["inline_admin_formsets"]:
+        formset = inline.formset
+        management = formset.management_form
+        data.update(
+            {
+                management.add_prefix(name): value
+                for name, value in management.initial.items()
+            },
+        )
+        for form in formset.forms:
+            data[form.add_prefix("id")] = form.instance.pk
+            data[form.add_prefix("session")] = session.pk
+
+    response = admin_client.post(url, data)
+
+    assert response.status_code == HTTPStatus.FOUND
+    session.refresh_from_db()
+    assert not session.is_active
+
+
+def test_search(admin_client):
+    session = _session_with_media(1)
+    SessionFactory()
+
+    response = admin_client.get(
+        reverse("admin:proctoring_session_changelist"),
+        {"q": session.taker.username},
+    )
+
+    assert list(response.context["cl"].result_list) == [session]
+
+
+def test_estimated_count(settings, monkeypatch):
+    sessions = SessionFactory.create_batch(2)
+    estimate = 5_000
+    settings.ADMIN_ESTIMATED_COUNT_THRESHOLD = 1_000
+    monkeypatch.setattr(pagination, "estimated_count", lambda *args: estimate)
+
+    unfiltered = EstimatedCountPaginator(Session.objects.all(), 10)
+    filtered = EstimatedCountPaginator(Session.objects.filter(is_active=True), 10)
+
+    assert unfiltered.count == estimate
+    assert filtered.count == len(sessions)
+
+
+def test_estimated_count_below_threshold(settings, monkeypatch):
+    sessions = SessionFactory.create_batch(2)
+    settings.ADMIN_ESTIMATED_COUNT_THRESHOLD = 1_000
+    monkeypatch.setattr(pagination, "estimated_count", lambda *args: 10)
+
+    paginator = EstimatedCountPaginator(Session.objects.all(), 10)
+
+    assert paginator.count == len(sessions)
+
+
+def test_estimated_count_reads_pg_class():
+    estimate = estimated_count(Session)
+
+    assert estimate is None or estimate >= 0
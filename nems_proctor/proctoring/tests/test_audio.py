@@ -0,0 +1,151 @@
+import wave
+from io import BytesIO
+
+import numpy as np
+import pytest
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from nems_proctor.proctoring.api import views
+from nems_proctor.proctoring.audio import AudioDecodeError
+from nems_proctor.proctoring.audio import activity_index
+from nems_proctor.proctoring.models import RecordingType
+from nems_proctor.proctoring.models import SessionRecord
+from nems_proctor.proctoring.tasks import index_session_record_audio
+from nems_proctor.proctoring.tests.factories import SessionFactory
+from nems_proctor.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+RATE = 8000
+
+
+def wav_bytes(parts, width=2, channels=1):
+    """
+    A WAV file of ``(seconds, amplitude)`` parts: a 220 Hz tone, or
+    silence with faint noise for amplitude 0.
+    """
+    rng = np.random.default_rng(0)
+    tones = []
+    for seconds, amplitude in parts:
+        t = np.arange(int(seconds * RATE)) / RATE
+        tones.append(amplitude * np.sin(2 * np.pi * 220 * t))
+        tones[-1] += rng.normal(0, 0.001, len(t))
+    signal = np.concatenate(tones)
+    if width == 1:
+        samples = (signal * 127 + 128).astype(np.uint8)
+    else:
+        samples = (signal * 32767).astype(np.int16)
+    samples = np.repeat(samples[:, np.newaxis], channels, axis=1)
+    buffer = BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setnchannels(channels)
+        writer.setsampwidth(width)
+        writer.setframerate(RATE)
+        writer.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+SPEECH = [(1, 0), (1.5, 0.5), (0.1, 0), (0.5, 0.5), (2, 0), (0.05, 0.5), (1, 0)]
+
+
+@pytest.mark.parametrize(("width", "channels"), [(2, 1), (2, 2), (1, 1)])
+def test_activity_index_of_wav(settings, width, channels):
+    settings.PROCTORING_AUDIO_ENVELOPE_POINTS = 20
+
+    index = activity_index(BytesIO(wav_bytes(SPEECH, width, channels)), "a.wav")
+
+    assert index["duration"] == pytest.approx(6.15)
+    # The 0.1 s pause is bridged and the 0.05 s blip dropped.
+    assert index["segments"] == [[1.0, 3.1]]
+    assert len(index["envelope"]) <= settings.PROCTORING_AUDIO_ENVELOPE_POINTS
+    assert max(index["envelope"]) > min(index["envelope"]) + 30
+    assert index["interval"] * len(index["envelope"]) >= index["duration"]
+
+
+def test_formats_that_need_ffmpeg(settings):
+    settings.FFMPEG_BINARY = "missing-ffmpeg"
+    with pytest.raises(AudioDecodeError):
+        activity_index(BytesIO(b"ID3" + bytes(64)), "a.mp3")
+
+
+def test_truncated_wav_is_indexed():
+    content = wav_bytes(SPEECH, channels=2)
+
+    index = activity_index(BytesIO(content[:-3]), "a.wav")
+
+    assert index["segments"] == [[1.0, 3.1]]
+
+
+def test_ffmpeg_errors_do_not_block_decoding(settings, tmp_path):
+    # More output on stderr than a pipe buffers.
+    ffmpeg = tmp_path / "ffmpeg"
+    ffmpeg.write_text("#!/bin/sh\nhead -c 200000 /dev/zero | tr '\\0' x >&2\nexit 1\n")
+    ffmpeg.chmod(0o755)
+    settings.FFMPEG_BINARY = str(ffmpeg)
+
+    with pytest.raises(AudioDecodeError, match="^x+$"):
+        activity_index(BytesIO(b"ID3" + bytes(64)), "a.mp3")
+
+
+class TestActivityView:
+    @pytest.fixture(autouse=True)
+    def _setup(self, settings, tmp_path, monkeypatch):
+        settings.MEDIA_ROOT = tmp_path
+        cache.clear()
+        self.queued: list[int] = []
+        monkeypatch.setattr(
+            views.index_session_record_audio,
+            "delay",
+            self.queued.append,
+        )
+
+    def _get(self, user, record):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.get(f"/api/v1/session-records/{record.pk}/activity/")
+
+    def _record(self, content, name="clip.wav", recording_type=RecordingType.AUDIO):
+        return SessionRecord.objects.create(
+            session=SessionFactory(),
+            recording_type=recording_type,
+            file=SimpleUploadedFile(name, content),
+        )
+
+    def test_indexes_in_background(self, user: User):
+        record = self._record(wav_bytes(SPEECH))
+
+        assert self._get(user, record).status_code == status.HTTP_202_ACCEPTED
+        assert self._get(user, record).status_code == status.HTTP_202_ACCEPTED
+        assert self.queued == [record.pk]
+
+        index_session_record_audio(record.pk)
+        response = self._get(user, record)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["segments"] == [[1.0, 3.1]]
+
+    def test_undecodable_audio(self, user: User):
+        record = self._record(b"RIFF" + bytes(40))
+        index_session_record_audio(record.pk)
+
+        response = self._get(user, record)
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_missing_file(self, user: User):
+        record = self._record(wav_bytes(SPEECH))
+        record.file.storage.delete(record.file.name)
+        index_session_record_audio(record.pk)
+
+        response = self._get(user, record)
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert response.data["detail"] == "The recording file is missing."
+
+    def test_only_audio_recordings(self, user: User):
+        record = self._record(b"\x89PNG", "s.png", RecordingType.SCREENSHOT)
+
+        assert self._get(user, record).status_code == status.HTTP_404_NOT_FOUND
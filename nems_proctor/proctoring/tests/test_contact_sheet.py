@@ -0,0 +1,99 @@
+from io import BytesIO
+
+import pytest
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from nems_proctor.proctoring.api import views
+from nems_proctor.proctoring.contact_sheet import sample
+from nems_proctor.proctoring.models import SessionPhoto
+from nems_proctor.proctoring.tasks import render_contact_sheet
+from nems_proctor.proctoring.tests.factories import SessionFactory
+from nems_proctor.proctoring.tests.factories import image_file
+from nems_proctor.users.models import User
+from nems_proctor.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_sample_spreads_over_the_whole_range():
+    assert sample(list(range(100)), 5) == [0, 25, 50, 74, 99]
+    assert sample([1, 2], 5) == [1, 2]
+
+
+class TestContactSheetView:
+    @pytest.fixture(autouse=True)
+    def _setup(self, settings, tmp_path, monkeypatch):
+        settings.MEDIA_ROOT = tmp_path
+        settings.PROCTORING_CONTACT_SHEET_COLUMNS = 2
+        settings.PROCTORING_CONTACT_SHEET_TILE_WIDTH = 40
+        cache.clear()
+        self.queued: list[int] = []
+        monkeypatch.setattr(
+            views.render_contact_sheet,
+            "delay",
+            self.queued.append,
+        )
+
+    def _get(self, user, session):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.get(f"/api/v1/sessions/{session.pk}/contact_sheet/")
+
+    def test_renders_in_background_then_serves_it(self, user: User, settings):
+        session = SessionFactory(taker=user)
+        for color in ("red", "green", "blue"):
+            SessionPhoto.objects.create(session=session, photo=image_file(color=color))
+
+        assert self._get(user, session).status_code == status.HTTP_202_ACCEPTED
+        assert self._get(user, session).status_code == status.HTTP_202_ACCEPTED
+        assert self.queued == [session.pk]
+
+        render_contact_sheet(session.pk)
+        response = self._get(user, session)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Type"] == "image/jpeg"
+        assert "private" in response["Cache-Control"]
+        content = BytesIO(b"".join(response.streaming_content))
+        with Image.open(content) as sheet:
+            assert sheet.width == 2 * settings.PROCTORING_CONTACT_SHEET_TILE_WIDTH
+
+    def test_new_photos_invalidate_the_sheet(self, user: User):
+        session = SessionFactory(taker=user)
+        SessionPhoto.objects.create(session=session, photo=image_file())
+        old_name = render_contact_sheet(session.pk)
+
+        SessionPhoto.objects.create(session=session, photo=image_file())
+        assert self._get(user, session).status_code == status.HTTP_202_ACCEPTED
+
+        render_contact_sheet(session.pk)
+        assert not default_storage.exists(old_name)
+
+    def test_replaced_photo_invalidates_the_sheet(self, user: User):
+        session = SessionFactory(taker=user)
+        first = SessionPhoto.objects.create(session=session, photo=image_file())
+        SessionPhoto.objects.create(session=session, photo=image_file())
+        render_contact_sheet(session.pk)
+
+        first.delete()
+        SessionPhoto.objects.create(session=session, photo=image_file())
+
+        assert self._get(user, session).status_code == status.HTTP_202_ACCEPTED
+
+    def test_session_without_photos(self, user: User):
+        response = self._get(user, SessionFactory(taker=user))
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    def test_access(self):
+        session = SessionFactory(taker=UserFactory(company_id=8))
+
+        response = self._get(UserFactory(company_id=7), session)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        response = self._get(UserFactory(company_id=8), session)
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        response = self._get(UserFactory(is_staff=True), session)
+        assert response.status_code == status.HTTP_204_NO_CONTENT
@@ -0,0 +1,122 @@
+from importlib import import_module
+
+import pytest
+from django.apps import apps
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from nems_proctor.proctoring.counters import FIELDS
+from nems_proctor.proctoring.models import RecordingType
+from nems_proctor.proctoring.models import Session
+from nems_proctor.proctoring.models import SessionPhoto
+from nems_proctor.proctoring.models import SessionRecord
+from nems_proctor.proctoring.tests.factories import SessionFactory
+from nems_proctor.proctoring.tests.factories import image_file
+from nems_proctor.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def _media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+def _add_media(session, photos=2, records=1):
+    for _ in range(photos):
+        SessionPhoto.objects.create(session=session, photo=image_file())
+    for _ in range(records):
+        SessionRecord.objects.create(
+            session=session,
+            recording_type=RecordingType.SCREENSHOT,
+            file=image_file("screen.png"),
+        )
+
+
+def test_counters_follow_inserts_and_deletes():
+    session = SessionFactory()
+    _add_media(session)
+
+    session.refresh_from_db()
+    assert (session.photo_count, session.record_count) == (2, 1)
+    photos = list(SessionPhoto.objects.order_by("pk"))
+    stored = [photo.stored_bytes or 0 for photo in photos] + [
+        record.stored_bytes or 0 for record in SessionRecord.objects.all()
+    ]
+    assert session.total_bytes == sum(stored)
+    assert session.last_media_at == SessionRecord.objects.get().recorded_at
+
+    photos[0].delete()
+    session.refresh_from_db()
+    assert session.photo_count == 1
+    assert session.total_bytes == sum(stored[1:])
+
+
+def test_reconcile_fixes_drift():
+    session = SessionFactory()
+    _add_media(session)
+    expected = Session.objects.values("photo_count", "total_bytes").get()
+    Session.objects.update(photo_count=7, total_bytes=0, last_media_at=None)
+
+    call_command("reconcile_session_counters", stdout=None)
+
+    session.refresh_from_db()
+    assert session.photo_count == expected["photo_count"]
+    assert session.total_bytes == expected["total_bytes"]
+    assert session.last_media_at is not None
+
+
+def test_reconcile_sizes_media_saved_before_stored_bytes():
+    session = SessionFactory()
+    _add_media(session)
+    expected = Session.objects.values("total_bytes").get()
+    SessionPhoto.objects.update(stored_bytes=None)
+    SessionRecord.objects.update(stored_bytes=None)
+    Session.objects.update(total_bytes=0)
+
+    call_command("reconcile_session_counters", stdout=None)
+
+    session.refresh_from_db()
+    assert session.total_bytes == expected["total_bytes"]
+    assert not SessionPhoto.objects.filter(stored_bytes__isnull=True).exists()
+
+
+def test_counters_of_sessions_older_than_the_counters_do_not_go_negative():
+    session = SessionFactory()
+    _add_media(session, photos=1, records=1)
+    Session.objects.update(photo_count=0, record_count=0, total_bytes=0)
+
+    SessionPhoto.objects.get().delete()
+    session.delete()
+
+    assert not Session.objects.exists()
+
+
+def test_migration_backfills_counters():
+    session = SessionFactory()
+    _add_media(session)
+    expected = Session.objects.values(*FIELDS).get()
+    # Media saved before 0003 has no stored_bytes.
+    SessionPhoto.objects.update(stored_bytes=None)
+    Session.objects.update(photo_count=0, record_count=0, total_bytes=0)
+    migration = import_module(
+        "nems_proctor.proctoring.migrations."
+        "0008_session_last_media_at_session_photo_count_and_more",
+    )
+
+    migration.backfill_counters(apps, None)
+
+    assert Session.objects.values(*FIELDS).get() == expected
+
+
+def test_photo_listing_does_not_count_rows(user: User, django_assert_num_queries):
+    client = APIClient()
+    client.force_authenticate(user)
+    session = SessionFactory()
+    _add_media(session, photos=3, records=0)
+
+    # ATOMIC_REQUESTS savepoint and release, session, photos.
+    with django_assert_num_queries(4):
+        response = client.get(f"/api/v1/sessions/{session.pk}/photos/")
+
+    assert response.data["count"] == len(response.data["photos"])
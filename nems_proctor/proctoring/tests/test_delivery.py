@@ -0,0 +1,173 @@
+from types import SimpleNamespace
+from urllib.parse import quote
+from urllib.parse import urlsplit
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from nems_proctor.proctoring.delivery import RangeNotSatisfiableError
+from nems_proctor.proctoring.delivery import media_response
+from nems_proctor.proctoring.delivery import parse_range
+from nems_proctor.proctoring.models import RecordingType
+from nems_proctor.proctoring.models import SessionRecord
+from nems_proctor.proctoring.tests.factories import SessionFactory
+from nems_proctor.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+CONTENT = bytes(range(256)) * 40
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    [
+        ("bytes=0-99", (0, 99)),
+        ("bytes=100-", (100, 999)),
+        ("bytes=-10", (990, 999)),
+        ("bytes=900-5000", (900, 999)),
+        ("bytes=0-1,5-6", None),
+        ("bytes=5-1", None),
+        ("items=0-1", None),
+        (None, None),
+    ],
+)
+def test_parse_range(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=-0"])
+def test_parse_range_not_satisfiable(header):
+    with pytest.raises(RangeNotSatisfiableError):
+        parse_range(header, 1000)
+
+
+class TestContentView:
+    @pytest.fixture(autouse=True)
+    def _record(self):
+        self.session = SessionFactory()
+        self.record = SessionRecord.objects.create(
+            session=self.session,
+            recording_type=RecordingType.VIDEO,
+            file=SimpleUploadedFile("clip.webm", CONTENT),
+        )
+        self.url = f"/api/v1/session-records/{self.record.pk}/content/"
+
+    def _client(self, user=None):
+        client = APIClient()
+        client.force_authenticate(user or self.session.taker)
+        return client
+
+    def test_full_response(self):
+        response = self._client().get(self.url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert b"".join(response.streaming_content) == CONTENT
+        assert response["Content-Length"] == str(len(CONTENT))
+        assert response["Content-Type"] == "video/webm"
+        assert response["Accept-Ranges"] == "bytes"
+        assert response["Last-Modified"]
+
+    def test_range(self):
+        response = self._client().get(self.url, HTTP_RANGE="bytes=1000-1999")
+
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert b"".join(response.streaming_content) == CONTENT[1000:2000]
+        assert response["Content-Range"] == f"bytes 1000-1999/{len(CONTENT)}"
+        assert response["Content-Length"] == "1000"
+
+    def test_range_not_satisfiable(self):
+        response = self._client().get(self.url, HTTP_RANGE="bytes=999999-")
+
+        assert response.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+        assert response["Content-Range"] == f"bytes */{len(CONTENT)}"
+
+    def test_if_range(self):
+        client = self._client()
+        etag = client.get(self.url)["ETag"]
+
+        response = client.get(self.url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=etag)
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+
+        response = client.get(self.url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"old"')
+        assert response.status_code == status.HTTP_200_OK
+        assert b"".join(response.streaming_content) == CONTENT
+
+    def test_revalidation(self):
+        client = self._client()
+        etag = client.get(self.url)["ETag"]
+
+        response = client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_access(self):
+        stranger = UserFactory(company_id=7)
+        colleague = UserFactory(company_id=7)
+        self.record.company_id = 7
+        self.record.save()
+
+        response = self._client(UserFactory()).get(self.url)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert self._client(colleague).get(self.url).status_code == status.HTTP_200_OK
+        self.record.company_id = 8
+        self.record.save()
+        response = self._client(stranger).get(self.url)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_photo_content(self, user):
+        user.is_staff = True
+        photo = self.session.sessionphoto_set.create(
+            photo=SimpleUploadedFile("frame.jpg", CONTENT[:100]),
+        )
+
+        response = self._client(user).get(f"/api/v1/session-photos/{photo.pk}/content/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert b"".join(response.streaming_content) == CONTENT[:100]
+
+
+class TestAccelRedirect:
+    @pytest.fixture(autouse=True)
+    def _mode(self, settings):
+        settings.MEDIA_DELIVERY_MODE = "x-accel"
+
+    def test_file_system(self):
+        record = SessionRecord.objects.create(
+            session=SessionFactory(),
+            recording_type=RecordingType.VIDEO,
+            file=SimpleUploadedFile("clip one.webm", CONTENT),
+        )
+        client = APIClient()
+        client.force_authenticate(record.session.taker)
+
+        response = client.get(f"/api/v1/session-records/{record.pk}/content/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content == b""
+        assert response["X-Accel-Redirect"] == "/internal/media/" + quote(
+            record.file.name,
+        )
+        assert response["Content-Type"] == "video/webm"
+        assert "private" in response["Cache-Control"]
+
+    def test_s3(self, rf):
+        # django-storages is only installed with the production requirements.
+        s3 = pytest.importorskip("storages.backends.s3")
+        storage = s3.S3Storage(
+            bucket_name="media-bucket",
+            location="media",
+            access_key="key",
+            secret_key="secret",  # noqa: S106
+            region_name="eu-west-1",
+        )
+        field_file = SimpleNamespace(name="sessions/1/2/3/clip.mp4", storage=storage)
+
+        response = media_response(rf.get("/"), field_file)
+
+        assert response["X-Accel-Redirect"] == "/internal/s3/"
+        url = urlsplit(response["X-Accel-S3-URL"])
+        assert url.path.endswith("/media/sessions/1/2/3/clip.mp4")
+        assert "Signature" in url.query
+        assert response["Content-Type"] == "video/mp4"
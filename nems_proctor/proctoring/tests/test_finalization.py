@@ -0,0 +1,81 @@
+import json
+
+import pytest
+from django.core.files.storage import default_storage
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from nems_proctor.proctoring import tasks
+from nems_proctor.proctoring.models import RecordingType
+from nems_proctor.proctoring.models import SessionPhoto
+from nems_proctor.proctoring.models import SessionRecord
+from nems_proctor.proctoring.tests.factories import SessionFactory
+from nems_proctor.proctoring.tests.factories import image_file
+from nems_proctor.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def _media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+def test_end_session_closes_and_enqueues_finalization(
+    user: User,
+    django_capture_on_commit_callbacks,
+):
+    client = APIClient()
+    client.force_authenticate(user)
+    session = SessionFactory()
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        response = client.post(f"/api/v1/sessions/{session.pk}/end_session/")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(callbacks) == 1
+    session.refresh_from_db()
+    assert not session.is_active
+    assert session.end_time is not None
+    assert session.summary is None
+
+
+def test_finalize_session_stores_summary_and_manifest(settings, monkeypatch):
+    session = SessionFactory()
+    photos = [
+        SessionPhoto.objects.create(session=session, photo=image_file())
+        for _ in range(2)
+    ]
+    SessionRecord.objects.create(
+        session=session,
+        recording_type=RecordingType.SCREENSHOT,
+        file=image_file("screen.png"),
+    )
+    session.end_session()
+    settings.PROCTORING_FINALIZATION_TASKS = ["proctoring.archive_session"]
+    started = []
+
+    class Signature:
+        def __init__(self, name, args):
+            self.name = name
+
+        def delay(self):
+            started.append(self.name)
+
+    monkeypatch.setattr(tasks, "signature", Signature)
+
+    summary = tasks.finalize_session(session.pk)
+
+    session.refresh_from_db()
+    assert session.duration == session.end_time - session.start_time
+    assert session.finalized_at is not None
+    assert session.summary == summary
+    assert summary["photo_count"] == len(photos)
+    assert summary["photo_bytes"] == sum(photo.stored_bytes or 0 for photo in photos)
+    assert summary["records"][RecordingType.SCREENSHOT]["count"] == 1
+    with default_storage.open(summary["manifest"]) as handle:
+        manifest = json.load(handle)
+    assert [photo["name"] for photo in manifest["photos"]] == [
+        photo.photo.name for photo in photos
+    ]
+    assert started == ["proctoring.archive_session"]
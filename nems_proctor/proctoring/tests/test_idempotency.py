@@ -0,0 +1,166 @@
+import time
+
+import pytest
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from nems_proctor.proctoring.api.idempotency import IN_FLIGHT
+from nems_proctor.proctoring.api.idempotency import _claim
+from nems_proctor.proctoring.api.idempotency import _keep_claimed
+from nems_proctor.proctoring.models import Session
+from nems_proctor.proctoring.models import SessionPhoto
+from nems_proctor.proctoring.tests.factories import ExamFactory
+from nems_proctor.proctoring.tests.factories import SessionFactory
+from nems_proctor.proctoring.tests.factories import image_file
+from nems_proctor.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def client(user: User) -> APIClient:
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    cache.clear()
+
+
+def test_start_session_retry_is_replayed(
+    client: APIClient,
+    user: User,
+    django_capture_on_commit_callbacks,
+):
+    data = {"exam": ExamFactory().exam_code, "taker": user.username}
+    with django_capture_on_commit_callbacks(execute=True):
+        first = client.post(
+            "/api/v1/sessions/start_session/",
+            data,
+            format="json",
+            HTTP_IDEMPOTENCY_KEY="retry-1",
+        )
+    second = client.post(
+        "/api/v1/sessions/start_session/",
+        data,
+        format="json",
+        HTTP_IDEMPOTENCY_KEY="retry-1",
+    )
+    assert first.status_code == status.HTTP_201_CREATED
+    assert second.status_code == status.HTTP_201_CREATED
+    assert second["Idempotent-Replayed"] == "true"
+    assert second.data == first.data
+    assert Session.objects.count() == 1
+
+
+def test_add_photo_retry_does_not_store_twice(
+    client: APIClient,
+    django_capture_on_commit_callbacks,
+):
+    session = SessionFactory()
+    url = f"/api/v1/sessions/{session.pk}/add_photo/"
+    with django_capture_on_commit_callbacks(execute=True):
+        client.post(url, {"photo": image_file()}, HTTP_IDEMPOTENCY_KEY="frame-1")
+    response = client.post(
+        url,
+        {"photo": image_file()},
+        HTTP_IDEMPOTENCY_KEY="frame-1",
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    assert SessionPhoto.objects.filter(session=session).count() == 1
+
+
+def test_key_reused_for_different_payload(
+    client: APIClient,
+    user: User,
+    django_capture_on_commit_callbacks,
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        client.post(
+            "/api/v1/sessions/start_session/",
+            {"exam": ExamFactory().exam_code, "taker": user.username},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY="reused",
+        )
+    response = client.post(
+        "/api/v1/sessions/start_session/",
+        {"exam": ExamFactory().exam_code, "taker": user.username},
+        format="json",
+        HTTP_IDEMPOTENCY_KEY="reused",
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_in_flight_duplicate_gets_conflict(
+    client: APIClient,
+    user: User,
+    settings,
+):
+    settings.IDEMPOTENCY_IN_FLIGHT_WAIT = 0
+    data = {"exam": ExamFactory().exam_code, "taker": user.username}
+    client.post(
+        "/api/v1/sessions/start_session/",
+        data,
+        format="json",
+        HTTP_IDEMPOTENCY_KEY="slow",
+    )
+    # The first request's transaction has not committed inside the test, so
+    # its key is still claimed as in flight.
+    response = client.post(
+        "/api/v1/sessions/start_session/",
+        data,
+        format="json",
+        HTTP_IDEMPOTENCY_KEY="slow",
+    )
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert Session.objects.count() == 1
+
+
+def test_released_key_is_claimed_by_one_retry(settings, monkeypatch):
+    settings.IDEMPOTENCY_IN_FLIGHT_WAIT = 0
+    other = {"state": IN_FLIGHT, "fingerprint": "other"}
+    add = cache.add
+    attempts = []
+
+    def racing_add(key, value, timeout):
+        attempts.append(value)
+        if len(attempts) == 1:
+            # Held by a request that fails and releases the key.
+            return False
+        # Another waiting retry claims the released key first.
+        add(key, other, timeout)
+        return add(key, value, timeout)
+
+    monkeypatch.setattr(cache, "add", racing_add)
+
+    assert _claim("idempotency:test", "mine") == other
+
+
+def test_claim_is_kept_while_the_request_runs(settings):
+    settings.IDEMPOTENCY_IN_FLIGHT_TIMEOUT = 0.2
+    cache.set("idempotency:test", {"state": IN_FLIGHT}, 0.2)
+
+    with _keep_claimed("idempotency:test"):
+        time.sleep(0.5)
+
+    assert cache.get("idempotency:test") is not None
+
+
+def test_retry_of_throttled_upload_is_replayed(
+    client: APIClient,
+    settings,
+    django_capture_on_commit_callbacks,
+):
+    settings.UPLOAD_RATE_LIMITS = {"session": {"capacity": 1, "rate": 0.01}}
+    session = SessionFactory()
+    url = f"/api/v1/sessions/{session.pk}/add_photo/"
+    with django_capture_on_commit_callbacks(execute=True):
+        client.post(url, {"photo": image_file()}, HTTP_IDEMPOTENCY_KEY="frame-1")
+
+    response = client.post(url, {"photo": image_file()}, HTTP_IDEMPOTENCY_KEY="frame-1")
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response["Idempotent-Replayed"] == "true"
@@ -0,0 +1,84 @@
+import pytest
+from django.core.files.storage import FileSystemStorage
+from PIL import Image
+
+from nems_proctor.proctoring.api.serializers import SessionPhotoCreateSerializer
+from nems_proctor.proctoring.media import DEFERRED
+from nems_proctor.proctoring.media import INLINE
+from nems_proctor.proctoring.models import SessionPhoto
+from nems_proctor.proctoring.tasks import normalize_session_photo
+from nems_proctor.proctoring.tests.factories import SessionFactory
+from nems_proctor.proctoring.tests.factories import image_file
+
+pytestmark = pytest.mark.django_db
+
+
+def _add_photo(upload):
+    serializer = SessionPhotoCreateSerializer(data={"photo": upload})
+    assert serializer.is_valid(), serializer.errors
+    return serializer.save(session=SessionFactory())
+
+
+def test_inline_normalization(settings):
+    settings.MEDIA_NORMALIZE_MODE = INLINE
+    settings.MEDIA_NORMALIZE_MAX_DIMENSION = 64
+    upload = image_file(size=(640, 480))
+
+    photo = _add_photo(upload)
+
+    assert photo.photo.name.endswith(".webp")
+    assert photo.original_bytes == upload.size
+    assert photo.stored_bytes == photo.photo.size < upload.size
+    with Image.open(photo.photo) as image:
+        assert max(image.size) == settings.MEDIA_NORMALIZE_MAX_DIMENSION
+
+
+def test_normalization_off_keeps_the_upload(settings):
+    settings.MEDIA_NORMALIZE_MODE = "off"
+    upload = image_file(size=(640, 480))
+
+    photo = _add_photo(upload)
+
+    assert photo.photo.name.endswith(".png")
+    assert photo.original_bytes == photo.stored_bytes == upload.size
+
+
+def test_deferred_normalization(settings, django_capture_on_commit_callbacks):
+    settings.MEDIA_NORMALIZE_MODE = DEFERRED
+    upload = image_file(size=(640, 480))
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        photo = _add_photo(upload)
+    assert photo.photo.name.endswith(".png")
+
+    assert normalize_session_photo(photo.pk)
+    assert len(callbacks) == 1
+    photo.refresh_from_db()
+    assert photo.photo.name.endswith(".webp")
+    assert photo.stored_bytes < photo.original_bytes
+
+
+class OverwritingStorage(FileSystemStorage):
+    """Keeps names as given and replaces existing files, like S3."""
+
+    def get_available_name(self, name, max_length=None):
+        if self.exists(name):
+            self.delete(name)
+        return name
+
+
+def test_deferred_normalization_in_place(settings, tmp_path, monkeypatch):
+    settings.MEDIA_NORMALIZE_MODE = DEFERRED
+    settings.MEDIA_NORMALIZE_MAX_DIMENSION = 64
+    field = SessionPhoto._meta.get_field("photo")  # noqa: SLF001
+    monkeypatch.setattr(field, "storage", OverwritingStorage(location=tmp_path))
+    photo = _add_photo(image_file("frame.webp", (640, 480), "WEBP"))
+    name = photo.photo.name
+
+    assert normalize_session_photo(photo.pk)
+
+    photo.refresh_from_db()
+    assert photo.photo.name == name
+    assert photo.photo.storage.exists(name)
+    with Image.open(photo.photo) as image:
+        assert max(image.size) == settings.MEDIA_NORMALIZE_MAX_DIMENSION
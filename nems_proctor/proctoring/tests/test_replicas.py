@@ -0,0 +1,81 @@
+import pytest
+from django.core.cache import cache
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from nems_proctor.proctoring.api.views import SessionViewSet
+from nems_proctor.proctoring.tests.factories import SessionFactory
+from nems_proctor.proctoring.tests.factories import image_file
+from nems_proctor.users.models import User
+
+# The replica mirrors the test database through a second connection, which
+# only sees committed data.
+pytestmark = pytest.mark.django_db(
+    transaction=True,
+    databases=["default", "replica"],
+)
+
+
+@pytest.fixture()
+def client(settings, tmp_path, user: User) -> APIClient:
+    settings.DATABASE_REPLICAS = ["replica"]
+    settings.MEDIA_ROOT = tmp_path
+    cache.clear()
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def _replica_queries(client, url):
+    with CaptureQueriesContext(connections["replica"]) as queries:
+        response = client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    return len(queries)
+
+
+def test_safe_api_reads_use_the_replica(client: APIClient):
+    session = SessionFactory()
+
+    assert _replica_queries(client, f"/api/v1/sessions/{session.pk}/photos/")
+
+
+def test_reads_stick_to_the_primary_after_a_write(client: APIClient):
+    session = SessionFactory()
+    response = client.post(
+        f"/api/v1/sessions/{session.pk}/add_photo/",
+        {"photo": image_file()},
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    assert not _replica_queries(client, f"/api/v1/sessions/{session.pk}/photos/")
+
+
+def test_views_can_opt_out(client: APIClient, monkeypatch):
+    session = SessionFactory()
+    monkeypatch.setattr(SessionViewSet, "use_replica", False, raising=False)
+
+    assert not _replica_queries(client, f"/api/v1/sessions/{session.pk}/")
+
+
+def test_credentials_issued_by_a_login_are_read_from_the_primary(
+    client: APIClient,
+    user: User,
+):
+    user.set_password("password")
+    user.save()
+    response = APIClient().post(
+        "/auth-token/",
+        {"username": user.username, "password": "password"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    client.force_authenticate(None)
+    client.credentials(HTTP_AUTHORIZATION=f"Token {response.data['token']}")
+
+    with CaptureQueriesContext(connections["replica"]) as queries:
+        response = client.get("/api/v1/sessions/")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert queries
+    assert not any("authtoken_token" in query["sql"] for query in queries)
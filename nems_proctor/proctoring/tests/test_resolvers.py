@@ -0,0 +1,105 @@
+import pytest
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from nems_proctor.proctoring.api import serializers
+from nems_proctor.proctoring.api.serializers import SessionSerializer
+from nems_proctor.proctoring.resolvers import provision_users
+from nems_proctor.proctoring.resolvers import resolve_users
+from nems_proctor.proctoring.tests.factories import ExamFactory
+from nems_proctor.users.models import User
+from nems_proctor.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    cache.clear()
+
+
+def test_provision_users_creates_missing_in_one_insert(
+    user: User,
+    django_assert_num_queries,
+):
+    # lookup, insert, lookup of the inserted rows
+    with django_assert_num_queries(3):
+        users = provision_users(
+            [user.username, "taker-1", "taker-2"],
+            company_id=user.company_id,
+        )
+    assert set(users) == {user.username, "taker-1", "taker-2"}
+    assert User.objects.get(username="taker-1").company_id == user.company_id
+
+
+def test_resolve_users_is_cached(user: User, django_assert_num_queries):
+    resolve_users([user.username])
+    with django_assert_num_queries(0):
+        assert resolve_users([user.username])[user.username].pk == user.pk
+
+
+def test_renamed_user_is_not_resolved_by_old_name(user: User):
+    old_username = user.username
+    resolve_users([old_username])
+    user.username = "renamed"
+    user.save()
+    assert resolve_users([old_username]) == {}
+
+
+def test_session_serializer_resolves_without_queries(django_assert_num_queries):
+    exam = ExamFactory()
+    taker = UserFactory(company_id=exam.pk)
+    proctor = UserFactory()
+    data = {
+        "exam": exam.exam_code,
+        "taker": taker.username,
+        "proctor": proctor.username,
+    }
+    assert SessionSerializer(data=data).is_valid()
+    with django_assert_num_queries(0):
+        serializer = SessionSerializer(data=data)
+        assert serializer.is_valid(), serializer.errors
+    session = serializer.save()
+    assert session.taker_id == taker.pk
+    assert session.proctor_id == proctor.pk
+    assert session.exam_id == exam.pk
+    assert session.company_id == taker.company_id
+
+
+def test_unprovisioned_taker_is_rejected(monkeypatch):
+    # E.g. the insert was skipped for a conflict on another column.
+    monkeypatch.setattr(serializers, "provision_users", lambda *args, **kwargs: {})
+    data = {"exam": ExamFactory().exam_code, "taker": "new-taker"}
+
+    serializer = SessionSerializer(data=data)
+
+    assert not serializer.is_valid()
+    assert "taker" in serializer.errors
+
+
+def test_provision_takers_requires_permission(user: User):
+    client = APIClient()
+    client.force_authenticate(user)
+    response = client.post(
+        "/api/v1/sessions/provision_takers/",
+        {"usernames": ["a"]},
+        format="json",
+    )
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert not User.objects.filter(username="a").exists()
+
+
+def test_provision_takers_endpoint(user: User):
+    user.user_permissions.add(Permission.objects.get(codename="add_user"))
+    client = APIClient()
+    client.force_authenticate(user)
+    response = client.post(
+        "/api/v1/sessions/provision_takers/",
+        {"usernames": ["a", "b", user.username]},
+        format="json",
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert set(response.data["takers"]) == {"a", "b", user.username}
+    assert User.objects.filter(username__in=["a", "b"]).exists()
@@ -0,0 +1,80 @@
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework.test import APIRequestFactory
+
+from nems_proctor.proctoring.api.rows import RowSerializer
+from nems_proctor.proctoring.api.serializers import SessionPhotoSerializer
+from nems_proctor.proctoring.api.serializers import SessionRecordSerializer
+from nems_proctor.proctoring.api.serializers import SessionSerializer
+from nems_proctor.proctoring.models import RecordingType
+from nems_proctor.proctoring.models import SessionPhoto
+from nems_proctor.proctoring.models import SessionRecord
+from nems_proctor.proctoring.tests.factories import SessionFactory
+from nems_proctor.proctoring.tests.factories import image_file
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def session():
+    session = SessionFactory()
+    SessionPhoto.objects.create(session=session, photo=image_file("a b+c.png"))
+    SessionPhoto.objects.create(
+        session=session,
+        photo=image_file(),
+        company_id=7,
+        motion_score=0.25,
+        brightness=0.5,
+        variance=0.125,
+        scored_at=timezone.now(),
+    )
+    SessionRecord.objects.create(
+        session=session,
+        recording_type=RecordingType.AUDIO,
+        file=SimpleUploadedFile("voice.wav", b"RIFF"),
+        original_bytes=4,
+        activity={"duration": 1.0},
+    )
+    return session
+
+
+@pytest.mark.parametrize("media_url", ["/media/", "http://media.testserver/"])
+@pytest.mark.parametrize(
+    ("serializer_class", "model"),
+    [(SessionPhotoSerializer, SessionPhoto), (SessionRecordSerializer, SessionRecord)],
+)
+def test_same_data_as_serializer(session, settings, media_url, serializer_class, model):
+    settings.MEDIA_URL = media_url
+    queryset = model.objects.filter(session=session).order_by("pk")
+    context = {"request": APIRequestFactory().get("/")}
+
+    rows = RowSerializer(serializer_class, context)
+
+    assert rows.supports()
+    assert (
+        rows.serialize(queryset)
+        == serializer_class(
+            queryset,
+            many=True,
+            context=context,
+        ).data
+    )
+
+
+def test_unsupported_fields():
+    assert not RowSerializer(SessionSerializer).supports()
+
+
+def test_listing_endpoints(session, django_assert_num_queries):
+    client = APIClient()
+    client.force_authenticate(session.taker)
+
+    # ATOMIC_REQUESTS savepoint and release, photos.
+    with django_assert_num_queries(3):
+        photos = client.get("/api/v1/session-photos/").json()
+    by_session = client.get(f"/api/v1/sessions/{session.pk}/photos/").json()
+
+    assert len(photos) == session.sessionphoto_set.count()
+    assert by_session["photos"] == sorted(photos, key=lambda photo: photo["id"])
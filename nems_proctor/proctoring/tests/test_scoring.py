@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from nems_proctor.proctoring.models import SessionPhoto
+from nems_proctor.proctoring.scoring import score_frames
+from nems_proctor.proctoring.scoring import score_session
+from nems_proctor.proctoring.tests.factories import SessionFactory
+from nems_proctor.proctoring.tests.factories import image_file
+from nems_proctor.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+def test_score_frames():
+    black = np.zeros((4, 4), dtype=np.uint8)
+    white = np.full((4, 4), 255, dtype=np.uint8)
+    half = np.tile(np.array([0, 255], dtype=np.uint8), (4, 2))
+
+    scores = score_frames(np.stack([black, white, half]))
+
+    assert np.isnan(scores["motion_score"][0])
+    assert scores["motion_score"][1:].tolist() == pytest.approx([1.0, 0.5])
+    assert scores["brightness"].tolist() == pytest.approx([0.0, 1.0, 0.5])
+    assert scores["variance"].tolist() == pytest.approx([0.0, 0.0, 0.25])
+
+    scores = score_frames(np.stack([white]), previous=black)
+    assert scores["motion_score"].tolist() == pytest.approx([1.0])
+
+
+class TestScoreSession:
+    @pytest.fixture(autouse=True)
+    def _media_root(self, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+
+    def _photos(self, session, *colors):
+        return [
+            SessionPhoto.objects.create(session=session, photo=image_file(color=color))
+            for color in colors
+        ]
+
+    def test_scores_in_batches_and_incrementally(self):
+        session = SessionFactory()
+        photos = self._photos(session, "black", "black", "white")
+
+        assert score_session(session, batch_size=2) == len(photos)
+        assert score_session(session) == 0
+
+        self._photos(session, "black")
+        assert score_session(session) == 1
+
+        photos = session.sessionphoto_set.order_by("captured_at", "pk")
+        assert [photo.motion_score for photo in photos] == pytest.approx(
+            [None, 0.0, 1.0, 1.0],
+        )
+        assert [photo.brightness for photo in photos] == pytest.approx(
+            [0.0, 0.0, 1.0, 0.0],
+        )
+        assert all(photo.scored_at for photo in photos)
+
+    def test_broken_frames_are_skipped(self):
+        session = SessionFactory()
+        broken, photo = self._photos(session, "white", "white")
+        broken.photo.storage.delete(broken.photo.name)
+
+        assert score_session(session) == len([broken, photo])
+        broken.refresh_from_db()
+        photo.refresh_from_db()
+        assert broken.scored_at is not None
+        assert broken.brightness is None
+        assert photo.brightness == pytest.approx(1.0)
+
+    def test_listing_filters_and_sorts_by_score(self, user: User):
+        session = SessionFactory()
+        dark, bright, gray = self._photos(session, "black", "white", "gray")
+        score_session(session)
+        (unscored,) = self._photos(session, "white")
+        client = APIClient()
+        client.force_authenticate(user)
+        url = f"/api/v1/sessions/{session.pk}/photos/"
+
+        response = client.get(url, {"ordering": "-brightness"})
+        assert [photo["id"] for photo in response.data["photos"]] == [
+            bright.pk,
+            gray.pk,
+            dark.pk,
+            unscored.pk,
+        ]
+
+        response = client.get(url, {"brightness_max": "0.1"})
+        assert [photo["id"] for photo in response.data["photos"]] == [dark.pk]
+        assert response.data["count"] == len(response.data["photos"])
+
+        response = client.get(url)
+        assert response.data["count"] == len(response.data["photos"])
+
+        response = client.get("/api/v1/session-photos/", {"ordering": "motion_score"})
+        assert response.status_code == status.HTTP_200_OK
+
+        response = client.get(url, {"ordering": "photo"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
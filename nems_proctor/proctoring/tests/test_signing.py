@@ -0,0 +1,110 @@
+from datetime import UTC
+from datetime import datetime
+from urllib.parse import parse_qs
+from urllib.parse import urlsplit
+
+import pytest
+
+from nems_proctor.proctoring.api import fields
+from nems_proctor.proctoring.api.serializers import SessionPhotoSerializer
+from nems_proctor.proctoring.models import SessionPhoto
+from nems_proctor.proctoring.signing import media_urls
+from nems_proctor.proctoring.signing import signer_for
+from nems_proctor.proctoring.tests.factories import SessionFactory
+from nems_proctor.proctoring.tests.factories import image_file
+
+NOW = 1_700_000_123
+
+
+@pytest.fixture()
+def storage(settings):
+    # django-storages is only installed with the production requirements.
+    s3 = pytest.importorskip("storages.backends.s3")
+    settings.MEDIA_SIGNED_URLS = True
+    settings.MEDIA_SIGNED_URL_WINDOW = 900
+    settings.MEDIA_SIGNED_URL_TTL = 3600
+    return s3.S3Storage(
+        bucket_name="media-bucket",
+        location="media",
+        access_key="key",
+        secret_key="secret",  # noqa: S106
+        security_token="token",  # noqa: S106
+        region_name="eu-west-1",
+    )
+
+
+def test_matches_botocore(storage, monkeypatch):
+    from botocore import auth
+
+    from nems_proctor.proctoring.signing import _session
+    from nems_proctor.proctoring.signing import _sigv4_client
+
+    name = "sessions/1/2/3/photo one+2.jpg"
+    url = signer_for(storage).sign([name], now=NOW)[name]
+
+    window_start = NOW // 900 * 900
+    monkeypatch.setattr(
+        auth,
+        "get_current_datetime",
+        lambda: datetime.fromtimestamp(window_start, UTC).replace(tzinfo=None),
+    )
+    expected = _sigv4_client(_session(storage), storage).generate_presigned_url(
+        "get_object",
+        Params={"Bucket": "media-bucket", "Key": f"media/{name}"},
+        ExpiresIn=900 + 3600,
+    )
+    assert url == expected
+
+
+def test_urls_are_stable_within_a_window(storage):
+    signer = signer_for(storage)
+    name = "sessions/1/2/3/photo.jpg"
+
+    first = signer.sign([name], now=NOW)[name]
+    window_start = NOW // 900 * 900
+
+    assert signer.sign([name], now=window_start + 899)[name] == first
+    following = signer.sign([name], now=window_start + 900)[name]
+    assert following != first
+    query = parse_qs(urlsplit(following).query)
+    assert query["X-Amz-Expires"] == ["4500"]
+
+
+def test_signer_is_shared(storage):
+    assert signer_for(storage) is signer_for(storage)
+
+
+def test_disabled(storage, settings):
+    settings.MEDIA_SIGNED_URLS = False
+    name = "sessions/1/2/3/photo.jpg"
+
+    assert signer_for(storage) is None
+    assert media_urls(storage, [name, ""]) == {name: storage.url(name)}
+
+
+@pytest.mark.django_db()
+def test_listing_signs_in_one_batch(monkeypatch, rf):
+    session = SessionFactory()
+    photos = [
+        SessionPhoto.objects.create(session=session, photo=image_file())
+        for _ in range(3)
+    ]
+    calls = []
+
+    def recording_media_urls(storage, names):
+        calls.append(list(names))
+        return media_urls(storage, names)
+
+    monkeypatch.setattr(fields, "media_urls", recording_media_urls)
+    request = rf.get("/")
+
+    data = SessionPhotoSerializer(
+        photos,
+        many=True,
+        context={"request": request},
+    ).data
+
+    assert calls == [[photo.photo.name for photo in photos]]
+    assert [item["photo"] for item in data] == [
+        request.build_absolute_uri(photo.photo.url) for photo in photos
+    ]
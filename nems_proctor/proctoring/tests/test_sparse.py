@@ -0,0 +1,128 @@
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from nems_proctor.proctoring.models import RecordingType
+from nems_proctor.proctoring.models import SessionPhoto
+from nems_proctor.proctoring.models import SessionRecord
+from nems_proctor.proctoring.tests.factories import ExamFactory
+from nems_proctor.proctoring.tests.factories import SessionFactory
+from nems_proctor.proctoring.tests.factories import image_file
+from nems_proctor.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def _sessions(count):
+    sessions = SessionFactory.create_batch(count, proctor=UserFactory())
+    for session in sessions:
+        SessionPhoto.objects.create(session=session, photo=image_file())
+        SessionRecord.objects.create(
+            session=session,
+            recording_type=RecordingType.VIDEO,
+            file=SimpleUploadedFile("clip.webm", b"webm"),
+        )
+    return sessions
+
+
+def test_fields(client):
+    _sessions(2)
+
+    response = client.get("/api/v1/sessions/", {"fields": "id,start_time"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [set(item) for item in response.json()] == [{"id", "start_time"}] * 2
+
+
+def test_unknown_fields(client):
+    response = client.get("/api/v1/sessions/", {"fields": "id,secret"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "fields" in response.json()
+
+
+def test_unknown_expansion(client):
+    response = client.get("/api/v1/session-photos/", {"expand": "taker"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "expand" in response.json()
+
+
+@pytest.mark.parametrize(
+    ("params", "queries"),
+    [
+        # ATOMIC_REQUESTS savepoint and release, sessions with their
+        # taker, proctor and exam.
+        ({}, 3),
+        ({"fields": "id,is_active"}, 3),
+        # Records are prefetched.
+        ({"expand": "taker,proctor,exam,records"}, 4),
+    ],
+)
+def test_session_queries_do_not_grow_with_rows(
+    client,
+    django_assert_num_queries,
+    params,
+    queries,
+):
+    sessions = _sessions(3)
+
+    with django_assert_num_queries(queries):
+        data = client.get("/api/v1/sessions/", params).json()
+
+    assert len(data) == len(sessions)
+
+
+def test_session_expansion(client):
+    session = _sessions(1)[0]
+
+    data = client.get(
+        f"/api/v1/sessions/{session.pk}/",
+        {"fields": "id", "expand": "taker,exam,records"},
+    ).json()
+
+    assert set(data) == {"id", "taker", "exam", "records"}
+    assert data["taker"]["username"] == session.taker.username
+    assert data["exam"] == {
+        "id": session.exam.pk,
+        "exam_code": session.exam.exam_code,
+        "exam_title": session.exam.exam_title,
+        "description": session.exam.description,
+    }
+    assert [record["id"] for record in data["records"]] == list(
+        session.sessionrecord_set.values_list("id", flat=True),
+    )
+
+
+def test_photo_expansion(client, django_assert_num_queries):
+    sessions = _sessions(3)
+
+    # Savepoint and release, photos joined with their session, its taker,
+    # proctor and exam.
+    with django_assert_num_queries(3):
+        data = client.get(
+            "/api/v1/session-photos/",
+            {"fields": "id,photo", "expand": "session"},
+        ).json()
+
+    assert [set(item) for item in data] == [{"id", "photo", "session"}] * 3
+    assert {item["session"]["taker"] for item in data} == {
+        session.taker.username for session in sessions
+    }
+
+
+def test_exam_fields_skip_latest_session(user, client, django_assert_num_queries):
+    ExamFactory.create_batch(3, company_id=user.company_id)
+
+    with django_assert_num_queries(3):
+        data = client.get("/api/v1/Exam/", {"fields": "id,exam_code"}).json()
+
+    assert [set(item) for item in data] == [{"id", "exam_code"}] * 3
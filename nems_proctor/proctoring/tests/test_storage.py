@@ -0,0 +1,197 @@
+from pathlib import PurePosixPath
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.db import connection
+from django.db import transaction
+from django.urls import resolve
+
+from nems_proctor.proctoring.models import MediaBlob
+from nems_proctor.proctoring.models import SessionPhoto
+from nems_proctor.proctoring.storage import ContentAddressedStorage
+from nems_proctor.proctoring.storage import delete_session_media
+from nems_proctor.proctoring.storage import list_session_media
+from nems_proctor.proctoring.storage import release_connection
+from nems_proctor.proctoring.storage import save_with_media
+from nems_proctor.proctoring.storage import session_prefix
+from nems_proctor.proctoring.tests.factories import SessionFactory
+from nems_proctor.proctoring.tests.factories import image_file
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def inner(tmp_path) -> FileSystemStorage:
+    return FileSystemStorage(location=tmp_path)
+
+
+@pytest.fixture()
+def storage(inner) -> ContentAddressedStorage:
+    return ContentAddressedStorage(inner=inner)
+
+
+def test_identical_content_is_stored_once(storage, inner):
+    first = storage.save("photos/a.jpg", ContentFile(b"frame"))
+    second = storage.save("photos/b.jpg", ContentFile(b"frame"))
+
+    assert first == second
+    assert first.startswith("cas/")
+    assert inner.exists(first)
+    blob = MediaBlob.objects.get()
+    assert (blob.refcount, blob.dedup_hits, blob.size) == (2, 1, len(b"frame"))
+
+
+def test_object_is_deleted_with_its_last_reference(storage, inner):
+    name = storage.save("photos/a.jpg", ContentFile(b"frame"))
+    storage.save("photos/b.jpg", ContentFile(b"frame"))
+
+    storage.delete(name)
+    assert inner.exists(name)
+    storage.delete(name)
+    assert not inner.exists(name)
+    assert not MediaBlob.objects.exists()
+
+
+def test_deleting_media_rows_drops_their_references(
+    storage,
+    inner,
+    monkeypatch,
+    django_capture_on_commit_callbacks,
+):
+    monkeypatch.setattr(SessionPhoto._meta.get_field("photo"), "storage", storage)  # noqa: SLF001
+    session = SessionFactory()
+    first, second = (
+        SessionPhoto.objects.create(session=session, photo=image_file())
+        for _ in range(2)
+    )
+    name = first.photo.name
+    assert second.photo.name == name
+
+    with django_capture_on_commit_callbacks(execute=True):
+        first.delete()
+    assert MediaBlob.objects.get().refcount == 1
+    assert inner.exists(name)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        session.delete()
+    assert not MediaBlob.objects.exists()
+    assert not inner.exists(name)
+
+
+def test_deleting_media_rows_keeps_plain_files(
+    inner,
+    monkeypatch,
+    django_capture_on_commit_callbacks,
+):
+    monkeypatch.setattr(SessionPhoto._meta.get_field("photo"), "storage", inner)  # noqa: SLF001
+    photo = SessionPhoto.objects.create(session=SessionFactory(), photo=image_file())
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        photo.delete()
+    assert not callbacks
+    assert inner.exists(photo.photo.name)
+
+
+def test_upload_reuses_the_blob_of_a_concurrent_upload(storage, inner, monkeypatch):
+    name = storage.save("photos/a.jpg", ContentFile(b"frame"))
+    # Simulate a concurrent upload that wrote the blob after this one
+    # looked for it.
+    monkeypatch.setattr(storage, "_add_reference", lambda digest: None)
+
+    assert storage.save("photos/b.jpg", ContentFile(b"frame")) == name
+    blob = MediaBlob.objects.get()
+    assert (blob.refcount, blob.dedup_hits) == (2, 1)
+    assert sorted(inner.listdir(str(PurePosixPath(name).parent))[1]) == [
+        PurePosixPath(name).name,
+    ]
+
+
+def test_different_content_gets_different_keys(storage):
+    assert storage.save("a.png", ContentFile(b"one")) != storage.save(
+        "a.png",
+        ContentFile(b"two"),
+    )
+
+
+class TestSessionLayout:
+    @pytest.fixture(autouse=True)
+    def _media_root(self, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+
+    def test_media_is_keyed_by_company_exam_and_session(self):
+        session = SessionFactory()
+        photo = SessionPhoto.objects.create(session=session, photo=image_file())
+
+        assert photo.photo.name.startswith(
+            f"sessions/_/{session.exam_id}/{session.pk}/",
+        )
+        assert "/photos/" in photo.photo.name
+
+    def test_session_media_is_listed_and_deleted_by_prefix(self):
+        session, other = SessionFactory(), SessionFactory()
+        photos = [
+            SessionPhoto.objects.create(session=session, photo=image_file())
+            for _ in range(3)
+        ]
+        kept = SessionPhoto.objects.create(session=other, photo=image_file())
+
+        assert sorted(list_session_media(session)) == sorted(
+            photo.photo.name for photo in photos
+        )
+        assert delete_session_media(session) == len(photos)
+        assert list_session_media(session) == []
+        assert default_storage.exists(kept.photo.name)
+
+    def test_rekey_media_moves_flat_keys(self):
+        session = SessionFactory()
+        photo = SessionPhoto.objects.create(session=session, photo=image_file())
+        flat_name = default_storage.save("photos/frame.png", photo.photo.open())
+        default_storage.delete(photo.photo.name)
+        SessionPhoto.objects.filter(pk=photo.pk).update(photo=flat_name)
+
+        call_command("rekey_media", stdout=None)
+
+        photo.refresh_from_db()
+        assert photo.photo.name.startswith(session_prefix(session))
+        assert default_storage.exists(photo.photo.name)
+        assert not default_storage.exists(flat_name)
+
+
+class TestSaveWithMedia:
+    @pytest.fixture(autouse=True)
+    def _media_root(self, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+
+    def test_stored_object_is_removed_when_the_insert_fails(self, monkeypatch):
+        session = SessionFactory()
+
+        def fail(*args, **kwargs):
+            raise DatabaseError
+
+        monkeypatch.setattr(SessionPhoto, "save", fail)
+        with pytest.raises(DatabaseError):
+            save_with_media(SessionPhoto(session=session, photo=image_file()), "photo")
+
+        assert list_session_media(session) == []
+
+    def test_upload_actions_run_outside_atomic_requests(self):
+        for action in ("add_photo", "add_record"):
+            view = resolve(f"/api/v1/sessions/1/{action}/").func
+            assert "default" in getattr(view, "_non_atomic_requests", set())
+        assert not hasattr(resolve("/api/v1/sessions/1/").func, "_non_atomic_requests")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_connection_is_released_outside_transactions():
+    connection.ensure_connection()
+    with transaction.atomic():
+        release_connection(SessionPhoto)
+        assert connection.connection is not None
+
+    release_connection(SessionPhoto)
+
+    assert connection.connection is None
@@ -0,0 +1,83 @@
+import os
+import uuid
+
+import pytest
+from django.core.cache import cache
+from django_redis.exceptions import ConnectionInterrupted
+from redis.exceptions import ConnectionError as RedisConnectionError
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from nems_proctor.core import metrics
+from nems_proctor.proctoring.api import throttling
+from nems_proctor.proctoring.api.throttling import THROTTLED_METRIC
+from nems_proctor.proctoring.tests.factories import SessionFactory
+from nems_proctor.proctoring.tests.factories import image_file
+from nems_proctor.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    cache.clear()
+
+
+def test_add_photo_is_throttled_per_session(user: User, settings):
+    settings.UPLOAD_RATE_LIMITS = {"session": {"capacity": 1, "rate": 0.25}}
+    client = APIClient()
+    client.force_authenticate(user)
+    session = SessionFactory()
+    url = f"/api/v1/sessions/{session.pk}/add_photo/"
+
+    assert client.post(url, {"photo": image_file()}).status_code == (
+        status.HTTP_201_CREATED
+    )
+    response = client.post(url, {"photo": image_file()})
+
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert int(response["Retry-After"]) > 0
+    assert response.data["capture_interval"] == 1 / 0.25
+    assert metrics.snapshot()[THROTTLED_METRIC] == 1
+
+
+def test_other_sessions_are_not_affected(user: User, settings):
+    settings.UPLOAD_RATE_LIMITS = {"session": {"capacity": 1, "rate": 0.25}}
+    client = APIClient()
+    client.force_authenticate(user)
+    for session in SessionFactory.create_batch(2):
+        response = client.post(
+            f"/api/v1/sessions/{session.pk}/add_photo/",
+            {"photo": image_file()},
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+
+def test_uploads_are_allowed_when_redis_is_down(monkeypatch):
+    def unreachable(**kwargs):
+        raise RedisConnectionError
+
+    monkeypatch.setattr(throttling, "_script", unreachable)
+
+    assert throttling.consume([("throttle:upload:session:1", 1, 0.25)]) == 0
+
+
+def test_script_takes_no_token_for_replayed_requests(settings, monkeypatch):
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": os.environ.get("REDIS_URL", "redis://localhost:6379/0"),
+            "KEY_PREFIX": "test",
+        },
+    }
+    monkeypatch.setattr(throttling, "_script", None)
+    replay_key = f"idempotency:{uuid.uuid4()}"
+    try:
+        cache.set(replay_key, {"state": "done"}, 10)
+    except ConnectionInterrupted:
+        pytest.skip("Redis is not available.")
+    buckets = [(f"throttle:upload:session:{uuid.uuid4()}", 1, 0.01)]
+
+    assert throttling.consume(buckets) == 0
+    assert throttling.consume(buckets, replay_key=replay_key) == 0
+    assert throttling.consume(buckets) > 0
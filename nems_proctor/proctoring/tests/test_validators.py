@@ -0,0 +1,127 @@
+import pytest
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from nems_proctor.proctoring.models import SessionRecord
+from nems_proctor.proctoring.tests.factories import SessionFactory
+from nems_proctor.proctoring.tests.factories import image_file
+from nems_proctor.proctoring.validators import MediaInfo
+from nems_proctor.proctoring.validators import inspect_media
+from nems_proctor.proctoring.validators import sniff_format
+from nems_proctor.proctoring.validators import validate_media
+from nems_proctor.users.models import User
+
+
+@pytest.mark.parametrize(
+    ("image_format", "name"),
+    [("JPEG", "frame.jpg"), ("PNG", "frame.png"), ("WEBP", "frame.webp")],
+)
+def test_inspect_media_reads_image_dimensions(image_format, name):
+    upload = image_file(name, size=(320, 200), image_format=image_format)
+    assert inspect_media(upload) == MediaInfo(image_format.lower(), 320, 200)
+
+
+def test_inspect_media_recognises_audio_and_video():
+    assert inspect_media(SimpleUploadedFile("a.mp3", b"ID3" + bytes(64))).format == (
+        "mp3"
+    )
+    assert inspect_media(
+        SimpleUploadedFile("v.mp4", b"\x00\x00\x00\x18ftypmp42" + bytes(64)),
+    ) == MediaInfo("mp4")
+
+
+# MPEG-1 Layer III, 128 kbit/s, 44.1 kHz: 417-byte frames.
+MP3_FRAME = b"\xff\xfb\x90\x64" + bytes(413)
+
+
+def _ogg(packet):
+    # First page header (27 bytes, one segment) and its packet.
+    return b"OggS" + bytes(22) + bytes([1, len(packet)]) + packet
+
+
+def test_sniff_format_checks_mp3_frames():
+    assert sniff_format(MP3_FRAME * 2) == "mp3"
+    # Frame sync bits without a valid layer, or without a following frame.
+    assert sniff_format(b"\xff\xff" + bytes(1000)) is None
+    assert sniff_format(MP3_FRAME + bytes(100)) is None
+
+
+def test_sniff_format_tells_ogg_audio_from_video():
+    assert sniff_format(_ogg(b"\x01vorbis" + bytes(23))) == "oga"
+    assert sniff_format(_ogg(b"OpusHead" + bytes(11))) == "oga"
+    assert sniff_format(_ogg(b"\x80theora" + bytes(35))) == "ogg"
+
+
+def test_ogg_audio_gets_the_audio_size_limit(settings):
+    settings.MEDIA_MAX_BYTES = {**settings.MEDIA_MAX_BYTES, "audio": 100}
+    upload = SimpleUploadedFile("a.ogg", _ogg(b"\x01vorbis" + bytes(200)))
+
+    with pytest.raises(ValidationError, match="may not exceed"):
+        validate_media(upload, "audio")
+
+
+def test_validate_media_rejects_mismatched_extension():
+    with pytest.raises(ValidationError, match="does not match"):
+        validate_media(image_file("frame.jpg", image_format="PNG"), "photo")
+
+
+def test_validate_media_rejects_wrong_kind():
+    with pytest.raises(ValidationError, match="Unsupported"):
+        validate_media(image_file("frame.png"), "video")
+
+
+def test_validate_media_rejects_oversized_images(settings):
+    settings.MEDIA_MAX_IMAGE_DIMENSION = 100
+    with pytest.raises(ValidationError, match="pixels"):
+        validate_media(image_file(size=(101, 10)), "photo")
+
+
+@pytest.mark.django_db()
+class TestUploadEndpoints:
+    @pytest.fixture()
+    def client(self, user: User) -> APIClient:
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def test_add_photo_rejects_non_images_while_streaming(self, client: APIClient):
+        session = SessionFactory()
+        response = client.post(
+            f"/api/v1/sessions/{session.pk}/add_photo/",
+            {"photo": SimpleUploadedFile("frame.png", b"not an image")},
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "Unsupported" in response.data["detail"]
+
+    def test_add_photo_enforces_size_limit(self, client: APIClient, settings):
+        settings.MEDIA_MAX_BYTES = {**settings.MEDIA_MAX_BYTES, "image": 100}
+        session = SessionFactory()
+        response = client.post(
+            f"/api/v1/sessions/{session.pk}/add_photo/",
+            {"photo": image_file(size=(400, 400), color="red")},
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_add_record_accepts_audio(self, client: APIClient):
+        session = SessionFactory()
+        audio = b"ID3" + bytes(64)
+        response = client.post(
+            f"/api/v1/sessions/{session.pk}/add_record/",
+            {
+                "recording_type": "audio",
+                "file": SimpleUploadedFile("clip.mp3", audio),
+            },
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        assert SessionRecord.objects.get(session=session).original_bytes == len(audio)
+
+    def test_add_record_rejects_type_mismatch(self, client: APIClient):
+        session = SessionFactory()
+        response = client.post(
+            f"/api/v1/sessions/{session.pk}/add_record/",
+            {"recording_type": "video", "file": image_file("shot.png")},
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "file" in response.data
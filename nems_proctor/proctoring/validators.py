@@ -0,0 +1,316 @@
+"""
+Header-only validation of uploaded session media.
+
+Instead of decoding a whole image (``ImageField``) or trusting the file
+name (``FileExtensionValidator``), the container format and, for images,
+the pixel dimensions are read from the first bytes of the file. The same
+checks back the API serializers, the model ``clean()`` methods and the
+streaming upload handler that rejects oversized or mismatched uploads
+before their body has been read.
+"""
+
+import struct
+from pathlib import PurePath
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadhandler import FileUploadHandler
+from django.http.multipartparser import MultiPartParserError
+
+HEADER_BYTES = 64 * 1024
+
+IMAGE = "image"
+VIDEO = "video"
+AUDIO = "audio"
+
+# format -> (media kind, accepted file extensions)
+FORMATS = {
+    "jpeg": (IMAGE, {"jpg", "jpeg"}),
+    "png": (IMAGE, {"png"}),
+    "webp": (IMAGE, {"webp"}),
+    "mp4": (VIDEO, {"mp4"}),
+    "webm": (VIDEO, {"webm"}),
+    "ogg": (VIDEO, {"ogg"}),
+    # Ogg whose first stream is an audio codec.
+    "oga": (AUDIO, {"ogg", "oga"}),
+    "wav": (AUDIO, {"wav"}),
+    "mp3": (AUDIO, {"mp3"}),
+}
+
+# What each kind of upload may contain; keys are "photo" and the
+# RecordingType values.
+ALLOWED_FORMATS = {
+    "photo": {"jpeg", "png", "webp"},
+    "screenshot": {"jpeg", "png", "webp"},
+    "video": {"mp4", "webm", "ogg"},
+    "audio": {"mp3", "wav", "oga"},
+}
+
+
+class MediaInfo(NamedTuple):
+    format: str
+    width: int | None = None
+    height: int | None = None
+
+
+JPEG_SEGMENT = struct.Struct(">BBH")  # 0xFF, marker, payload length
+JPEG_FRAME = struct.Struct(">BHH")  # precision, height, width
+JPEG_MARKER_PREFIX = 0xFF
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+PNG_IHDR = struct.Struct(">II")
+VP8_FRAME = struct.Struct("<HH")
+OGG_PAGE_HEADER_BYTES = 27
+# Identification packets that start the first stream of an audio-only Ogg.
+OGG_AUDIO_CODECS = (b"\x01vorbis", b"OpusHead", b"\x7fFLAC", b"Speex   ")
+MP3_FRAME_SYNC = 0xFFE00000
+MP3_LAYER_III = 0b01
+MP3_MPEG1 = 0b11
+MP3_RESERVED_RATE = 0b11
+# Layer III bitrates (kbit/s) by index, for MPEG-1 and for MPEG-2/2.5.
+MP3_BITRATES = {
+    True: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    False: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# Sample rates by version bits (MPEG-2.5, reserved, MPEG-2, MPEG-1).
+MP3_SAMPLE_RATES = {
+    0b00: (11025, 12000, 8000),
+    0b10: (22050, 24000, 16000),
+    0b11: (44100, 48000, 32000),
+}
+# format -> (offset, magic bytes) pairs that must all match
+SIGNATURES = (
+    ("jpeg", ((0, b"\xff\xd8\xff"),)),
+    ("png", ((0, b"\x89PNG\r\n\x1a\n"),)),
+    ("webp", ((0, b"RIFF"), (8, b"WEBP"))),
+    ("wav", ((0, b"RIFF"), (8, b"WAVE"))),
+    ("mp4", ((4, b"ftyp"),)),
+    ("webm", ((0, b"\x1a\x45\xdf\xa3"),)),
+    ("ogg", ((0, b"OggS"),)),
+    ("mp3", ((0, b"ID3"),)),
+)
+
+
+def _jpeg_size(file):
+    """
+    Walks the JPEG marker segments, seeking over their payloads, until the
+    start-of-frame header that carries the dimensions.
+    """
+    file.seek(2)
+    while True:
+        segment = file.read(JPEG_SEGMENT.size)
+        if len(segment) < JPEG_SEGMENT.size:
+            return None, None
+        prefix, marker, length = JPEG_SEGMENT.unpack(segment)
+        if prefix != JPEG_MARKER_PREFIX:
+            return None, None
+        if marker in JPEG_SOF_MARKERS:
+            frame = file.read(JPEG_FRAME.size)
+            if len(frame) < JPEG_FRAME.size:
+                return None, None
+            _, height, width = JPEG_FRAME.unpack(frame)
+            return width, height
+        file.seek(length - 2, 1)
+
+
+def _webp_size(header):
+    chunk = header[12:16]
+    if chunk == b"VP8 ":
+        frame = header[26:30]
+        if len(frame) == VP8_FRAME.size:
+            width, height = VP8_FRAME.unpack(frame)
+            return width & 0x3FFF, height & 0x3FFF
+    elif chunk == b"VP8L":
+        bits = header[21:25]
+        if len(bits) == len(b"bits"):
+            bits = int.from_bytes(bits, "little")
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    elif chunk == b"VP8X":
+        canvas = header[24:30]
+        if len(canvas) == len(b"canvas"):
+            width = int.from_bytes(canvas[:3], "little") + 1
+            height = int.from_bytes(canvas[3:], "little") + 1
+            return width, height
+    return None, None
+
+
+def _mp3_frame_length(header, offset):
+    """
+    Returns the length of the MPEG audio Layer III frame whose header is at
+    ``offset``, or ``None`` if there is no valid one.
+    """
+    if len(header) < offset + 4:
+        return None
+    bits = int.from_bytes(header[offset : offset + 4], "big")
+    if bits & MP3_FRAME_SYNC != MP3_FRAME_SYNC:
+        return None
+    version = (bits >> 19) & 0b11
+    layer = (bits >> 17) & 0b11
+    bitrate_index = (bits >> 12) & 0b1111
+    rate_index = (bits >> 10) & 0b11
+    if (
+        version not in MP3_SAMPLE_RATES
+        or layer != MP3_LAYER_III
+        or bitrate_index in (0, 0b1111)
+        or rate_index == MP3_RESERVED_RATE
+    ):
+        return None
+    mpeg1 = version == MP3_MPEG1
+    bitrate = MP3_BITRATES[mpeg1][bitrate_index] * 1000
+    sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+    padding = (bits >> 9) & 1
+    return (144 if mpeg1 else 72) * bitrate // sample_rate + padding
+
+
+def _is_mp3_stream(header):
+    # A frame-sync bit pattern alone is common in arbitrary data; a valid
+    # frame header followed by another one at its computed end is not.
+    length = _mp3_frame_length(header, 0)
+    return length is not None and _mp3_frame_length(header, length) is not None
+
+
+def _is_ogg_audio(header):
+    segments = header[OGG_PAGE_HEADER_BYTES - 1 : OGG_PAGE_HEADER_BYTES]
+    if not segments:
+        return False
+    packet = header[OGG_PAGE_HEADER_BYTES + segments[0] :]
+    return packet.startswith(OGG_AUDIO_CODECS)
+
+
+def sniff_format(header):
+    """
+    Returns the format name for the leading bytes of a file, or ``None``.
+    """
+    for media_format, signature in SIGNATURES:
+        if all(
+            header[offset : offset + len(magic)] == magic for offset, magic in signature
+        ):
+            if media_format == "ogg" and _is_ogg_audio(header):
+                return "oga"
+            return media_format
+    if _is_mp3_stream(header):
+        return "mp3"
+    return None
+
+
+def inspect_media(file):
+    """
+    Returns the ``MediaInfo`` of ``file`` reading at most its first
+    ``HEADER_BYTES`` (plus the JPEG segment headers), or ``None`` when the
+    format is not recognised.
+    """
+    file.seek(0)
+    header = file.read(HEADER_BYTES)
+    media_format = sniff_format(header)
+    if media_format is None:
+        return None
+    width = height = None
+    if media_format == "png" and len(header[16:24]) == PNG_IHDR.size:
+        width, height = PNG_IHDR.unpack(header[16:24])
+    elif media_format == "webp":
+        width, height = _webp_size(header)
+    elif media_format == "jpeg":
+        width, height = _jpeg_size(file)
+    file.seek(0)
+    return MediaInfo(media_format, width, height)
+
+
+def max_bytes(media_format):
+    return settings.MEDIA_MAX_BYTES[FORMATS[media_format][0]]
+
+
+def validate_media(file, upload_kind):
+    """
+    Validates an uploaded or stored file for ``upload_kind`` ("photo" or a
+    ``RecordingType`` value) and returns its ``MediaInfo``.
+    """
+    allowed = ALLOWED_FORMATS[upload_kind]
+    info = inspect_media(file)
+    if info is None or info.format not in allowed:
+        message = (
+            f"Unsupported file type for {upload_kind}. "
+            f"Allowed types: {', '.join(sorted(allowed))}."
+        )
+        raise ValidationError(message, code="invalid_type")
+
+    extension = PurePath(file.name or "").suffix.lstrip(".").lower()
+    if extension not in FORMATS[info.format][1]:
+        message = (
+            f"File extension '.{extension}' does not match its "
+            f"{info.format} content."
+        )
+        raise ValidationError(message, code="extension_mismatch")
+
+    if file.size > max_bytes(info.format):
+        message = (
+            f"{info.format} files may not exceed "
+            f"{max_bytes(info.format) // (1024 * 1024)} MB."
+        )
+        raise ValidationError(message, code="too_large")
+
+    if FORMATS[info.format][0] == IMAGE:
+        if not info.width or not info.height:
+            message = "Could not read the image dimensions."
+            raise ValidationError(message, code="invalid_image")
+        if max(info.width, info.height) > settings.MEDIA_MAX_IMAGE_DIMENSION:
+            message = (
+                "Images may not be larger than "
+                f"{settings.MEDIA_MAX_IMAGE_DIMENSION} pixels on either side."
+            )
+            raise ValidationError(message, code="too_large")
+    return info
+
+
+class UploadRejectedError(MultiPartParserError):
+    pass
+
+
+class IngestUploadHandler(FileUploadHandler):
+    """
+    Rejects a media upload while it is still streaming in: as soon as the
+    first chunk shows a format outside ``allowed_formats``, or the bytes
+    received exceed the limit for the sniffed format, parsing stops without
+    reading (or storing) the rest of the body.
+
+    DRF's ``MultiPartParser`` turns the error into a 400 response.
+    """
+
+    def __init__(self, request, upload_kinds):
+        super().__init__(request)
+        self.allowed_formats = set().union(
+            *(ALLOWED_FORMATS[kind] for kind in upload_kinds),
+        )
+        self.limit = 0
+
+    def handle_raw_input(  # noqa: PLR0913
+        self,
+        input_data,
+        META,  # noqa: N803
+        content_length,
+        boundary,
+        encoding=None,
+    ):
+        largest = max(max_bytes(media_format) for media_format in self.allowed_formats)
+        # HEADER_BYTES leaves room for the multipart envelope and form fields.
+        if content_length and content_length > largest + HEADER_BYTES:
+            message = f"Upload exceeds {largest // (1024 * 1024)} MB."
+            raise UploadRejectedError(message)
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.limit = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        if start == 0:
+            media_format = sniff_format(raw_data)
+            if media_format not in self.allowed_formats:
+                message = f"Unsupported file type for '{self.field_name}'."
+                raise UploadRejectedError(message)
+            self.limit = max_bytes(media_format)
+        if start + len(raw_data) > self.limit:
+            message = f"'{self.field_name}' exceeds {self.limit // (1024 * 1024)} MB."
+            raise UploadRejectedError(message)
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
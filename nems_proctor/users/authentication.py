@@ -0,0 +1,111 @@
+import hashlib
+import pickle
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from nems_proctor.core.cache import LocalLRUCache
+
+_local_tokens = LocalLRUCache(
+    maxsize=settings.AUTH_TOKEN_CACHE_LOCAL_SIZE,
+    timeout=settings.AUTH_TOKEN_CACHE_LOCAL_TIMEOUT,
+)
+
+
+# Bumped on every revocation. Local copies are only trusted while the
+# generation they were cached under is current, so a revoked token is
+# rejected by every process on its next request.
+GENERATION_KEY = "auth:token:generation"
+
+
+def _cache_key(key):
+    # Never put the raw token into the shared cache's key space.
+    return "auth:token:" + hashlib.sha256(key.encode()).hexdigest()
+
+
+def get_cached_token(key):
+    """
+    Returns the cached ``Token`` (with its ``user`` preloaded) for ``key``
+    or ``None``, and the current revocation generation to cache a token
+    looked up in the database under.
+
+    A local copy is used if it is of the current generation; either way it
+    takes one round trip to the shared cache.
+    """
+    cache_key = _cache_key(key)
+    local = _local_tokens.get(cache_key)
+    if local is not None:
+        generation = cache.get(GENERATION_KEY, 0)
+        local_generation, blob = local
+        if local_generation != generation:
+            blob = cache.get(cache_key)
+    else:
+        values = cache.get_many([GENERATION_KEY, cache_key])
+        generation = values.get(GENERATION_KEY, 0)
+        blob = values.get(cache_key)
+    if blob is None:
+        return None, generation
+    _local_tokens.set(cache_key, (generation, blob))
+    # Each request gets its own unpickled copy, so views mutating
+    # ``request.user`` never leak state into other requests.
+    return pickle.loads(blob), generation  # noqa: S301
+
+
+def cache_token(token, generation):
+    """
+    Caches ``token``, read from the database while ``generation`` was
+    current.
+
+    A revocation since then may have read the token before this write, so
+    the generation is checked again after it and the entry withdrawn if it
+    changed. ``invalidate_token`` bumps the generation before deleting, so
+    one of the two always removes a stale entry.
+    """
+    cache_key = _cache_key(token.key)
+    blob = pickle.dumps(token)
+    cache.set(cache_key, blob, settings.AUTH_TOKEN_CACHE_TIMEOUT)
+    if cache.get(GENERATION_KEY, 0) != generation:
+        cache.delete(cache_key)
+        return
+    _local_tokens.set(cache_key, (generation, blob))
+
+
+def invalidate_token(key):
+    """
+    Drops ``key`` from the shared cache and from this process' LRU, and
+    bumps the revocation generation so other processes stop trusting their
+    local copies right away.
+    """
+    cache_key = _cache_key(key)
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        # Not set yet, or evicted: any new value invalidates local copies.
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+    cache.delete(cache_key)
+    _local_tokens.delete(cache_key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that skips the ``Token`` + ``User`` join on repeat
+    requests by resolving tokens from a per-process LRU backed by the shared
+    cache. Entries are invalidated when the token is deleted or its user is
+    saved (e.g. deactivated), see ``nems_proctor.users.signals``.
+    """
+
+    def authenticate_credentials(self, key):
+        token, generation = get_cached_token(key)
+        if token is None:
+            user, token = super().authenticate_credentials(key)
+            cache_token(token, generation)
+            return (user, token)
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+
+        return (token.user, token)
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db import transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+
+from nems_proctor.users.authentication import CachedTokenAuthentication
+from nems_proctor.users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares DB queries and latency per upload request for "
+        "TokenAuthentication and CachedTokenAuthentication."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        requests = options["requests"]
+        with transaction.atomic():
+            user = User.objects.create(username="bench-token-auth")
+            token = Token.objects.create(user=user)
+            request = APIRequestFactory().post(
+                "/api/v1/sessions/1/add_photo/",
+                HTTP_AUTHORIZATION=f"Token {token.key}",
+            )
+            for authentication in (TokenAuthentication, CachedTokenAuthentication):
+                self._run(authentication(), request, requests)
+            transaction.set_rollback(True)
+
+    def _run(self, authentication, request, requests):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(requests):
+                authentication.authenticate(request)
+            elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{type(authentication).__name__}: "
+            f"{len(queries) / requests:.3f} queries/request, "
+            f"{elapsed / requests * 1e6:.1f} us/request",
+        )
@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from nems_proctor.users.authentication import invalidate_token
+from nems_proctor.users.models import User
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    """
+    Any change to a user (deactivation, company move, ...) must be visible
+    to the next authenticated request, so drop the cached token.
+    """
+    if created:
+        return
+    for key in Token.objects.filter(user_id=instance.pk).values_list(
+        "key",
+        flat=True,
+    ):
+        invalidate_token(key)
@@ -0,0 +1,88 @@
+import pytest
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from nems_proctor.users.authentication import CachedTokenAuthentication
+from nems_proctor.users.authentication import _cache_key
+from nems_proctor.users.authentication import _local_tokens
+from nems_proctor.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+class TestCachedTokenAuthentication:
+    @pytest.fixture(autouse=True)
+    def _clear_local_tokens(self):
+        _local_tokens.clear()
+
+    def test_repeat_requests_skip_the_database(
+        self,
+        user: User,
+        django_assert_num_queries,
+    ):
+        token = Token.objects.create(user=user)
+        authentication = CachedTokenAuthentication()
+        with django_assert_num_queries(1):
+            authentication.authenticate_credentials(token.key)
+        with django_assert_num_queries(0):
+            cached_user, cached_token = authentication.authenticate_credentials(
+                token.key,
+            )
+        assert cached_user == user
+        assert cached_token.key == token.key
+
+    def test_deleted_token_is_rejected(self, user: User):
+        token = Token.objects.create(user=user)
+        authentication = CachedTokenAuthentication()
+        key = token.key
+        authentication.authenticate_credentials(key)
+        token.delete()
+        with pytest.raises(AuthenticationFailed):
+            authentication.authenticate_credentials(key)
+
+    def test_token_revoked_by_another_process_is_rejected(self, user: User):
+        token = Token.objects.create(user=user)
+        authentication = CachedTokenAuthentication()
+        key = token.key
+        authentication.authenticate_credentials(key)
+        local_copy = _local_tokens.get(_cache_key(key))
+
+        token.delete()
+        # Another process still has the token in its LRU.
+        _local_tokens.set(_cache_key(key), local_copy)
+
+        with pytest.raises(AuthenticationFailed):
+            authentication.authenticate_credentials(key)
+
+    def test_token_revoked_during_lookup_is_not_cached(self, user: User, monkeypatch):
+        token = Token.objects.create(user=user)
+        key = token.key
+        lookup = TokenAuthentication.authenticate_credentials
+
+        def lookup_then_revoke(self, key):
+            credentials = lookup(self, key)
+            Token.objects.filter(key=key).delete()
+            return credentials
+
+        with monkeypatch.context() as patch:
+            patch.setattr(
+                TokenAuthentication,
+                "authenticate_credentials",
+                lookup_then_revoke,
+            )
+            CachedTokenAuthentication().authenticate_credentials(key)
+
+        # Another process, without a local copy.
+        _local_tokens.clear()
+        with pytest.raises(AuthenticationFailed):
+            CachedTokenAuthentication().authenticate_credentials(key)
+
+    def test_deactivated_user_is_rejected(self, user: User):
+        token = Token.objects.create(user=user)
+        authentication = CachedTokenAuthentication()
+        authentication.authenticate_credentials(token.key)
+        user.is_active = False
+        user.save()
+        with pytest.raises(AuthenticationFailed):
+            authentication.authenticate_credentials(token.key)